@@ -0,0 +1,157 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "prediction_rollups"
+
+
+def _day(timestamp: datetime) -> datetime:
+    return datetime(timestamp.year, timestamp.month, timestamp.day)
+
+
+def rollup_groups(predictions: Iterable[dict]) -> Dict[tuple, dict]:
+    """Count, confidence sum and latest timestamp per (user, disease, day)."""
+    groups: Dict[tuple, dict] = defaultdict(lambda: {"count": 0, "confidence_sum": 0.0, "last": None})
+    for prediction in predictions:
+        key = (prediction["user_id"], prediction["disease_name"], _day(prediction["timestamp"]))
+        group = groups[key]
+        group["count"] += 1
+        group["confidence_sum"] += float(prediction["confidence"])
+        if group["last"] is None or prediction["timestamp"] > group["last"]:
+            group["last"] = prediction["timestamp"]
+    return groups
+
+
+def rollup_updates(predictions: Iterable[dict]) -> List[UpdateOne]:
+    """
+    Fold prediction documents into one upsert per (user, disease, day).
+
+    Counts and confidence sums are incremented, so applying the updates for a
+    batch of new predictions keeps the rollups in step with the raw records.
+    """
+    return [
+        UpdateOne(
+            {"_id": f"{user_id}|{disease_name}|{day:%Y-%m-%d}"},
+            {
+                "$inc": {"count": group["count"], "confidence_sum": group["confidence_sum"]},
+                "$max": {"last_timestamp": group["last"]},
+                "$setOnInsert": {"user_id": user_id, "disease_name": disease_name, "day": day},
+            },
+            upsert=True,
+        )
+        for (user_id, disease_name, day), group in rollup_groups(predictions).items()
+    ]
+
+
+async def record_rollups(database, predictions: List[dict]):
+    """Apply newly written predictions to the daily rollups."""
+    updates = rollup_updates(predictions)
+    if updates:
+        await database[ROLLUP_COLLECTION].bulk_write(updates, ordered=False)
+
+
+async def rebuild_rollups(database):
+    """Recompute every rollup from the predictions collection."""
+    await database["predictions"].aggregate([
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "disease_name": "$disease_name",
+                "day": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+            },
+            "count": {"$sum": 1},
+            "confidence_sum": {"$sum": "$confidence"},
+            "last_timestamp": {"$max": "$timestamp"},
+        }},
+        {"$project": {
+            "_id": {"$concat": [
+                "$_id.user_id", "|", "$_id.disease_name", "|",
+                {"$dateToString": {"date": "$_id.day", "format": "%Y-%m-%d"}},
+            ]},
+            "user_id": "$_id.user_id",
+            "disease_name": "$_id.disease_name",
+            "day": "$_id.day",
+            "count": 1,
+            "confidence_sum": 1,
+            "last_timestamp": 1,
+        }},
+        {"$merge": {"into": ROLLUP_COLLECTION, "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]).to_list(length=None)
+
+
+async def backfill_rollups(database):
+    """Build the rollups once for deployments that already have predictions."""
+    if await database[ROLLUP_COLLECTION].estimated_document_count():
+        return
+    if not await database["predictions"].estimated_document_count():
+        return
+    logger.info("Building prediction rollups from existing predictions")
+    await rebuild_rollups(database)
+
+
+def analytics_pipeline(
+    user_id: str,
+    granularity: str = "week",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    disease: Optional[str] = None,
+) -> List[dict]:
+    """
+    Aggregation over the rollups giving detections per disease per period.
+    Only rollup documents are read, at most one per disease per day.
+    """
+    match: dict = {"user_id": user_id}
+    if start or end:
+        match["day"] = {}
+        if start:
+            match["day"]["$gte"] = _day(start)
+        if end:
+            match["day"]["$lt"] = end
+    if disease:
+        match["disease_name"] = disease
+
+    period = {"$dateTrunc": {"date": "$day", "unit": granularity}}
+    if granularity == "week":
+        period["$dateTrunc"]["startOfWeek"] = "monday"
+
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {"period": period, "disease_name": "$disease_name"},
+            "count": {"$sum": "$count"},
+            "confidence_sum": {"$sum": "$confidence_sum"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "period": "$_id.period",
+            "disease_name": "$_id.disease_name",
+            "count": 1,
+            "mean_confidence": {"$divide": ["$confidence_sum", "$count"]},
+        }},
+        {"$sort": {"period": 1, "disease_name": 1}},
+    ]
+
+
+async def prediction_analytics(database, user_id: str, granularity: str = "week", **filters) -> dict:
+    """Detections per disease per period, plus totals per disease."""
+    series = await database[ROLLUP_COLLECTION].aggregate(
+        analytics_pipeline(user_id, granularity, **filters)
+    ).to_list(length=None)
+    return analytics_summary(granularity, series)
+
+
+def analytics_summary(granularity: str, series: List[dict]) -> dict:
+    """Add per-disease totals to a ``{period, disease_name, count, mean_confidence}`` series."""
+    totals: Dict[str, int] = defaultdict(int)
+    for row in series:
+        totals[row["disease_name"]] += row["count"]
+    return {
+        "granularity": granularity,
+        "series": series,
+        "totals": dict(sorted(totals.items(), key=lambda item: -item[1])),
+    }
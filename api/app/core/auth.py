@@ -1,23 +1,37 @@
 from datetime import datetime, timedelta
+import time
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
 from app.schemas.user import TokenData, User
+from app.core.cache import TTLCache
 from app.core.database import db
+from app.core.metrics import stage_timer
+from app.core.passwords import get_password_hasher
 
 # Constants
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing (cost from BCRYPT_ROUNDS)
+pwd_context = get_password_hasher().context
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
 
+# Users resolved by username and tokens whose signature was already checked,
+# so authenticated requests usually skip both the JWT decode and MongoDB
+_user_cache = TTLCache(settings.AUTH_USER_CACHE_MAX_ENTRIES, settings.AUTH_USER_CACHE_TTL_SECONDS)
+_token_cache = TTLCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES, settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+# Deactivated users, remembered for a token lifetime so trusted claims stop working at once.
+# Like the caches above this is per process: other workers keep honouring the token until it expires.
+_revoked_users = TTLCache(settings.AUTH_USER_CACHE_MAX_ENTRIES, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# User fields carried in the token when AUTH_TRUST_TOKEN_CLAIMS is enabled
+USER_CLAIMS = ("id", "email", "full_name", "is_active")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -28,18 +42,47 @@ def get_password_hash(password: str) -> str:
 
 async def authenticate_user(username: str, password: str) -> Optional[User]:
     """Authenticate a user."""
-    users_collection = db.get_db()["users"]
-    user_dict = await users_collection.find_one({"username": username})
+    user_dict = await db.storage.find_user(username)
     
     if not user_dict:
         return None
     
     user = User(**user_dict)
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await get_password_hasher().verify_and_update(password, user.hashed_password)
+    if not verified:
         return None
     
+    if new_hash is not None:
+        # BCRYPT_ROUNDS changed since this hash was made; store one with the current cost
+        await update_user(username, {"hashed_password": new_hash})
+        user.hashed_password = new_hash
+    
     return user
 
+def user_claims(user: User) -> dict:
+    """Claims identifying ``user`` in an access token."""
+    claims = {"sub": user.username}
+    if settings.AUTH_TRUST_TOKEN_CLAIMS:
+        claims.update({field: getattr(user, field) for field in USER_CLAIMS})
+    return claims
+
+def invalidate_user(username: str):
+    """Forget the cached user so the next request reads it from the database again."""
+    _user_cache.pop(username)
+
+async def update_user(username: str, changes: dict) -> Optional[User]:
+    """
+    Apply ``changes`` to a stored user and drop any cached copy. User writes
+    go through here so the caches never outlive them in this process.
+    """
+    user_dict = await db.storage.update_user(username, changes)
+    invalidate_user(username)
+    if changes.get("is_active") is False:
+        _revoked_users.set(username, True)
+    elif changes.get("is_active") is True:
+        _revoked_users.pop(username)
+    return User(**user_dict) if user_dict else None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
     to_encode = data.copy()
@@ -53,6 +96,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _decode_token(token: str) -> Optional[dict]:
+    """Return the verified claims of a token, or None if it is invalid or expired."""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        # The signature was checked already; only the expiry can have changed
+        return cached if cached["exp"] > time.time() else None
+    
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("sub") is None:
+        return None
+    _token_cache.set(token, payload)
+    return payload
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """Get current user from JWT token."""
     credentials_exception = HTTPException(
@@ -61,22 +120,39 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
+    with stage_timer("auth_token"):
+        payload = _decode_token(token)
+    if payload is None:
         raise credentials_exception
+    token_data = TokenData(username=payload["sub"])
     
-    users_collection = db.get_db()["users"]
-    user_dict = await users_collection.find_one({"username": token_data.username})
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and all(field in payload for field in USER_CLAIMS):
+        # Signed claims are trusted until the token expires; deactivation in this process still applies
+        if _revoked_users.get(token_data.username):
+            raise credentials_exception
+        user = _user_cache.get(("claims", token))
+        if user is None:
+            user = User(
+                username=token_data.username,
+                hashed_password="",
+                **{field: payload[field] for field in USER_CLAIMS}
+            )
+            _user_cache.set(("claims", token), user)
+        return user
+    
+    user = _user_cache.get(token_data.username)
+    if user is not None:
+        return user
+    
+    with stage_timer("auth_user_lookup"):
+        user_dict = await db.storage.find_user(token_data.username)
     
     if user_dict is None:
         raise credentials_exception
     
-    return User(**user_dict)
+    user = User(**user_dict)
+    _user_cache.set(token_data.username, user)
+    return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get current active user."""
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.executor import classify_batch, get_executor
+
+logger = logging.getLogger(__name__)
+
+_QueueItem = Tuple[np.ndarray, asyncio.Future, float]
+
+
+class InferenceBatcher:
+    """
+    Groups preprocessed samples from concurrent requests into batched forward passes.
+
+    A batch is flushed as soon as ``max_batch_size`` samples are queued or the
+    oldest queued sample has waited ``max_wait_ms``, whichever comes first. Each
+    caller then receives its own row of the batch output.
+
+    ``predict_batch`` runs on ``executor`` (anything with an async ``run(fn, *args)``)
+    or, if none is given, on the event loop's default thread pool.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[np.ndarray], Sequence[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 1,
+        executor=None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+        self.executor = executor
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+
+        self._batches = 0
+        self._samples = 0
+        self._errors = 0
+        self._batch_sizes: Counter = Counter()
+        self._total_wait = 0.0
+        self._total_forward = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None and not self._worker.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._worker = loop.create_task(self._run())
+
+    async def submit(self, sample: np.ndarray) -> Any:
+        """Queue one preprocessed sample and wait for its row of the model output."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((sample, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[_QueueItem]:
+        first = await self._queue.get()
+        items = [first]
+        deadline = first[2] + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            try:
+                items.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return items
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            await self._slots.acquire()
+            self._loop.create_task(self._flush(items))
+
+    async def _flush(self, items: List[_QueueItem]):
+        self._in_flight += 1
+        try:
+            items = [item for item in items if not item[1].cancelled()]
+            if not items:
+                return
+
+            started = time.perf_counter()
+            self._total_wait += sum(started - enqueued for _, _, enqueued in items)
+            batch = np.stack([sample for sample, _, _ in items])
+
+            try:
+                if self.executor is not None:
+                    outputs = await self.executor.run(self.predict_batch, batch)
+                else:
+                    outputs = await self._loop.run_in_executor(None, self.predict_batch, batch)
+            except Exception as e:
+                self._errors += 1
+                logger.error("Batched inference failed: %s", e)
+                for _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            self._total_forward += time.perf_counter() - started
+            self._batches += 1
+            self._samples += len(items)
+            self._batch_sizes[len(items)] += 1
+
+            for row, (_, future, _) in zip(outputs, items):
+                if not future.done():
+                    future.set_result(row)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def close(self):
+        """Stop the scheduler and fail any samples that are still queued."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Inference batcher is shutting down"))
+        self._worker = None
+
+    def stats(self) -> dict:
+        """Return queue depth and batch-size statistics."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches_in_flight": self._in_flight,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self._batches,
+            "samples": self._samples,
+            "errors": self._errors,
+            "mean_batch_size": self._samples / self._batches if self._batches else 0.0,
+            "mean_queue_wait_ms": 1000.0 * self._total_wait / self._samples if self._samples else 0.0,
+            "mean_forward_ms": 1000.0 * self._total_forward / self._batches if self._batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+        }
+
+
+_batcher = None
+
+def get_batcher() -> InferenceBatcher:
+    """
+    Returns a singleton batcher that runs formatted batches on the inference executor.
+    """
+    global _batcher
+    if _batcher is None:
+        executor = get_executor()
+        _batcher = InferenceBatcher(
+            classify_batch,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            max_concurrent_batches=executor.max_workers,
+            executor=executor,
+        )
+    return _batcher
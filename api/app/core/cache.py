@@ -0,0 +1,211 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Optional
+
+from app.core.config import settings
+from app.core.database import db
+from models.inference.common import disease_details
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU mapping whose entries expire ``ttl_seconds`` after insertion.
+    Safe to share between the event loop and executor threads.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove and return a value if present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def content_hash(data: bytes) -> str:
+    """Return the hex SHA-256 of uploaded bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class PredictionCache:
+    """
+    Caches prediction results by upload content hash and served model version.
+
+    The in-process tier is an LRU with TTL; the optional shared tier lives in
+    the ``prediction_cache`` MongoDB collection so all API workers benefit.
+    Keys include the model version, so switching models never serves stale
+    results, and the local tier is dropped as soon as a new version is seen.
+
+    Only the class and confidence are cached. The description and advice are
+    looked up in the disease catalogue on every hit, so catalogue edits show
+    up immediately and entries stay small. Classes the catalogue has no entry
+    for keep the details their predictor gave when last seen in this process.
+    """
+
+    collection_name = "prediction_cache"
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0, shared: bool = False):
+        self.local = TTLCache(max_entries, ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._model_version: Optional[str] = None
+        # Predictor-provided details by class name, used when the catalogue has no entry
+        self._fallbacks: Dict[str, Dict] = {}
+        self._local_hits = 0
+        self._shared_hits = 0
+        self._misses = 0
+        self._shared_errors = 0
+        self._invalidations = 0
+
+    def _key(self, image_hash: str, model_version: str) -> str:
+        if model_version != self._model_version:
+            if self._model_version is not None:
+                self.local.clear()
+                self._fallbacks.clear()
+                self._invalidations += 1
+                logger.info("Model changed to %s, prediction cache invalidated", model_version)
+            self._model_version = model_version
+        return f"{model_version}:{image_hash}"
+
+    async def ensure_indexes(self):
+        """
+        Create the TTL index that expires shared-tier entries. If MongoDB cannot
+        be reached, carry on with the in-process tier only.
+        """
+        if self.shared:
+            try:
+                await db.get_db()[self.collection_name].create_index(
+                    "created_at", expireAfterSeconds=int(self.ttl_seconds)
+                )
+            except Exception as e:
+                self.shared = False
+                logger.warning("Shared prediction cache unavailable, using the in-process cache only: %s", e)
+
+    @staticmethod
+    def _entry(prediction: Dict) -> Dict:
+        return {"disease_name": prediction["disease_name"], "confidence": prediction["confidence"]}
+
+    def _describe(self, entry: Dict) -> Dict:
+        fallback = self._fallbacks.get(entry["disease_name"])
+        return {**self._entry(entry), **disease_details(entry["disease_name"], fallback)}
+
+    async def get(self, image_hash: str, model_version: str) -> Optional[Dict]:
+        """Return a cached prediction for these bytes and model, if any."""
+        key = self._key(image_hash, model_version)
+        entry = self.local.get(key)
+        if entry is not None:
+            self._local_hits += 1
+            return self._describe(entry)
+
+        if self.shared:
+            try:
+                doc = await db.get_db()[self.collection_name].find_one({"_id": key})
+            except Exception as e:
+                self._shared_errors += 1
+                logger.warning("Shared prediction cache lookup failed: %s", e)
+                doc = None
+            if doc is not None and doc["created_at"] > datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+                self._shared_hits += 1
+                entry = self._entry(doc["prediction"])
+                self.local.set(key, entry)
+                return self._describe(entry)
+
+        self._misses += 1
+        return None
+
+    async def set(self, image_hash: str, model_version: str, prediction: Dict):
+        """Store a prediction's class and confidence in both tiers."""
+        key = self._key(image_hash, model_version)
+        entry = self._entry(prediction)
+        self.local.set(key, entry)
+        if "description" in prediction:
+            self._fallbacks[prediction["disease_name"]] = {
+                "description": prediction["description"],
+                "treatments": prediction["treatment_recommendations"],
+                "preventive_measures": prediction["preventive_measures"],
+            }
+
+        if self.shared:
+            try:
+                await db.get_db()[self.collection_name].replace_one(
+                    {"_id": key},
+                    {
+                        "_id": key,
+                        "model_version": model_version,
+                        "prediction": entry,
+                        "created_at": datetime.utcnow(),
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                self._shared_errors += 1
+                logger.warning("Shared prediction cache write failed: %s", e)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters."""
+        lookups = self._local_hits + self._shared_hits + self._misses
+        return {
+            "model_version": self._model_version,
+            "entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "local_hits": self._local_hits,
+            "shared_hits": self._shared_hits,
+            "misses": self._misses,
+            "hit_rate": (self._local_hits + self._shared_hits) / lookups if lookups else 0.0,
+            "shared_errors": self._shared_errors,
+            "invalidations": self._invalidations,
+        }
+
+
+_prediction_cache = None
+
+def get_prediction_cache() -> PredictionCache:
+    """
+    Returns a singleton prediction cache configured from settings.
+    """
+    global _prediction_cache
+    if _prediction_cache is None:
+        _prediction_cache = PredictionCache(
+            max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+            shared=settings.PREDICTION_CACHE_SHARED,
+        )
+    return _prediction_cache
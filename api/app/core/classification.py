@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from bson import ObjectId
+
+from app.core.cache import get_prediction_cache
+from app.core.config import settings
+from app.core.executor import classify_batch, get_executor, preprocess_image
+from app.core.uploads import UploadedImage
+
+
+def prediction_document(
+    user_id: str,
+    filename: Optional[str],
+    content_type: Optional[str],
+    upload: UploadedImage,
+    prediction: Dict,
+) -> dict:
+    """Build the record stored in the predictions collection."""
+    return {
+        "id": str(ObjectId()),
+        "user_id": user_id,
+        "filename": filename,
+        "disease_name": prediction["disease_name"],
+        "confidence": prediction["confidence"],
+        "timestamp": datetime.utcnow(),
+        "metadata": {
+            "file_size": upload.size,
+            "content_type": content_type,
+            "format": upload.format,
+            "width": upload.width,
+            "height": upload.height
+        }
+    }
+
+
+async def classify_uploads(uploads: List[UploadedImage]) -> list:
+    """
+    Classify validated uploads in one forward pass, skipping cached ones.
+    Returns one prediction dict, or the exception raised for it, per upload.
+    """
+    executor = get_executor()
+    cache = get_prediction_cache() if settings.PREDICTION_CACHE_ENABLED else None
+    model_version = await executor.get_model_version()
+    results = [None] * len(uploads)
+
+    if cache is not None:
+        for i, upload in enumerate(uploads):
+            results[i] = await cache.get(upload.sha256, model_version)
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    samples = await asyncio.gather(
+        *(executor.run(preprocess_image, uploads[i].data) for i in pending),
+        return_exceptions=True
+    )
+    decoded = []
+    for i, sample in zip(pending, samples):
+        if isinstance(sample, Exception):
+            results[i] = sample
+        else:
+            decoded.append((i, sample))
+
+    if decoded:
+        try:
+            predictions = await executor.run(classify_batch, np.stack([sample for _, sample in decoded]))
+        except Exception as e:
+            predictions = [e] * len(decoded)
+        for (i, _), prediction in zip(decoded, predictions):
+            results[i] = prediction
+            if cache is not None and not isinstance(prediction, Exception):
+                await cache.set(uploads[i].sha256, model_version, prediction)
+
+    return results
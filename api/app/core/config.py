@@ -1,7 +1,11 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from typing import List
 import os
 
+# Starlette's multipart parser refuses forms with more files than this (``max_files``)
+MULTIPART_MAX_FILES = 1000
+
 class Settings(BaseSettings):
     # API Configuration
     API_V1_STR: str = "/api/v1"
@@ -19,16 +23,163 @@ class Settings(BaseSettings):
     ]
     
     # Database Configuration
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "mongo")  # "mongo" or "sqlite" (embedded, single node)
+    SQLITE_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+                                    "data", "plant_disease.db")  # Database file when STORAGE_BACKEND is "sqlite"
     MONGODB_URL: str = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "plant_disease_db")
+    MONGODB_MAX_POOL_SIZE: int = 100  # Connections per API process
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: int = 0  # Close idle pooled connections after this long, 0 keeps them
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 0  # Fail a request waiting this long for a free connection, 0 waits
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000  # Fail fast instead of the driver's 30 s when MongoDB is down
+    MONGODB_SOCKET_TIMEOUT_MS: int = 0  # 0 means no socket timeout
+    MONGODB_ENSURE_INDEXES: bool = True  # Create missing indexes and report unused ones at startup
+    PREDICTION_RETENTION_DAYS: float = 0  # Expire prediction records after this many days, 0 keeps them forever
     
     # Model Configuration
     MODEL_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 
                                  "models", "plant_disease_model.h5")
     IMAGE_SIZE: int = 224  # Input image size for the model
+    IMAGE_FAST_DECODE: bool = True  # Decode JPEGs at reduced resolution close to IMAGE_SIZE
+    MODEL_BACKEND: str = os.getenv("MODEL_BACKEND", "dummy")  # "dummy", "torch" or "onnx"
+    MODEL_CHECKPOINT_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+                                              "checkpoints", "best_model.pth")
+    MODEL_CLASS_MAPPING_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+                                                 "checkpoints", "class_mapping.json")
+    MODEL_NUM_THREADS: int = 0  # Intra-op threads per model instance, 0 keeps the framework default
+    MODEL_WARMUP_RUNS: int = 3  # Forward passes run at load time before serving traffic
+    MODEL_LOAD_IN_BACKGROUND: bool = True  # Load and warm up the model after startup; /ready returns 503 until done
+    ONNX_MODEL_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+                                        "checkpoints", "model.onnx")
+    ONNX_GRAPH_OPTIMIZATION_LEVEL: str = "all"  # "disable", "basic", "extended" or "all"
+    ONNX_INTER_OP_THREADS: int = 0  # 0 lets ONNX Runtime decide
+    
+    # Uploads
+    UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024  # Reject uploads larger than this while streaming
+    UPLOAD_MAX_PIXELS: int = 64_000_000  # Reject images whose header declares more pixels (decompression bombs)
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024
+    BATCH_MAX_IMAGES: int = 500  # Images accepted by /predict/batch in one request
+    BATCH_MAX_ARCHIVE_BYTES: int = 512 * 1024 * 1024  # Largest /predict/batch request body, zip archive or separate files
+    HISTORY_MAX_PAGE_SIZE: int = 200  # Largest page returned by /predictions/history
+    
+    # Inference Execution
+    INFERENCE_EXECUTOR: str = "thread"  # "thread", "process" or "inline"
+    INFERENCE_WORKERS: int = 2  # Threads or worker processes running decode and forward passes
+    
+    # Inference Batching
+    INFERENCE_BATCHING_ENABLED: bool = True
+    INFERENCE_MAX_BATCH_SIZE: int = 16  # Flush once this many images are queued
+    INFERENCE_MAX_WAIT_MS: float = 5.0  # ...or once the oldest image has waited this long
+    
+    # Prediction Cache
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_MAX_ENTRIES: int = 10000  # In-process LRU size
+    PREDICTION_CACHE_TTL_SECONDS: float = 3600.0
+    PREDICTION_CACHE_SHARED: bool = False  # Also share results between workers through MongoDB
+    
+    # Disease Catalogue
+    DISEASE_INFO_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+                                          "models", "disease_info.json")
+    DISEASE_CATALOG_RELOAD_SECONDS: float = 2.0  # How often the file is checked for changes and reloaded
+    DISEASE_CATALOG_MAX_AGE_SECONDS: int = 300  # Cache-Control max-age of /diseases; clients then revalidate by ETag
+    
+    # Prediction Records
+    PREDICTION_WRITE_BEHIND_ENABLED: bool = True  # Buffer prediction records and insert them in batches
+    PREDICTION_WRITE_BATCH_SIZE: int = 100  # Flush once this many records are buffered
+    PREDICTION_WRITE_FLUSH_INTERVAL_MS: float = 500.0  # ...or at least this often
+    PREDICTION_WRITE_MAX_PENDING: int = 10000  # Writers wait for a flush beyond this many buffered records
+    PREDICTION_WRITE_MAX_RETRIES: int = 3  # Attempts before a failing record is dropped
+    
+    # Bulk Classification Jobs
+    JOBS_ENABLED: bool = True  # Serve /jobs and run the job workers in this process
+    JOBS_BACKEND: str = os.getenv("JOBS_BACKEND", "sqlite")  # "sqlite" or "mongo"
+    JOBS_SQLITE_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+                                         "data", "jobs", "jobs.db")
+    JOBS_DATA_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))),
+                                      "data", "jobs", "files")  # Uploaded images are kept here until their job completes
+    JOBS_WORKERS: int = 1  # Jobs processed concurrently
+    JOBS_POLL_INTERVAL_SECONDS: float = 2.0  # How often idle workers check the store for jobs
+    JOBS_LEASE_SECONDS: float = 60.0  # A running job is taken over by another worker once its lease goes this long unrenewed
+    JOBS_MAX_ATTEMPTS: int = 3  # Claims of a job that keeps failing before it is marked failed
+    JOBS_MAX_IMAGES: int = 10000  # Images accepted by /jobs in one zip archive
+    JOBS_MAX_FILES: int = 1000  # Images accepted by /jobs as separate files; send larger jobs as a zip
+    JOBS_MAX_ARCHIVE_BYTES: int = 4 * 1024 * 1024 * 1024  # Largest /jobs request body, zip archive or separate files
     
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
+    # The auth caches are per process. A user update or deactivation is seen at once by the process that made it,
+    # by other workers only after AUTH_USER_CACHE_TTL_SECONDS, or with AUTH_TRUST_TOKEN_CLAIMS once the token expires.
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0  # How long a resolved user is reused without reading MongoDB
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = 300.0  # How long a verified token skips signature checks
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False  # Build the user from signed token claims, with no lookup, until the token expires
+    BCRYPT_ROUNDS: int = 12  # Password hashing cost; stored hashes are upgraded on the next login after a change
+    PASSWORD_HASH_WORKERS: int = 2  # Threads hashing and verifying passwords, off the event loop
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Sign-ins beyond this many queued get 503 instead of waiting
+    
+    # Metrics
+    METRICS_ENABLED: bool = True  # Per-route and per-stage latency histograms, served at /metrics
+    
+    # Profiling
+    PROFILING_ADMIN_TOKEN: str = os.getenv("PROFILING_ADMIN_TOKEN", "")  # Profile requests sending it as X-Profile-Token, and guard /admin/profiles; empty disables both
+    PROFILING_SAMPLE_RATE: float = 0.0  # Fraction of all requests profiled without the header
+    PROFILING_INTERVAL_MS: float = 5.0  # Time between stack samples of a profiled request
+    PROFILING_BUFFER_SIZE: int = 50  # Profiles kept in memory, oldest dropped first
+    
+    # Readiness
+    READINESS_PING_TIMEOUT_SECONDS: float = 2.0  # /ready reports MongoDB as down if ping takes longer
+    
+    @model_validator(mode="after")
+    def check_storage_backends(self):
+        """Features kept in MongoDB collections need MongoDB storage; fail at startup rather than on first use."""
+        if self.STORAGE_BACKEND == "sqlite":
+            if self.PREDICTION_CACHE_SHARED:
+                raise ValueError("PREDICTION_CACHE_SHARED=true needs STORAGE_BACKEND=mongo; "
+                                 "with SQLite storage only the in-process cache is available")
+            if self.JOBS_BACKEND == "mongo":
+                raise ValueError("JOBS_BACKEND=mongo needs STORAGE_BACKEND=mongo; use JOBS_BACKEND=sqlite with SQLite storage")
+        return self
+    
+    @model_validator(mode="after")
+    def check_upload_limits(self):
+        """Multi-file uploads over the parser's limit get a 400 before the routes can count them."""
+        if self.JOBS_MAX_FILES > MULTIPART_MAX_FILES or self.BATCH_MAX_IMAGES > MULTIPART_MAX_FILES:
+            raise ValueError(f"JOBS_MAX_FILES and BATCH_MAX_IMAGES can be at most {MULTIPART_MAX_FILES}; "
+                             "send larger jobs as a zip archive")
+        return self
+    
+    def catalog_config(self) -> dict:
+        """Arguments for models.inference.catalog.configure_disease_catalog()."""
+        return {"path": self.DISEASE_INFO_PATH, "reload_interval": self.DISEASE_CATALOG_RELOAD_SECONDS}
+    
+    def predictor_config(self) -> dict:
+        """Arguments for models.inference.predict.configure_predictor()."""
+        image_size = (self.IMAGE_SIZE, self.IMAGE_SIZE)
+        common = {"image_size": image_size, "fast_decode": self.IMAGE_FAST_DECODE}
+        if self.MODEL_BACKEND == "torch":
+            return {
+                "backend": "torch",
+                "checkpoint_path": self.MODEL_CHECKPOINT_PATH,
+                "class_mapping_path": self.MODEL_CLASS_MAPPING_PATH,
+                **common,
+                "num_threads": self.MODEL_NUM_THREADS or None,
+                "warmup_runs": self.MODEL_WARMUP_RUNS,
+            }
+        if self.MODEL_BACKEND == "onnx":
+            return {
+                "backend": "onnx",
+                "onnx_path": self.ONNX_MODEL_PATH,
+                "class_mapping_path": self.MODEL_CLASS_MAPPING_PATH,
+                **common,
+                "graph_optimization_level": self.ONNX_GRAPH_OPTIMIZATION_LEVEL,
+                "num_threads": self.MODEL_NUM_THREADS or None,
+                "inter_op_threads": self.ONNX_INTER_OP_THREADS or None,
+                "warmup_runs": self.MODEL_WARMUP_RUNS,
+            }
+        return {"backend": self.MODEL_BACKEND, **common}
     
     class Config:
         case_sensitive = True
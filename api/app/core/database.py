@@ -1,33 +1,376 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+from pymongo.monitoring import ConnectionPoolListener
 from app.core.config import settings
+from app.core.analytics import backfill_rollups
+from app.core.indexes import ensure_indexes, index_report, log_index_report
+from app.core.storage import DUPLICATE_KEY_ERROR, MongoStorage, SQLiteStorage, Storage
+from collections import Counter, deque
+from typing import Awaitable, Callable, Iterable, List, Optional
+import asyncio
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+class WriteBehindBuffer:
+    """
+    Buffers documents and writes them to a collection in unordered ``insert_many`` batches.
+
+    A batch is flushed once ``batch_size`` documents are pending or every
+    ``flush_interval`` seconds, whichever comes first. When ``max_pending``
+    documents are waiting, ``put`` blocks until a flush frees space, so a slow
+    database slows writers down instead of growing memory without bound.
+    Failed inserts are retried with exponential backoff; documents still
+    failing after ``max_retries`` attempts are dropped and counted.
+    ``on_written`` is awaited with the documents of each batch that were stored.
+    """
+
+    def __init__(
+        self,
+        get_collection: Callable,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000,
+        max_retries: int = 3,
+        retry_backoff: float = 0.1,
+        on_written: Optional[Callable[[List[dict]], Awaitable]] = None,
+    ):
+        self.get_collection = get_collection
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, batch_size)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._pending: deque = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self._flushes = 0
+        self._written = 0
+        self._retried = 0
+        self._dropped = 0
+        self._duplicates = 0
+        self._backpressure_waits = 0
+        self._batch_sizes: Counter = Counter()
+        self._total_flush = 0.0
+        self._max_flush = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None and not self._worker.done():
+            return
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._worker = loop.create_task(self._run())
+
+    async def put(self, document: dict):
+        """Queue one document for writing."""
+        await self.put_many([document])
+
+    async def put_many(self, documents: Iterable[dict]):
+        """Queue documents for writing, waiting for space if the buffer is full."""
+        self._ensure_worker()
+        for document in documents:
+            while len(self._pending) >= self.max_pending:
+                self._backpressure_waits += 1
+                self._space.clear()
+                self._wake.set()
+                await self._space.wait()
+            self._pending.append(document)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def _take_batch(self) -> List[dict]:
+        batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+        self._space.set()
+        return batch
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            first = True
+            while self._pending and (first or self._closing or len(self._pending) >= self.batch_size):
+                await self._write(self._take_batch())
+                # Only the first batch after a wake-up may be partially full
+                first = False
+
+            if self._closing and not self._pending:
+                return
+
+    async def _write(self, batch: List[dict]):
+        started = time.perf_counter()
+        self._flushes += 1
+        self._batch_sizes[len(batch)] += 1
+        documents = batch
+        attempt = 0
+
+        while batch:
+            try:
+                await self.get_collection().insert_many(batch, ordered=False)
+                self._written += len(batch)
+                batch = []
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                # insert_many assigns _id before sending, so a retried document
+                # that already reached the server fails with a duplicate key
+                self._duplicates += sum(error.get("code") == DUPLICATE_KEY_ERROR for error in errors)
+                self._written += e.details.get("nInserted", 0)
+                batch = [batch[error["index"]] for error in errors if error.get("code") != DUPLICATE_KEY_ERROR]
+                if batch:
+                    logger.warning("%d writes failed: %s", len(batch), errors[0].get("errmsg"))
+            except Exception as e:
+                logger.warning("Batched write of %d documents failed: %s", len(batch), e)
+
+            if batch:
+                attempt += 1
+                if attempt > self.max_retries:
+                    self._dropped += len(batch)
+                    logger.error("Dropped %d documents after %d retries", len(batch), self.max_retries)
+                    break
+                self._retried += len(batch)
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+        if self.on_written is not None:
+            dropped = {id(document) for document in batch}
+            written = [document for document in documents if id(document) not in dropped]
+            try:
+                if written:
+                    await self.on_written(written)
+            except Exception as e:
+                logger.warning("Post-write hook failed for %d documents: %s", len(written), e)
+
+        elapsed = time.perf_counter() - started
+        self._total_flush += elapsed
+        self._max_flush = max(self._max_flush, elapsed)
+
+    async def close(self):
+        """Flush every pending document and stop the background writer."""
+        self._closing = True
+        try:
+            if self._worker is not None and not self._worker.done() and self._loop is asyncio.get_running_loop():
+                self._wake.set()
+                await self._worker
+            else:
+                # The writer belonged to a loop that is gone; drain on this one
+                if self._space is None:
+                    self._space = asyncio.Event()
+                while self._pending:
+                    await self._write(self._take_batch())
+        finally:
+            self._closing = False
+            self._worker = None
+
+    def stats(self) -> dict:
+        """Return buffer depth, flush latency and write outcome counters."""
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000.0,
+            "flushes": self._flushes,
+            "written": self._written,
+            "retried": self._retried,
+            "dropped": self._dropped,
+            "duplicates": self._duplicates,
+            "backpressure_waits": self._backpressure_waits,
+            "mean_batch_size": sum(size * count for size, count in self._batch_sizes.items()) / self._flushes
+            if self._flushes else 0.0,
+            "mean_flush_ms": 1000.0 * self._total_flush / self._flushes if self._flushes else 0.0,
+            "max_flush_ms": 1000.0 * self._max_flush,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+        }
+
+class PoolMonitor(ConnectionPoolListener):
+    """
+    Tracks MongoDB connection-pool usage from driver events.
+    Events arrive on driver threads, so counters are updated under a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.created = 0
+        self.closed = 0
+        self.checkout_failures = 0
+        self.clears = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(clears=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(open=-1, closed=1)
+
+    def connection_check_out_started(self, event):
+        self._add(waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        self._add(waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": settings.MONGODB_MAX_POOL_SIZE,
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+                "utilisation": self.checked_out / settings.MONGODB_MAX_POOL_SIZE if settings.MONGODB_MAX_POOL_SIZE else 0.0,
+                "created": self.created,
+                "closed": self.closed,
+                "checkout_failures": self.checkout_failures,
+                "clears": self.clears,
+            }
+
+def create_storage(database: "Database") -> Storage:
+    """Build the storage selected by STORAGE_BACKEND."""
+    if settings.STORAGE_BACKEND == "mongo":
+        # Resolve the database on every call so it follows reconnects
+        return MongoStorage(lambda: database.get_db())
+    if settings.STORAGE_BACKEND == "sqlite":
+        return SQLiteStorage(settings.SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend '{settings.STORAGE_BACKEND}', expected 'mongo' or 'sqlite'")
+
 class Database:
     client: AsyncIOMotorClient = None
-    
+
+    def __init__(self):
+        self.pool_monitor = PoolMonitor()
+        self.storage = create_storage(self)
+        self.prediction_writer = WriteBehindBuffer(
+            lambda: self.storage.prediction_collection(),
+            batch_size=settings.PREDICTION_WRITE_BATCH_SIZE,
+            flush_interval=settings.PREDICTION_WRITE_FLUSH_INTERVAL_MS / 1000.0,
+            max_pending=settings.PREDICTION_WRITE_MAX_PENDING,
+            max_retries=settings.PREDICTION_WRITE_MAX_RETRIES,
+            on_written=lambda documents: self.storage.record_rollups(documents),
+        )
+
     def get_db(self):
         """Return database instance"""
         return self.client[settings.DATABASE_NAME]
 
+    async def save_predictions(self, documents: List[dict]):
+        """Record prediction documents, through the write-behind buffer when enabled."""
+        if settings.PREDICTION_WRITE_BEHIND_ENABLED:
+            await self.prediction_writer.put_many(documents)
+        else:
+            await self.insert_predictions(documents)
+
+    async def insert_predictions(self, documents: List[dict]):
+        """
+        Insert prediction documents now and update the analytics rollups.
+        Documents whose ``_id`` is already stored are skipped, so replaying a batch is safe.
+        """
+        await self.storage.insert_predictions(documents)
+
     async def connect_to_database(self):
         """Create database connection."""
+        if settings.STORAGE_BACKEND == "sqlite":
+            await self.storage.connect()
+            logger.info("Opened SQLite storage at %s.", settings.SQLITE_PATH)
+            return
+
         try:
-            self.client = AsyncIOMotorClient(settings.MONGODB_URL)
+            self.client = AsyncIOMotorClient(
+                settings.MONGODB_URL,
+                maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS or None,
+                waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS or None,
+                connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS or None,
+                event_listeners=[self.pool_monitor],
+            )
             logger.info("Connected to MongoDB.")
         except Exception as e:
-            logger.error(f"Could not connect to MongoDB: {e}")
+            logger.error("Could not connect to MongoDB: %s", e)
             raise
 
+        if settings.MONGODB_ENSURE_INDEXES:
+            try:
+                await ensure_indexes(self.get_db())
+                log_index_report(await index_report(self.get_db()))
+            except Exception as e:
+                logger.error("Could not verify MongoDB indexes: %s", e)
+
+        try:
+            await backfill_rollups(self.get_db())
+        except Exception as e:
+            logger.error("Could not build prediction rollups: %s", e)
+
+    async def ping(self, timeout: float = 2.0) -> dict:
+        """Check the database answers within ``timeout`` seconds and report MongoDB pool usage."""
+        started = time.perf_counter()
+        status = {"backend": settings.STORAGE_BACKEND}
+        try:
+            if settings.STORAGE_BACKEND == "mongo" and self.client is None:
+                raise RuntimeError("not connected")
+            await asyncio.wait_for(self.storage.ping(), timeout)
+            status.update(ok=True, latency_ms=1000.0 * (time.perf_counter() - started))
+        except Exception as e:
+            status.update(ok=False, error=str(e) or type(e).__name__)
+        if settings.STORAGE_BACKEND == "mongo":
+            status["pool"] = self.pool_monitor.stats()
+        return status
+
+    async def flush_writes(self):
+        """Write out every buffered prediction record."""
+        await self.prediction_writer.close()
+
     async def close_database_connection(self):
         """Close database connection."""
+        if settings.STORAGE_BACKEND == "sqlite":
+            await self.storage.close()
+            return
+
         try:
             self.client.close()
             logger.info("Closed MongoDB connection.")
         except Exception as e:
-            logger.error(f"Could not close MongoDB connection: {e}")
+            logger.error("Could not close MongoDB connection: %s", e)
             raise
 
 # Create a database instance
-db = Database() 
\ No newline at end of file
+db = Database()
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from models.inference.catalog import configure_disease_catalog
+from models.inference.predict import configure_predictor, get_predictor
+from models.inference.timing import observe_stage
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+
+def load_predictor(config: Optional[dict] = None, catalog_config: Optional[dict] = None) -> str:
+    """Configure and load the predictor in the current process and return its model version."""
+    if catalog_config is not None:
+        configure_disease_catalog(**catalog_config)
+    if config is not None:
+        configure_predictor(**config)
+    return get_predictor().model_version
+
+
+def preprocess_image(image_bytes: bytes) -> np.ndarray:
+    """Decode one upload into a model input array."""
+    return get_predictor().preprocess(image_bytes)
+
+
+def predict_image(image_bytes: bytes) -> Dict:
+    """Run the full single-image prediction."""
+    return get_predictor().predict(image_bytes)
+
+
+def classify_batch(batch: np.ndarray) -> List[Dict]:
+    """Run one forward pass and format every row of the output."""
+    predictor = get_predictor()
+    started = time.perf_counter()
+    probabilities = predictor.predict_batch(batch)
+    observe_stage("forward", time.perf_counter() - started)
+    return [predictor.format_prediction(row) for row in probabilities]
+
+
+class InferenceExecutor:
+    """
+    Runs blocking predictor work (decode, resize, forward pass) outside the event loop.
+
+    ``thread`` uses a bounded thread pool sharing the in-process predictor,
+    ``process`` uses a pool of worker processes that each load the model once
+    at startup, and ``inline`` runs on the event loop (debugging only).
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 2, predictor_config: Optional[dict] = None,
+                 catalog_config: Optional[dict] = None):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor kind '{kind}', expected one of {EXECUTOR_KINDS}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.predictor_config = predictor_config
+        self.catalog_config = catalog_config
+        self.model_version: Optional[str] = None
+        self._pool: Optional[Executor] = None
+        self._active = 0
+        self._completed = 0
+        # Set once the model is loaded and warmed up in every worker
+        self.ready = False
+        self.load_seconds: Optional[float] = None
+        self.load_error: Optional[str] = None
+        self._loading: Optional[asyncio.Task] = None
+        self._busy_seconds = 0.0
+        self._started_at = time.perf_counter()
+
+    def _get_pool(self) -> Optional[Executor]:
+        if self._pool is None and self.kind != "inline":
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=load_predictor,
+                    initargs=(self.predictor_config, self.catalog_config),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="inference",
+                )
+        return self._pool
+
+    async def start(self):
+        """Create the pool and load the model in every worker."""
+        started = time.perf_counter()
+        if self.catalog_config is not None:
+            configure_disease_catalog(**self.catalog_config)
+        if self.predictor_config is not None:
+            configure_predictor(**self.predictor_config)
+        if self.kind == "process":
+            # Concurrent submissions make the pool spawn all of its workers now
+            versions = await asyncio.gather(*(self._call(load_predictor) for _ in range(self.max_workers)))
+            self.model_version = versions[0]
+        else:
+            self.model_version = await self._call(load_predictor)
+        self.load_seconds = time.perf_counter() - started
+        self.ready = True
+        logger.info(
+            "Inference executor ready in %.1fs (%s, %d workers, model %s)",
+            self.load_seconds, self.kind, self.max_workers, self.model_version
+        )
+
+    def start_background(self) -> asyncio.Task:
+        """
+        Load and warm up the model in a background task, so startup does not wait for it.
+        ``ready`` turns True when it completes; work submitted meanwhile waits for the load.
+        """
+        if self._loading is None:
+            self._loading = asyncio.get_running_loop().create_task(self._load_in_background())
+        return self._loading
+
+    async def _load_in_background(self):
+        try:
+            await self.start()
+        except Exception as e:
+            self.load_error = str(e) or type(e).__name__
+            logger.exception("Could not load the model")
+
+    @property
+    def loading(self) -> bool:
+        return self._loading is not None and not self._loading.done()
+
+    async def get_model_version(self) -> str:
+        """Return the version of the model served by the workers, loading it if needed."""
+        if self.model_version is None:
+            self.model_version = await self.run(load_predictor)
+        return self.model_version
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn(*args)`` on the pool and await its result, once a background model load is done."""
+        if self.loading:
+            await asyncio.shield(self._loading)
+        if self.load_error is not None:
+            raise RuntimeError(f"Model failed to load: {self.load_error}")
+        return await self._call(fn, *args)
+
+    async def _call(self, fn: Callable, *args) -> Any:
+        self._active += 1
+        started = time.perf_counter()
+        try:
+            if self.kind == "inline":
+                return fn(*args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            self._active -= 1
+            self._completed += 1
+            self._busy_seconds += time.perf_counter() - started
+
+    def shutdown(self):
+        """Shut down the pool, waiting for running work to finish."""
+        if self.loading:
+            self._loading.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        """Return pool size and utilisation."""
+        uptime = time.perf_counter() - self._started_at
+        return {
+            "kind": self.kind,
+            "ready": self.ready,
+            "loading": self.loading,
+            "model_version": self.model_version,
+            "workers": self.max_workers,
+            "active": self._active,
+            "utilisation": min(self._active / self.max_workers, 1.0),
+            "completed": self._completed,
+            "mean_utilisation": min(self._busy_seconds / (uptime * self.max_workers), 1.0) if uptime else 0.0,
+        }
+
+
+_executor = None
+
+def get_executor() -> InferenceExecutor:
+    """
+    Returns a singleton executor configured from settings.
+    """
+    global _executor
+    if _executor is None:
+        _executor = InferenceExecutor(
+            kind=settings.INFERENCE_EXECUTOR,
+            max_workers=settings.INFERENCE_WORKERS,
+            predictor_config=settings.predictor_config(),
+            catalog_config=settings.catalog_config(),
+        )
+    return _executor
@@ -0,0 +1,134 @@
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PREDICTION_TTL_INDEX = "timestamp_ttl"
+
+
+def declared_indexes() -> Dict[str, List[IndexModel]]:
+    """
+    The indexes the API's queries rely on, per collection.
+
+    - users: ``username`` on every authenticated request, ``email`` on register
+    - predictions: the history query, ``user_id`` filtered and paged newest first on (timestamp, id)
+    - prediction_rollups: analytics, ``user_id`` filtered over a range of days
+    """
+    indexes = {
+        "users": [
+            IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        ],
+        "predictions": [
+            IndexModel(
+                [("user_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)],
+                name="user_id_timestamp_id",
+            ),
+        ],
+        "prediction_rollups": [
+            IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_id_day"),
+        ],
+    }
+    if settings.PREDICTION_RETENTION_DAYS:
+        indexes["predictions"].append(IndexModel(
+            [("timestamp", ASCENDING)],
+            name=PREDICTION_TTL_INDEX,
+            expireAfterSeconds=int(settings.PREDICTION_RETENTION_DAYS * 86400),
+        ))
+    return indexes
+
+
+async def ensure_indexes(database) -> Dict[str, List[str]]:
+    """
+    Create any declared index that is missing and keep the prediction TTL in step
+    with PREDICTION_RETENTION_DAYS. Returns the indexes created per collection.
+    """
+    created = {}
+    for collection_name, models in declared_indexes().items():
+        collection = database[collection_name]
+        existing = await collection.index_information()
+        missing = [model for model in models if model.document["name"] not in existing]
+        created[collection_name] = []
+
+        for model in missing:
+            name = model.document["name"]
+            try:
+                await collection.create_indexes([model])
+                created[collection_name].append(name)
+                logger.info("Created index %s on %s", name, collection_name)
+            except OperationFailure as e:
+                # e.g. duplicate usernames already stored, or the keys exist under another name
+                logger.error("Could not create index %s on %s: %s", name, collection_name, e)
+
+        if collection_name == "predictions":
+            await _sync_prediction_ttl(database, existing)
+
+    return created
+
+
+async def _sync_prediction_ttl(database, existing: dict):
+    ttl = existing.get(PREDICTION_TTL_INDEX)
+    if ttl is None:
+        return
+    if not settings.PREDICTION_RETENTION_DAYS:
+        await database["predictions"].drop_index(PREDICTION_TTL_INDEX)
+        logger.info("Prediction retention disabled, dropped index %s", PREDICTION_TTL_INDEX)
+        return
+
+    expire_after = int(settings.PREDICTION_RETENTION_DAYS * 86400)
+    if ttl.get("expireAfterSeconds") != expire_after:
+        try:
+            await database.command(
+                "collMod", "predictions",
+                index={"name": PREDICTION_TTL_INDEX, "expireAfterSeconds": expire_after},
+            )
+            logger.info("Prediction retention changed to %s days", settings.PREDICTION_RETENTION_DAYS)
+        except OperationFailure as e:
+            logger.error("Could not update prediction retention: %s", e)
+
+
+async def index_report(database) -> Dict[str, dict]:
+    """
+    Compare declared indexes with what exists and how often each is used.
+
+    ``unused`` lists indexes with no accesses in ``$indexStats``; counters reset
+    when mongod restarts, so judge it on a server that has been serving traffic.
+    ``undeclared`` lists indexes nothing in the API declares.
+    """
+    report = {}
+    for collection_name, models in declared_indexes().items():
+        collection = database[collection_name]
+        declared = {model.document["name"] for model in models}
+        existing = set(await collection.index_information()) - {"_id_"}
+
+        try:
+            stats = await collection.aggregate([{"$indexStats": {}}]).to_list(length=None)
+            unused = sorted(
+                stat["name"] for stat in stats
+                if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0
+            )
+        except OperationFailure as e:
+            logger.warning("$indexStats unavailable for %s: %s", collection_name, e)
+            unused = None
+
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared),
+            "unused": unused,
+        }
+    return report
+
+
+def log_index_report(report: Dict[str, dict]):
+    for collection_name, entry in report.items():
+        if entry["missing"]:
+            logger.warning("Missing indexes on %s: %s", collection_name, ", ".join(entry["missing"]))
+        if entry["undeclared"]:
+            logger.info("Undeclared indexes on %s: %s", collection_name, ", ".join(entry["undeclared"]))
+        if entry["unused"]:
+            logger.info("Unused indexes on %s since mongod start: %s", collection_name, ", ".join(entry["unused"]))
@@ -0,0 +1,590 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import socket
+import zipfile
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+
+from app.core.classification import classify_uploads, prediction_document
+from app.core.config import settings
+from app.core.database import db
+from app.core.sqlite import AsyncSQLite
+from app.core.uploads import validate_image_bytes
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobStore(ABC):
+    """
+    Durable storage for bulk-classification jobs and their per-image items.
+
+    A job is ``queued`` until a worker claims it (``running``) and ends
+    ``completed``, or ``failed`` once it has errored on every attempt. A claim
+    is a lease held by one worker, which renews it while the job runs; a job
+    whose lease has expired because its worker died can be claimed again.
+    Items move from ``queued`` to ``done`` or ``failed`` as each batch
+    finishes, so a resumed job starts with the first item that has no result
+    yet.
+    """
+
+    async def setup(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def create_job(self, job: Dict, items: List[Dict]):
+        ...
+
+    @abstractmethod
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def claim_next_job(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        """
+        Atomically lease the oldest job that is queued, or running with an
+        expired lease, to ``worker_id`` and return it.
+        """
+
+    @abstractmethod
+    async def renew_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend ``worker_id``'s lease; False if the job is no longer leased to it."""
+
+    @abstractmethod
+    async def release_job(self, job_id: str, worker_id: str, count_attempt: bool = False):
+        """
+        Put a job leased to ``worker_id`` back in the queue. Unless
+        ``count_attempt`` is set, the claim is not counted as an attempt.
+        """
+
+    @abstractmethod
+    async def pending_items(self, job_id: str, limit: int) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    async def record_results(self, job_id: str, results: List[Dict]):
+        """Store ``{"index", "status", "prediction", "error"}`` results and update job progress."""
+
+    @abstractmethod
+    async def finish_job(self, job_id: str):
+        ...
+
+    @abstractmethod
+    async def fail_job(self, job_id: str, error: str):
+        """Mark a job failed with a message for its owner."""
+
+    @abstractmethod
+    async def list_results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        ...
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in a local SQLite file; suitable for single-node deployments."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            data_dir TEXT NOT NULL,
+            claimed_by TEXT,
+            lease_until TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+        CREATE TABLE IF NOT EXISTS job_items (
+            job_id TEXT NOT NULL REFERENCES jobs (id) ON DELETE CASCADE,
+            idx INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            path TEXT NOT NULL,
+            member TEXT,
+            status TEXT NOT NULL,
+            prediction TEXT,
+            error TEXT,
+            PRIMARY KEY (job_id, idx)
+        );
+        CREATE INDEX IF NOT EXISTS job_items_status ON job_items (job_id, status, idx);
+    """
+
+    # Columns added since the first schema, created in existing databases by setup()
+    ADDED_COLUMNS = {
+        "claimed_by": "TEXT",
+        "lease_until": "TEXT",
+        "attempts": "INTEGER NOT NULL DEFAULT 0",
+        "error": "TEXT",
+    }
+
+    def __init__(self, path: str):
+        self.sqlite = AsyncSQLite(path)
+
+    async def setup(self):
+        await self.sqlite.executescript(self.SCHEMA)
+        columns = {row["name"] for row in await self.sqlite.fetchall("PRAGMA table_info(jobs)")}
+        for name, column_type in self.ADDED_COLUMNS.items():
+            if name not in columns:
+                await self.sqlite.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+
+    async def close(self):
+        await self.sqlite.close()
+
+    @staticmethod
+    def _job(row: Optional[Dict]) -> Optional[Dict]:
+        if row is None:
+            return None
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+        row["updated_at"] = datetime.fromisoformat(row["updated_at"])
+        return row
+
+    @staticmethod
+    def _item(row: Dict) -> Dict:
+        row["index"] = row.pop("idx")
+        row["prediction"] = json.loads(row["prediction"]) if row["prediction"] else None
+        return row
+
+    async def create_job(self, job: Dict, items: List[Dict]):
+        def insert(connection):
+            connection.execute(
+                "INSERT INTO jobs (id, user_id, status, total, completed, failed, data_dir, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, 0, ?, ?, ?)",
+                (job["id"], job["user_id"], job["status"], job["total"], job["data_dir"],
+                 job["created_at"].isoformat(), job["updated_at"].isoformat()),
+            )
+            connection.executemany(
+                "INSERT INTO job_items (job_id, idx, filename, path, member, status) VALUES (?, ?, ?, ?, ?, ?)",
+                [(job["id"], item["index"], item["filename"], item["path"], item["member"], QUEUED)
+                 for item in items],
+            )
+
+        await self.sqlite.run(insert)
+
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        return self._job(await self.sqlite.fetchone("SELECT * FROM jobs WHERE id = ?", (job_id,)))
+
+    async def claim_next_job(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        def claim(connection):
+            # The write transaction keeps other processes from claiming the same row
+            now = datetime.utcnow()
+            row = connection.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND (lease_until IS NULL OR lease_until < ?)) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now.isoformat()),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = ?, claimed_by = ?, lease_until = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (RUNNING, worker_id, (now + timedelta(seconds=lease_seconds)).isoformat(), now.isoformat(),
+                 row["id"]),
+            )
+            return dict(connection.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+        return self._job(await self.sqlite.run(claim))
+
+    async def renew_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        lease_until = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        return await self.sqlite.execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND claimed_by = ? AND status = ?",
+            (lease_until.isoformat(), job_id, worker_id, RUNNING),
+        ) == 1
+
+    async def release_job(self, job_id: str, worker_id: str, count_attempt: bool = False):
+        await self.sqlite.execute(
+            "UPDATE jobs SET status = ?, claimed_by = NULL, lease_until = NULL, attempts = attempts - ?, "
+            "updated_at = ? WHERE id = ? AND claimed_by = ? AND status = ?",
+            (QUEUED, 0 if count_attempt else 1, datetime.utcnow().isoformat(), job_id, worker_id, RUNNING),
+        )
+
+    async def pending_items(self, job_id: str, limit: int) -> List[Dict]:
+        rows = await self.sqlite.fetchall(
+            "SELECT * FROM job_items WHERE job_id = ? AND status = ? ORDER BY idx LIMIT ?",
+            (job_id, QUEUED, limit),
+        )
+        return [self._item(row) for row in rows]
+
+    async def record_results(self, job_id: str, results: List[Dict]):
+        def record(connection):
+            connection.executemany(
+                "UPDATE job_items SET status = ?, prediction = ?, error = ? WHERE job_id = ? AND idx = ?",
+                [(r["status"], json.dumps(r["prediction"]) if r["prediction"] else None, r["error"],
+                  job_id, r["index"]) for r in results],
+            )
+            connection.execute(
+                "UPDATE jobs SET completed = completed + ?, failed = failed + ?, updated_at = ? WHERE id = ?",
+                (sum(r["status"] == DONE for r in results), sum(r["status"] == FAILED for r in results),
+                 datetime.utcnow().isoformat(), job_id),
+            )
+
+        await self.sqlite.run(record)
+
+    async def finish_job(self, job_id: str):
+        await self.sqlite.execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+            (COMPLETED, datetime.utcnow().isoformat(), job_id),
+        )
+
+    async def fail_job(self, job_id: str, error: str):
+        await self.sqlite.execute(
+            "UPDATE jobs SET status = ?, error = ?, claimed_by = NULL, lease_until = NULL, updated_at = ? WHERE id = ?",
+            (FAILED, error, datetime.utcnow().isoformat(), job_id),
+        )
+
+    async def list_results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        rows = await self.sqlite.fetchall(
+            "SELECT idx, filename, status, prediction, error FROM job_items "
+            "WHERE job_id = ? AND status != ? ORDER BY idx LIMIT ? OFFSET ?",
+            (job_id, QUEUED, limit, offset),
+        )
+        return [self._item(row) for row in rows]
+
+
+class MongoJobStore(JobStore):
+    """Job store in the ``jobs`` and ``job_items`` MongoDB collections."""
+
+    def _jobs(self):
+        return db.get_db()["jobs"]
+
+    def _items(self):
+        return db.get_db()["job_items"]
+
+    async def setup(self):
+        await self._jobs().create_index([("status", 1), ("created_at", 1)])
+        await self._items().create_index([("job_id", 1), ("status", 1), ("index", 1)])
+        await self._items().create_index([("job_id", 1), ("index", 1)], unique=True)
+
+    async def create_job(self, job: Dict, items: List[Dict]):
+        await self._items().insert_many(
+            [{"job_id": job["id"], **item, "status": QUEUED, "prediction": None, "error": None} for item in items],
+            ordered=False,
+        )
+        await self._jobs().insert_one({"_id": job["id"], **job, "completed": 0, "failed": 0, "attempts": 0})
+
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        return await self._jobs().find_one({"_id": job_id}, {"_id": 0})
+
+    async def claim_next_job(self, worker_id: str, lease_seconds: float) -> Optional[Dict]:
+        now = datetime.utcnow()
+        return await self._jobs().find_one_and_update(
+            # $not also matches running jobs with no lease field
+            {"$or": [{"status": QUEUED}, {"status": RUNNING, "lease_until": {"$not": {"$gte": now}}}]},
+            {"$set": {
+                "status": RUNNING,
+                "claimed_by": worker_id,
+                "lease_until": now + timedelta(seconds=lease_seconds),
+                "updated_at": now,
+            }, "$inc": {"attempts": 1}},
+            sort=[("created_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def renew_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        result = await self._jobs().update_one(
+            {"_id": job_id, "claimed_by": worker_id, "status": RUNNING},
+            {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=lease_seconds)}},
+        )
+        return result.matched_count == 1
+
+    async def release_job(self, job_id: str, worker_id: str, count_attempt: bool = False):
+        await self._jobs().update_one(
+            {"_id": job_id, "claimed_by": worker_id, "status": RUNNING},
+            {"$set": {"status": QUEUED, "claimed_by": None, "lease_until": None, "updated_at": datetime.utcnow()},
+             "$inc": {"attempts": 0 if count_attempt else -1}},
+        )
+
+    async def pending_items(self, job_id: str, limit: int) -> List[Dict]:
+        cursor = self._items().find({"job_id": job_id, "status": QUEUED}, {"_id": 0}).sort("index", 1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def record_results(self, job_id: str, results: List[Dict]):
+        await self._items().bulk_write(
+            [
+                UpdateOne(
+                    {"job_id": job_id, "index": result["index"]},
+                    {"$set": {"status": result["status"], "prediction": result["prediction"], "error": result["error"]}},
+                )
+                for result in results
+            ],
+            ordered=False,
+        )
+        await self._jobs().update_one(
+            {"_id": job_id},
+            {
+                "$inc": {
+                    "completed": sum(r["status"] == DONE for r in results),
+                    "failed": sum(r["status"] == FAILED for r in results),
+                },
+                "$set": {"updated_at": datetime.utcnow()},
+            },
+        )
+
+    async def finish_job(self, job_id: str):
+        await self._jobs().update_one(
+            {"_id": job_id}, {"$set": {"status": COMPLETED, "updated_at": datetime.utcnow()}}
+        )
+
+    async def fail_job(self, job_id: str, error: str):
+        await self._jobs().update_one(
+            {"_id": job_id},
+            {"$set": {"status": FAILED, "error": error, "claimed_by": None, "lease_until": None,
+                      "updated_at": datetime.utcnow()}},
+        )
+
+    async def list_results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        cursor = (
+            self._items()
+            .find({"job_id": job_id, "status": {"$ne": QUEUED}},
+                  {"_id": 0, "index": 1, "filename": 1, "status": 1, "prediction": 1, "error": 1})
+            .sort("index", 1)
+            .skip(offset)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+
+def _read_item(item: Dict):
+    """Load and validate one job image from disk (runs in a worker thread)."""
+    if item["member"]:
+        with zipfile.ZipFile(item["path"]) as archive:
+            info = archive.getinfo(item["member"])
+            if info.file_size > settings.UPLOAD_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="File exceeds the maximum upload size")
+            data = archive.read(info)
+    else:
+        with open(item["path"], "rb") as f:
+            data = f.read(settings.UPLOAD_MAX_BYTES + 1)
+    return validate_image_bytes(data)
+
+
+class JobQueue:
+    """
+    Accepts bulk-classification jobs and runs them on background workers.
+
+    Images are stored under ``data_dir`` when a job is submitted; workers pull
+    jobs from the durable store, classify them in model-sized batches, record
+    per-image results and write the predictions to the ``predictions`` collection.
+
+    Each worker leases the job it runs for ``lease_seconds`` and renews the
+    lease every third of that, so any number of API processes can share a
+    store: a job is only taken over once its worker has stopped renewing.
+    A job that raises or outlives its worker's lease uses up an attempt, and is
+    marked failed after ``max_attempts`` of them; a job released on shutdown
+    does not, so it resumes after any number of restarts.
+    """
+
+    def __init__(self, store: JobStore, data_dir: str, workers: int = 1, batch_size: int = 16,
+                 poll_interval: float = 2.0, lease_seconds: float = 60.0, max_attempts: int = 3):
+        self.store = store
+        self.data_dir = data_dir
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+
+    async def start(self):
+        """Prepare the store and start the workers."""
+        await self.store.setup()
+        self._wake = asyncio.Event()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = [asyncio.create_task(self._worker(f"{prefix}:{n}")) for n in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.store.close()
+
+    def new_job(self) -> Tuple[str, str]:
+        """Allocate an id for a new job and create the directory its images are stored in."""
+        job_id = str(ObjectId())
+        path = os.path.join(self.data_dir, job_id)
+        os.makedirs(path, exist_ok=True)
+        return job_id, path
+
+    async def submit(self, job_id: str, user_id: str, sources: List[Tuple[str, str, Optional[str]]]) -> Dict:
+        """
+        Queue a job over images already stored in its directory.
+        ``sources`` are ``(filename, path, zip member or None)`` tuples.
+        """
+        now = datetime.utcnow()
+        job = {
+            "id": job_id,
+            "user_id": user_id,
+            "status": QUEUED,
+            "total": len(sources),
+            "data_dir": os.path.join(self.data_dir, job_id),
+            "created_at": now,
+            "updated_at": now,
+        }
+        items = [
+            {"index": index, "filename": filename, "path": path, "member": member}
+            for index, (filename, path, member) in enumerate(sources)
+        ]
+        await self.store.create_job(job, items)
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    async def _worker(self, worker_id: str):
+        while True:
+            try:
+                job = await self.store.claim_next_job(worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.error("Could not claim classification job: %s", e)
+                job = None
+
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if job["attempts"] > self.max_attempts:
+                # Earlier workers died or lost the lease on every attempt
+                await self._fail_job(job, f"Gave up after {self.max_attempts} attempts")
+                continue
+
+            try:
+                await self._run_leased(job, worker_id)
+            except asyncio.CancelledError:
+                # Shutting down: let another worker resume the job without waiting for the lease
+                await self._release_job(job, worker_id)
+                raise
+            except Exception:
+                logger.exception("Classification job %s failed on attempt %d of %d",
+                                 job["id"], job["attempts"], self.max_attempts)
+                if job["attempts"] >= self.max_attempts:
+                    await self._fail_job(job, "Error processing job")
+                else:
+                    await self._release_job(job, worker_id, count_attempt=True)
+
+    async def _release_job(self, job: Dict, worker_id: str, count_attempt: bool = False):
+        try:
+            await self.store.release_job(job["id"], worker_id, count_attempt)
+        except Exception as e:
+            # The job is resumed once its lease expires instead
+            logger.error("Could not release classification job %s: %s", job["id"], e)
+
+    async def _fail_job(self, job: Dict, error: str):
+        try:
+            await self.store.fail_job(job["id"], error)
+        except Exception as e:
+            logger.error("Could not mark classification job %s failed: %s", job["id"], e)
+            return
+        await asyncio.to_thread(shutil.rmtree, job["data_dir"], True)
+        logger.error("Classification job %s failed: %s", job["id"], error)
+
+    async def _run_leased(self, job: Dict, worker_id: str):
+        """Run a job while renewing its lease, and stop if the lease is lost."""
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + self.lease_seconds
+        run = asyncio.create_task(self._run_job(job))
+        try:
+            while True:
+                done, _ = await asyncio.wait({run}, timeout=self.lease_seconds / 3)
+                if done:
+                    return run.result()
+                try:
+                    renewed = await self.store.renew_lease(job["id"], worker_id, self.lease_seconds)
+                except Exception as e:
+                    logger.warning("Could not renew the lease on classification job %s: %s", job["id"], e)
+                    renewed = loop.time() < expires
+                else:
+                    expires = loop.time() + self.lease_seconds
+                if not renewed:
+                    logger.warning("Lost the lease on classification job %s; leaving it to another worker",
+                                   job["id"])
+                    return
+        finally:
+            if not run.done():
+                run.cancel()
+                await asyncio.gather(run, return_exceptions=True)
+
+    async def _run_job(self, job: Dict):
+        while True:
+            items = await self.store.pending_items(job["id"], self.batch_size)
+            if not items:
+                break
+
+            loaded = await asyncio.gather(
+                *(asyncio.to_thread(_read_item, item) for item in items), return_exceptions=True
+            )
+            valid = [(item, upload) for item, upload in zip(items, loaded) if not isinstance(upload, Exception)]
+            predictions = await classify_uploads([upload for _, upload in valid]) if valid else []
+            by_index = {item["index"]: p for (item, _), p in zip(valid, predictions)}
+
+            results = []
+            docs = []
+            for item, upload in zip(items, loaded):
+                outcome = by_index.get(item["index"], upload)
+                if isinstance(outcome, Exception):
+                    detail = outcome.detail if isinstance(outcome, HTTPException) else "Error processing image"
+                    results.append({"index": item["index"], "status": FAILED, "prediction": None, "error": detail})
+                    continue
+                results.append({"index": item["index"], "status": DONE, "prediction": outcome, "error": None})
+                doc = prediction_document(job["user_id"], item["filename"], None, upload, outcome)
+                # Deterministic ids make re-inserting a batch after a restart harmless
+                doc["_id"] = doc["id"] = f"{job['id']}:{item['index']}"
+                doc["job_id"] = job["id"]
+                docs.append(doc)
+
+            await db.insert_predictions(docs)
+            await self.store.record_results(job["id"], results)
+
+        await self.store.finish_job(job["id"])
+        await asyncio.to_thread(shutil.rmtree, job["data_dir"], True)
+        logger.info("Classification job %s completed", job["id"])
+
+
+_job_queue = None
+
+def get_job_queue() -> JobQueue:
+    """
+    Returns a singleton job queue using the configured store.
+    """
+    global _job_queue
+    if _job_queue is None:
+        if settings.JOBS_BACKEND == "mongo":
+            store = MongoJobStore()
+        elif settings.JOBS_BACKEND == "sqlite":
+            store = SQLiteJobStore(settings.JOBS_SQLITE_PATH)
+        else:
+            raise ValueError(f"Unknown jobs backend '{settings.JOBS_BACKEND}', expected 'sqlite' or 'mongo'")
+        _job_queue = JobQueue(
+            store,
+            data_dir=settings.JOBS_DATA_DIR,
+            workers=settings.JOBS_WORKERS,
+            batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            poll_interval=settings.JOBS_POLL_INTERVAL_SECONDS,
+            lease_seconds=settings.JOBS_LEASE_SECONDS,
+            max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        )
+    return _job_queue
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a small dedicated thread pool.
+
+    bcrypt is deliberately slow (hundreds of milliseconds at the default cost)
+    and releases the GIL while it works, so moving it off the event loop keeps
+    a burst of logins from stalling every other request. At most
+    ``max_pending`` operations may be queued or running; beyond that callers
+    get a 503 instead of an ever-growing queue.
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = 2, max_pending: int = 64):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._busy_seconds = 0.0
+        self._started_at = time.perf_counter()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._pool
+
+    def _timed(self, fn: Callable, *args) -> Any:
+        self._active += 1
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._active -= 1
+            self._busy_seconds += time.perf_counter() - started
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run ``fn(*args)`` on the hashing pool, or fail fast with 503 when it is saturated."""
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent sign-ins, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), self._timed, fn, *args)
+        finally:
+            self._pending -= 1
+            self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password; the second value is a new hash when the stored one
+        uses a different cost than BCRYPT_ROUNDS and should be replaced.
+        """
+        verified, new_hash = await self.run(self.context.verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            self._rehashed += 1
+        return verified, new_hash
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        """Return pool size, queue depth and utilisation."""
+        uptime = time.perf_counter() - self._started_at
+        return {
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "active": self._active,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "utilisation": min(self._active / self.max_workers, 1.0),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "rehashed": self._rehashed,
+            "mean_utilisation": min(self._busy_seconds / (uptime * self.max_workers), 1.0) if uptime else 0.0,
+        }
+
+
+_password_hasher = None
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Returns a singleton password hasher configured from settings.
+    """
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher(
+            rounds=settings.BCRYPT_ROUNDS,
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+        )
+    return _password_hasher
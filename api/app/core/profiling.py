@@ -0,0 +1,272 @@
+import asyncio
+import hmac
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+PROFILE_TOKEN_HEADER = b"x-profile-token"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+_project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Innermost frames of threads that are parked rather than working
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+_labels: Dict[object, str] = {}
+
+
+def _label(code) -> str:
+    """``function (path:line)`` for a code object, with paths shortened to the project or package."""
+    label = _labels.get(code)
+    if label is None:
+        path = os.path.normpath(code.co_filename)
+        if path.startswith(_project_root):
+            path = path[len(_project_root) + 1:]
+        elif "site-packages" + os.sep in path:
+            path = path.split("site-packages" + os.sep, 1)[1]
+        else:
+            path = os.path.basename(path)
+        name = getattr(code, "co_qualname", code.co_name)
+        label = _labels[code] = f"{name} ({path}:{code.co_firstlineno})".replace(";", ":")
+    return label
+
+
+def _thread_stack(frame) -> List[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES
+
+
+def _task_stack(task: asyncio.Task) -> List[str]:
+    """
+    The chain of coroutines ``task`` is suspended in, outermost first.
+
+    Read from the sampler thread while the loop runs, so a sample can catch the
+    chain mid-change; that costs one odd sample, not a crash. A chain ending in
+    a future (executor work, a database reply) gets an ``[await ...]`` leaf.
+    """
+    stack = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        if isinstance(awaitable, asyncio.Task):
+            # Follow into tasks awaited directly, e.g. by asyncio.wait_for
+            awaitable = awaitable.get_coro()
+            continue
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) \
+            or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            # ``await future`` suspends in the future's iterator
+            name = type(awaitable).__name__.replace("FutureIter", "Future")
+            stack.append(f"[await {name}]")
+            break
+        stack.append(_label(frame.f_code))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None) \
+            or getattr(awaitable, "ag_await", None)
+    return stack
+
+
+class ProfileSession:
+    """Samples collected for one request while it is in flight."""
+
+    __slots__ = ("id", "task", "loop_thread", "method", "path", "trigger", "started_at", "started", "samples",
+                 "stacks")
+
+    def __init__(self, task: asyncio.Task, method: str, path: str, trigger: str):
+        self.id = secrets.token_hex(8)
+        self.task = task
+        self.loop_thread = threading.get_ident()
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.started_at = datetime.utcnow()
+        self.started = time.perf_counter()
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+
+class RequestProfiler:
+    """
+    Statistical profiler for individual requests, keeping the latest profiles in a ring buffer.
+
+    While at least one request is being profiled, a daemon thread wakes every
+    ``interval`` seconds and records, for each profiled request:
+
+    - the coroutine chain the request's task is awaiting in, under ``[request]``,
+      which shows wall-clock time spent waiting on the predictor, MongoDB or SQLite
+    - the stack of every busy thread, under ``[event loop]`` or the thread's name,
+      which shows CPU time on the loop and in the inference and hashing pools
+
+    Threads are shared by all requests, so under concurrency their samples
+    include work for other requests. Stacks are kept folded
+    (``frame;frame;frame count``) as read by flamegraph.pl, inferno and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005, buffer_size: int = 50):
+        self.interval = interval
+        self.profiles = deque(maxlen=buffer_size)
+        self._active: Dict[str, ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, task: asyncio.Task, method: str, path: str, trigger: str) -> ProfileSession:
+        """Begin sampling ``task``; call from the event loop thread running it."""
+        session = ProfileSession(task, method, path, trigger)
+        with self._lock:
+            self._active[session.id] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return session
+
+    def stop(self, session: ProfileSession, status: int, route: str) -> dict:
+        """Stop sampling and store the profile in the ring buffer."""
+        with self._lock:
+            self._active.pop(session.id, None)
+        profile = {
+            "id": session.id,
+            "method": session.method,
+            "path": session.path,
+            "route": route,
+            "status": status,
+            "trigger": session.trigger,
+            "started_at": session.started_at.isoformat(),
+            "duration_ms": (time.perf_counter() - session.started) * 1000.0,
+            "interval_ms": self.interval * 1000.0,
+            "samples": session.samples,
+            "stacks": session.stacks,
+        }
+        self.profiles.append(profile)
+        return profile
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                self._sample(list(self._active.values()))
+            time.sleep(self.interval)
+
+    def _sample(self, sessions: List[ProfileSession]):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        busy = {
+            ident: _thread_stack(frame)
+            for ident, frame in sys._current_frames().items()
+            if ident != own and not _is_idle(frame)
+        }
+        for session in sessions:
+            if session.task.done():
+                continue
+            session.samples += 1
+            task_stack = _task_stack(session.task)
+            if task_stack:
+                session.stacks[";".join(["[request]", *task_stack])] += 1
+            for ident, stack in busy.items():
+                root = "[event loop]" if ident == session.loop_thread else f"[{names.get(ident, ident)}]"
+                session.stacks[";".join([root, *stack])] += 1
+
+    def list(self) -> List[dict]:
+        """Stored profiles without their stacks, newest first."""
+        return [{key: value for key, value in profile.items() if key != "stacks"}
+                for profile in reversed(self.profiles)]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        for profile in self.profiles:
+            if profile["id"] == profile_id:
+                return profile
+        return None
+
+
+def folded(profile: dict) -> str:
+    """A profile's stacks in the folded format, one ``frame;frame;frame count`` line per stack."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(profile["stacks"].items()))
+
+
+def check_admin_token(token: Optional[str], admin_token: str) -> bool:
+    return bool(admin_token) and token is not None and hmac.compare_digest(token, admin_token)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that carry ``X-Profile-Token: <admin token>``,
+    plus a random ``sample_rate`` fraction of all others.
+
+    Profiled responses get an ``X-Profile-Id`` header naming the stored profile.
+    """
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None, admin_token: str = "",
+                 sample_rate: float = 0.0):
+        self.app = app
+        self.profiler = profiler
+        self.admin_token = admin_token.encode()
+        self.sample_rate = sample_rate
+
+    def _trigger(self, scope) -> Optional[str]:
+        if scope["path"].startswith("/admin/"):
+            return None
+        if self.admin_token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_TOKEN_HEADER:
+                    return "header" if hmac.compare_digest(value, self.admin_token) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = self.profiler or get_request_profiler()
+        session = profiler.start(asyncio.current_task(), scope["method"], scope["path"], trigger)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message = dict(message, headers=[*message.get("headers", []),
+                                                 (PROFILE_ID_HEADER, session.id.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop(session, status[0], route_template(scope))
+
+
+_profiler = None
+
+def get_request_profiler() -> RequestProfiler:
+    """
+    Returns a singleton profiler sampling every ``PROFILING_INTERVAL_MS`` and
+    keeping the last ``PROFILING_BUFFER_SIZE`` profiles.
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = RequestProfiler(settings.PROFILING_INTERVAL_MS / 1000.0, settings.PROFILING_BUFFER_SIZE)
+    return _profiler
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+
+
+class AsyncSQLite:
+    """
+    Async access to an SQLite database.
+
+    All calls run on one dedicated thread that owns the connection, so they never
+    block the event loop and never share the connection between threads. The
+    database is opened in WAL mode so readers in other processes are not blocked
+    by writers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _open(self):
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        connection.execute("PRAGMA foreign_keys=ON")
+        self._connection = connection
+
+    async def connect(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+            # Later calls queue behind this one on the same thread, so they see the connection
+            await self._submit(self._open)
+
+    async def _submit(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run ``fn(connection)`` inside a write transaction and return its result."""
+        def transaction():
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._connection)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return result
+
+        await self.connect()
+        return await self._submit(transaction)
+
+    async def execute(self, sql: str, params: Iterable = ()) -> int:
+        """Execute one statement and return the number of affected rows."""
+        await self.connect()
+        return await self._submit(lambda: self._connection.execute(sql, tuple(params)).rowcount)
+
+    async def executemany(self, sql: str, rows: Iterable[Iterable]) -> None:
+        await self.run(lambda connection: connection.executemany(sql, [tuple(row) for row in rows]))
+
+    async def executescript(self, script: str) -> None:
+        await self.connect()
+        await self._submit(self._connection.executescript, script)
+
+    async def fetchall(self, sql: str, params: Iterable = ()) -> List[dict]:
+        await self.connect()
+        rows = await self._submit(lambda: self._connection.execute(sql, tuple(params)).fetchall())
+        return [dict(row) for row in rows]
+
+    async def fetchone(self, sql: str, params: Iterable = ()) -> Optional[dict]:
+        await self.connect()
+        row = await self._submit(lambda: self._connection.execute(sql, tuple(params)).fetchone())
+        return dict(row) if row is not None else None
+
+    async def close(self):
+        if self._executor is not None:
+            await self._submit(self._connection.close)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._connection = None
@@ -0,0 +1,384 @@
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+from app.core.analytics import analytics_summary, prediction_analytics, record_rollups, rollup_groups
+from app.core.config import settings
+from app.core.sqlite import AsyncSQLite
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Fields returned by the history endpoint
+HISTORY_FIELDS = ("id", "disease_name", "confidence", "timestamp", "filename")
+
+
+class Storage(ABC):
+    """
+    Users and prediction records, as used by the routers.
+
+    ``insert_predictions`` skips records whose ``_id`` (or ``id``) is already
+    stored, so replaying a batch is safe, and keeps the daily analytics
+    rollups in step with the records it wrote.
+    """
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def ping(self):
+        """Raise if the store cannot answer a trivial query."""
+
+    @abstractmethod
+    async def find_user(self, username: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def find_user_by_email(self, email: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    async def create_user(self, user: Dict):
+        ...
+
+    @abstractmethod
+    async def update_user(self, username: str, changes: Dict) -> Optional[Dict]:
+        """Apply ``changes`` and return the stored user afterwards."""
+
+    @abstractmethod
+    def prediction_collection(self):
+        """Collection-like target with ``insert_many`` for the write-behind buffer."""
+
+    @abstractmethod
+    async def record_rollups(self, predictions: List[Dict]):
+        """Update the rollups for predictions written through ``prediction_collection``."""
+
+    @abstractmethod
+    async def insert_predictions(self, predictions: List[Dict]) -> List[Dict]:
+        """Store predictions now and return the ones that were not already stored."""
+
+    @abstractmethod
+    async def prediction_history(
+        self,
+        user_id: str,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None,
+        disease: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        min_confidence: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        A user's predictions newest first, ordered on (timestamp, id).
+        ``after`` is the key of the last record of the previous page.
+        """
+
+    @abstractmethod
+    async def prediction_analytics(self, user_id: str, granularity: str = "week", **filters) -> Dict:
+        """Detections per disease per day, week or month, from the rollups."""
+
+
+class MongoStorage(Storage):
+    """Storage in the ``users``, ``predictions`` and ``prediction_rollups`` MongoDB collections."""
+
+    def __init__(self, get_db: Callable):
+        self.get_db = get_db
+
+    async def ping(self):
+        await self.get_db().command("ping")
+
+    async def find_user(self, username: str) -> Optional[Dict]:
+        return await self.get_db()["users"].find_one({"username": username})
+
+    async def find_user_by_email(self, email: str) -> Optional[Dict]:
+        return await self.get_db()["users"].find_one({"email": email})
+
+    async def create_user(self, user: Dict):
+        await self.get_db()["users"].insert_one(user)
+
+    async def update_user(self, username: str, changes: Dict) -> Optional[Dict]:
+        users_collection = self.get_db()["users"]
+        await users_collection.update_one({"username": username}, {"$set": changes})
+        return await users_collection.find_one({"username": username})
+
+    def prediction_collection(self):
+        return self.get_db()["predictions"]
+
+    async def record_rollups(self, predictions: List[Dict]):
+        await record_rollups(self.get_db(), predictions)
+
+    async def insert_predictions(self, predictions: List[Dict]) -> List[Dict]:
+        if not predictions:
+            return []
+        written = predictions
+        try:
+            await self.prediction_collection().insert_many(predictions, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            duplicates = {error["index"] for error in errors}
+            written = [prediction for i, prediction in enumerate(predictions) if i not in duplicates]
+        try:
+            await self.record_rollups(written)
+        except Exception as e:
+            logger.warning("Could not update prediction rollups: %s", e)
+        return written
+
+    async def prediction_history(self, user_id, limit, after=None, disease=None, start=None, end=None,
+                                 min_confidence=None) -> List[Dict]:
+        query = {"user_id": user_id}
+        if disease:
+            query["disease_name"] = disease
+        if start or end:
+            query["timestamp"] = {}
+            if start:
+                query["timestamp"]["$gte"] = start
+            if end:
+                query["timestamp"]["$lt"] = end
+        if min_confidence is not None:
+            query["confidence"] = {"$gte": min_confidence}
+        if after:
+            timestamp, prediction_id = after
+            query["$or"] = [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "id": {"$lt": prediction_id}},
+            ]
+
+        projection = {"_id": 0, **{field: 1 for field in HISTORY_FIELDS}}
+        return await self.get_db()["predictions"].find(query, projection) \
+            .sort([("timestamp", -1), ("id", -1)]) \
+            .limit(limit) \
+            .to_list(length=limit)
+
+    async def prediction_analytics(self, user_id: str, granularity: str = "week", **filters) -> Dict:
+        return await prediction_analytics(self.get_db(), user_id, granularity, **filters)
+
+
+def _timestamp(value: datetime) -> str:
+    """Sortable text form of a UTC timestamp; aware datetimes are converted to naive UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
+
+
+class SQLiteStorage(Storage):
+    """
+    Storage in a local SQLite file, for single-node deployments without a MongoDB server.
+
+    Rollups are updated in the same transaction as the predictions they count.
+    When PREDICTION_RETENTION_DAYS is set, expired predictions are deleted at
+    most once an hour as new ones are written.
+    """
+
+    USER_FIELDS = ("id", "username", "email", "full_name", "is_active", "hashed_password")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL UNIQUE,
+            email TEXT NOT NULL UNIQUE,
+            full_name TEXT,
+            is_active INTEGER NOT NULL DEFAULT 1,
+            hashed_password TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS predictions (
+            key TEXT PRIMARY KEY,
+            id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            filename TEXT,
+            disease_name TEXT NOT NULL,
+            confidence REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            metadata TEXT
+        );
+        CREATE INDEX IF NOT EXISTS predictions_user_id_timestamp_id
+            ON predictions (user_id, timestamp DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS predictions_timestamp ON predictions (timestamp);
+        CREATE TABLE IF NOT EXISTS prediction_rollups (
+            user_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            disease_name TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            confidence_sum REAL NOT NULL,
+            last_timestamp TEXT NOT NULL,
+            PRIMARY KEY (user_id, day, disease_name)
+        ) WITHOUT ROWID;
+    """
+
+    # Start of the period containing ``day`` (a YYYY-MM-DD string); weeks start on Monday
+    PERIODS = {
+        "day": "day",
+        "week": "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days')",
+        "month": "strftime('%Y-%m-01', day)",
+    }
+
+    PRUNE_INTERVAL_SECONDS = 3600.0
+
+    def __init__(self, path: str):
+        self.sqlite = AsyncSQLite(path)
+        self._last_prune = 0.0
+
+    async def connect(self):
+        await self.sqlite.connect()
+        await self.sqlite.executescript(self.SCHEMA)
+
+    async def close(self):
+        await self.sqlite.close()
+
+    async def ping(self):
+        await self.sqlite.fetchone("SELECT 1")
+
+    def _user(self, row: Optional[Dict]) -> Optional[Dict]:
+        if row is not None:
+            row["is_active"] = bool(row["is_active"])
+        return row
+
+    async def find_user(self, username: str) -> Optional[Dict]:
+        return self._user(await self.sqlite.fetchone("SELECT * FROM users WHERE username = ?", (username,)))
+
+    async def find_user_by_email(self, email: str) -> Optional[Dict]:
+        return self._user(await self.sqlite.fetchone("SELECT * FROM users WHERE email = ?", (email,)))
+
+    async def create_user(self, user: Dict):
+        await self.sqlite.execute(
+            f"INSERT INTO users ({', '.join(self.USER_FIELDS)}) VALUES ({', '.join('?' * len(self.USER_FIELDS))})",
+            (user.get(field) for field in self.USER_FIELDS),
+        )
+
+    async def update_user(self, username: str, changes: Dict) -> Optional[Dict]:
+        unknown = set(changes) - set(self.USER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+        if changes:
+            await self.sqlite.execute(
+                f"UPDATE users SET {', '.join(f'{field} = ?' for field in changes)} WHERE username = ?",
+                (*changes.values(), username),
+            )
+        return await self.find_user(username)
+
+    def prediction_collection(self):
+        return self
+
+    async def insert_many(self, predictions: List[Dict], ordered: bool = True):
+        """Collection-style insert, so the write-behind buffer can target SQLite as well."""
+        await self.insert_predictions(predictions)
+
+    async def record_rollups(self, predictions: List[Dict]):
+        # Done by insert_predictions in the same transaction
+        pass
+
+    async def insert_predictions(self, predictions: List[Dict]) -> List[Dict]:
+        if not predictions:
+            return []
+        cutoff = None
+        if settings.PREDICTION_RETENTION_DAYS and time.monotonic() - self._last_prune > self.PRUNE_INTERVAL_SECONDS:
+            self._last_prune = time.monotonic()
+            cutoff = _timestamp(datetime.utcnow() - timedelta(days=settings.PREDICTION_RETENTION_DAYS))
+
+        def insert(connection: sqlite3.Connection) -> List[Dict]:
+            written = []
+            for prediction in predictions:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO predictions "
+                    "(key, id, user_id, filename, disease_name, confidence, timestamp, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        str(prediction.get("_id", prediction["id"])),
+                        prediction["id"],
+                        prediction["user_id"],
+                        prediction.get("filename"),
+                        prediction["disease_name"],
+                        float(prediction["confidence"]),
+                        _timestamp(prediction["timestamp"]),
+                        json.dumps(prediction.get("metadata")),
+                    ),
+                )
+                if cursor.rowcount:
+                    written.append(prediction)
+
+            connection.executemany(
+                "INSERT INTO prediction_rollups "
+                "(user_id, day, disease_name, count, confidence_sum, last_timestamp) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id, day, disease_name) DO UPDATE SET "
+                "count = count + excluded.count, "
+                "confidence_sum = confidence_sum + excluded.confidence_sum, "
+                "last_timestamp = max(last_timestamp, excluded.last_timestamp)",
+                [
+                    (user_id, f"{day:%Y-%m-%d}", disease_name, group["count"], group["confidence_sum"],
+                     _timestamp(group["last"]))
+                    for (user_id, disease_name, day), group in rollup_groups(written).items()
+                ],
+            )
+            if cutoff is not None:
+                connection.execute("DELETE FROM predictions WHERE timestamp < ?", (cutoff,))
+            return written
+
+        return await self.sqlite.run(insert)
+
+    async def prediction_history(self, user_id, limit, after=None, disease=None, start=None, end=None,
+                                 min_confidence=None) -> List[Dict]:
+        where = ["user_id = ?"]
+        params: list = [user_id]
+        if disease:
+            where.append("disease_name = ?")
+            params.append(disease)
+        if start:
+            where.append("timestamp >= ?")
+            params.append(_timestamp(start))
+        if end:
+            where.append("timestamp < ?")
+            params.append(_timestamp(end))
+        if min_confidence is not None:
+            where.append("confidence >= ?")
+            params.append(min_confidence)
+        if after:
+            timestamp, prediction_id = after
+            where.append("(timestamp, id) < (?, ?)")
+            params.extend([_timestamp(timestamp), prediction_id])
+
+        rows = await self.sqlite.fetchall(
+            f"SELECT {', '.join(HISTORY_FIELDS)} FROM predictions WHERE {' AND '.join(where)} "
+            "ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (*params, limit),
+        )
+        for row in rows:
+            row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+        return rows
+
+    async def prediction_analytics(self, user_id: str, granularity: str = "week", start: Optional[datetime] = None,
+                                   end: Optional[datetime] = None, disease: Optional[str] = None) -> Dict:
+        where = ["user_id = ?"]
+        params: list = [user_id]
+        if start:
+            where.append("day >= ?")
+            params.append(f"{start:%Y-%m-%d}")
+        if end:
+            # Days are midnights; one before ``end`` counts even if ``end`` is later that day
+            last_day = end.date() if end.time() == datetime.min.time() else end.date() + timedelta(days=1)
+            where.append("day < ?")
+            params.append(last_day.isoformat())
+        if disease:
+            where.append("disease_name = ?")
+            params.append(disease)
+
+        rows = await self.sqlite.fetchall(
+            f"SELECT {self.PERIODS[granularity]} AS period, disease_name, SUM(count) AS count, "
+            "SUM(confidence_sum) / SUM(count) AS mean_confidence "
+            f"FROM prediction_rollups WHERE {' AND '.join(where)} "
+            "GROUP BY period, disease_name ORDER BY period, disease_name",
+            params,
+        )
+        for row in rows:
+            row["period"] = datetime.fromisoformat(row["period"])
+        return analytics_summary(granularity, rows)
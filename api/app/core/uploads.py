@@ -0,0 +1,193 @@
+import hashlib
+import io
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from PIL import Image
+
+from app.core.config import settings
+
+# Allowance for multipart boundaries and part headers on top of the file bytes
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+# Leading bytes of the image formats the models can decode
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+    (b"BM", "BMP"),
+)
+
+
+def detect_image_format(header: bytes) -> Optional[str]:
+    """Identify an image format from its magic bytes."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+@dataclass
+class UploadedImage:
+    """
+    A validated upload.
+
+    ``data`` is one immutable buffer; ``io.BytesIO(data)`` shares it rather
+    than copying, so decoders read the bytes received from the client in place.
+    """
+    data: bytes
+    sha256: str
+    size: int
+    format: str
+    width: int
+    height: int
+
+
+def check_image_header(data: bytes, max_pixels: int) -> Tuple[int, int]:
+    """Parse only the image header and enforce the pixel limit; returns (width, height)."""
+    try:
+        # Image.open only parses the header; pixels are decoded later by the predictor
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        # Pillow refuses headers far beyond its own pixel limit before we see the size
+        raise HTTPException(status_code=413, detail=f"Image dimensions exceed the limit of {max_pixels} pixels")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid or corrupt image file")
+
+    if width * height > max_pixels:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Image dimensions {width}x{height} exceed the limit of {max_pixels} pixels",
+        )
+    return width, height
+
+
+def validate_image_bytes(data: bytes, max_bytes: Optional[int] = None, max_pixels: Optional[int] = None) -> UploadedImage:
+    """Validate an image that is already in memory, e.g. a member of an uploaded archive."""
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    max_pixels = max_pixels or settings.UPLOAD_MAX_PIXELS
+
+    if len(data) > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {max_bytes} bytes")
+    image_format = detect_image_format(data[:12])
+    if image_format is None:
+        raise HTTPException(status_code=400, detail="File must be an image")
+    width, height = check_image_header(data, max_pixels)
+
+    return UploadedImage(
+        data=data,
+        sha256=hashlib.sha256(data).hexdigest(),
+        size=len(data),
+        format=image_format,
+        width=width,
+        height=height,
+    )
+
+
+async def read_image_upload(
+    file: UploadFile,
+    max_bytes: Optional[int] = None,
+    max_pixels: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> UploadedImage:
+    """
+    Read an uploaded image in chunks and validate it before any full decode.
+
+    By the time the endpoint runs, the multipart parser has already spooled the
+    whole request body; ``RequestSizeLimitMiddleware`` is what bounds that. Here
+    the per-file size limit is checked as the spooled file is read into memory
+    (or immediately if the parser recorded its size), the SHA-256 is computed
+    incrementally, the format is checked against magic bytes, and the header
+    dimensions are checked against a pixel limit to reject decompression bombs.
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    max_pixels = max_pixels or settings.UPLOAD_MAX_PIXELS
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"File exceeds the maximum upload size of {max_bytes} bytes",
+    )
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    image_format = None
+
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise too_large
+        if image_format is None:
+            image_format = detect_image_format(b"".join(chunks) + chunk if chunks else chunk)
+            if image_format is None and size >= 12:
+                raise HTTPException(status_code=400, detail="File must be an image")
+        digest.update(chunk)
+        chunks.append(chunk)
+
+    if image_format is None:
+        raise HTTPException(status_code=400, detail="File must be an image")
+
+    data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    width, height = check_image_header(data, max_pixels)
+
+    return UploadedImage(
+        data=data,
+        sha256=digest.hexdigest(),
+        size=size,
+        format=image_format,
+        width=width,
+        height=height,
+    )
+
+
+class RequestSizeLimitMiddleware:
+    """
+    ASGI middleware rejecting request bodies over a per-path limit with 413,
+    before the multipart parser spools them to memory or disk.
+
+    ``limits`` maps exact request paths to the largest payload accepted there;
+    ``MULTIPART_OVERHEAD_BYTES`` is added for the multipart framing. A declared
+    Content-Length over the limit is refused without reading the body, and
+    chunked bodies are counted as they arrive and cut off once they pass it.
+    Other paths are not limited.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = {path: limit + MULTIPART_OVERHEAD_BYTES for path, limit in limits.items()}
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"Request body exceeds the limit of {limit} bytes"
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside request parsing, so FastAPI answers it like any HTTPException
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,13 +1,16 @@
-import tensorflow as tf
+import logging
 import numpy as np
 from PIL import Image
 from typing import Tuple, Dict
 import io
 
+logger = logging.getLogger(__name__)
+
 class PlantDiseaseModel:
-    def __init__(self, model_path: str, image_size: Tuple[int, int] = (224, 224)):
+    def __init__(self, model_path: str, image_size: Tuple[int, int] = (224, 224), fast_decode: bool = True):
         self.model_path = model_path
         self.image_size = image_size
+        self.fast_decode = fast_decode
         self.model = None
         self.class_names = [
             "healthy",
@@ -19,14 +22,17 @@ class PlantDiseaseModel:
         self.load_model()
 
     def load_model(self):
+        # TensorFlow takes seconds to import, so only load it once a Keras model is used
+        import tensorflow as tf
         try:
             self.model = tf.keras.models.load_model(self.model_path)
         except Exception as e:
-            print(f"Error loading model: {e}")
+            logger.warning("Error loading model: %s", e)
             # For development, create a dummy model
             self.model = self._create_dummy_model()
 
     def _create_dummy_model(self):
+        import tensorflow as tf
         # Temporary dummy model for development
         inputs = tf.keras.Input(shape=(*self.image_size, 3))
         x = tf.keras.layers.Conv2D(32, 3, activation='relu')(inputs)
@@ -34,11 +40,15 @@ class PlantDiseaseModel:
         outputs = tf.keras.layers.Dense(len(self.class_names), activation='softmax')(x)
         return tf.keras.Model(inputs, outputs)
 
-    def preprocess_image(self, image_data: bytes) -> np.ndarray:
-        """Preprocess image for model input."""
+    def preprocess(self, image_data: bytes) -> np.ndarray:
+        """Decode and normalise a single image without a batch dimension."""
         # Convert bytes to PIL Image
         image = Image.open(io.BytesIO(image_data))
         
+        # Let libjpeg decode at a reduced scale close to the target size
+        if self.fast_decode and image.format == 'JPEG':
+            image.draft('RGB', self.image_size)
+        
         # Convert to RGB if necessary
         if image.mode != 'RGB':
             image = image.convert('RGB')
@@ -47,10 +57,38 @@ class PlantDiseaseModel:
         image = image.resize(self.image_size)
         
         # Convert to numpy array and normalize
-        image_array = np.array(image) / 255.0
-        
+        return np.asarray(image, dtype=np.float32) / 255.0
+
+    def preprocess_image(self, image_data: bytes) -> np.ndarray:
+        """Preprocess image for model input."""
         # Add batch dimension
-        return np.expand_dims(image_array, axis=0)
+        return np.expand_dims(self.preprocess(image_data), axis=0)
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Return class probabilities for a stacked batch of preprocessed images."""
+        # Calling the model directly avoids the per-call tf.data setup of Model.predict
+        return self.model(batch, training=False).numpy()
+
+    def format_prediction(self, probabilities: np.ndarray) -> Dict:
+        """Build the prediction response for one row of class probabilities."""
+        # Get predicted class and confidence
+        predicted_class_idx = int(np.argmax(probabilities))
+        confidence = float(probabilities[predicted_class_idx])
+        
+        # Get disease name
+        disease_name = self.class_names[predicted_class_idx]
+        
+        return {
+            "disease_name": disease_name,
+            "confidence": confidence,
+            "description": "Description placeholder",  # To be replaced with actual description
+            "treatment_recommendations": [
+                "Treatment recommendation placeholder"  # To be replaced with actual recommendations
+            ],
+            "preventive_measures": [
+                "Preventive measure placeholder"  # To be replaced with actual measures
+            ]
+        }
 
     def predict(self, image_data: bytes) -> Dict:
         """Predict disease from image data."""
@@ -59,26 +97,9 @@ class PlantDiseaseModel:
             processed_image = self.preprocess_image(image_data)
             
             # Make prediction
-            predictions = self.model.predict(processed_image)
-            
-            # Get predicted class and confidence
-            predicted_class_idx = np.argmax(predictions[0])
-            confidence = float(predictions[0][predicted_class_idx])
-            
-            # Get disease name
-            disease_name = self.class_names[predicted_class_idx]
+            predictions = self.predict_batch(processed_image)
             
-            return {
-                "disease_name": disease_name,
-                "confidence": confidence,
-                "description": "Description placeholder",  # To be replaced with actual description
-                "treatment_recommendations": [
-                    "Treatment recommendation placeholder"  # To be replaced with actual recommendations
-                ],
-                "preventive_measures": [
-                    "Preventive measure placeholder"  # To be replaced with actual measures
-                ]
-            }
+            return self.format_prediction(predictions[0])
         except Exception as e:
             raise Exception(f"Error during prediction: {str(e)}")
 
@@ -4,12 +4,13 @@ from fastapi.security import OAuth2PasswordRequestForm
 from app.core.auth import (
     authenticate_user,
     create_access_token,
-    get_password_hash,
+    user_claims,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     get_current_active_user,
 )
 from app.schemas.user import Token, UserCreate, User
 from app.core.database import db
+from app.core.passwords import get_password_hasher
 from bson import ObjectId
 
 router = APIRouter()
@@ -27,7 +28,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=user_claims(user), expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -35,17 +36,15 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 @router.post("/register", response_model=User)
 async def register_user(user: UserCreate):
     """Register a new user."""
-    users_collection = db.get_db()["users"]
-    
     # Check if username exists
-    if await users_collection.find_one({"username": user.username}):
+    if await db.storage.find_user(user.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
     # Check if email exists
-    if await users_collection.find_one({"email": user.email}):
+    if await db.storage.find_user_by_email(user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -53,15 +52,15 @@ async def register_user(user: UserCreate):
     
     # Create user document
     user_dict = user.dict()
-    user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
+    user_dict["hashed_password"] = await get_password_hasher().hash(user_dict.pop("password"))
     user_dict["id"] = str(ObjectId())
     
     # Insert user
-    await users_collection.insert_one(user_dict)
+    await db.storage.create_user(user_dict)
     
     return User(**user_dict)
 
 @router.get("/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     """Get current user data."""
-    return current_user 
\ No newline at end of file
+    return current_user
\ No newline at end of file
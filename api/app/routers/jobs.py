@@ -0,0 +1,129 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from app.schemas.job import JobStatus, JobResults
+from app.schemas.user import User
+from app.core.config import settings
+from app.core.auth import get_current_active_user
+from app.core.jobs import get_job_queue
+from app.routers.prediction import IMAGE_EXTENSIONS
+from typing import List
+import logging
+import os
+import shutil
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def _save_upload(file: UploadFile, path: str, max_bytes: int):
+    """Copy an upload to disk without holding it in memory."""
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail="File exceeds the maximum upload size")
+    file.file.seek(0)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file.file, out, settings.UPLOAD_CHUNK_SIZE)
+
+def _store_archive(file: UploadFile, job_dir: str):
+    """Keep an uploaded zip as-is and list the image members to classify."""
+    path = os.path.join(job_dir, "images.zip")
+    _save_upload(file, path, settings.JOBS_MAX_ARCHIVE_BYTES)
+    try:
+        with zipfile.ZipFile(path) as archive:
+            members = [
+                info.filename for info in archive.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+                and not os.path.basename(info.filename).startswith('.')
+            ]
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+    if not members:
+        raise HTTPException(status_code=400, detail="Archive contains no images")
+    if len(members) > settings.JOBS_MAX_IMAGES:
+        raise HTTPException(status_code=413, detail=f"At most {settings.JOBS_MAX_IMAGES} images per job")
+    return [(member, path, member) for member in members]
+
+def _store_files(files: List[UploadFile], job_dir: str):
+    sources = []
+    for index, file in enumerate(files):
+        if not (file.content_type or "").startswith('image/'):
+            raise HTTPException(status_code=400, detail=f"{file.filename} is not an image")
+        path = os.path.join(job_dir, str(index))
+        _save_upload(file, path, settings.UPLOAD_MAX_BYTES)
+        sources.append((file.filename, path, None))
+    return sources
+
+def _job_status(job: dict) -> JobStatus:
+    done = job["completed"] + job["failed"]
+    return JobStatus(
+        id=job["id"],
+        status=job["status"],
+        total=job["total"],
+        completed=job["completed"],
+        failed=job["failed"],
+        progress=done / job["total"] if job["total"] else 1.0,
+        error=job.get("error"),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
+    )
+
+async def _get_own_job(job_id: str, current_user: User) -> dict:
+    job = await get_job_queue().store.get_job(job_id)
+    if job is None or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Submit a bulk-classification job (several images or one zip archive).
+    The images are classified in the background; poll the job for progress.
+    """
+    if len(files) > settings.JOBS_MAX_FILES:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {settings.JOBS_MAX_FILES} files per job; send more images as a zip archive")
+
+    queue = get_job_queue()
+    job_id, job_dir = await run_in_threadpool(queue.new_job)
+    try:
+        is_zip = len(files) == 1 and (
+            files[0].content_type in ("application/zip", "application/x-zip-compressed")
+            or (files[0].filename or "").lower().endswith(".zip")
+        )
+        if is_zip:
+            sources = await run_in_threadpool(_store_archive, files[0], job_dir)
+        else:
+            sources = await run_in_threadpool(_store_files, files, job_dir)
+        job = await queue.submit(job_id, current_user.id, sources)
+    except Exception as e:
+        await run_in_threadpool(shutil.rmtree, job_dir, True)
+        if isinstance(e, HTTPException):
+            raise
+        logger.error("Error submitting classification job: %s", e)
+        raise HTTPException(status_code=500, detail="Error submitting job")
+
+    return _job_status({**job, "completed": 0, "failed": 0})
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job_status(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """
+    Get the status and progress of a bulk-classification job
+    """
+    return _job_status(await _get_own_job(job_id, current_user))
+
+@router.get("/jobs/{job_id}/results", response_model=JobResults)
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get a page of per-image results, in submission order, for the images processed so far
+    """
+    job = await _get_own_job(job_id, current_user)
+    results = await get_job_queue().store.list_results(job_id, offset, limit)
+    return JobResults(id=job_id, status=job["status"], offset=offset, limit=limit, results=results)
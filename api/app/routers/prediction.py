@@ -1,15 +1,26 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from models.inference.predict import get_predictor
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from models.inference.catalog import get_disease_catalog
 from app.schemas.prediction import PredictionResponse
 from app.schemas.user import User
 from app.core.config import settings
 from app.core.auth import get_current_active_user
 from app.core.database import db
+from app.core.batching import get_batcher
+from app.core.executor import get_executor, preprocess_image, predict_image
+from app.core.classification import classify_uploads, prediction_document
+from app.core.cache import get_prediction_cache
+from app.core.metrics import PREDICT_ERRORS, PREDICTIONS, UPLOAD_BYTES, stage_timer
+from app.core.uploads import read_image_upload, validate_image_bytes
 from datetime import datetime
-from bson import ObjectId
+from typing import List, Optional
+import base64
+import json
 import logging
 import sys
 import os
+import zipfile
 from pathlib import Path
 
 # Configure logging
@@ -22,6 +33,8 @@ sys.path.append(str(project_root))
 
 router = APIRouter()
 
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
 @router.post("/predict", response_model=PredictionResponse)
 async def predict_disease(
     file: UploadFile = File(...),
@@ -35,99 +48,310 @@ async def predict_disease(
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Read file contents
-        contents = await file.read()
+        # Stream the upload with size, format and dimension checks
+        with stage_timer("upload_read"):
+            upload = await read_image_upload(file)
+        contents = upload.data
+        UPLOAD_BYTES.observe(upload.size)
         
-        # Get predictor instance
-        predictor = get_predictor()
+        # Decode and classify off the event loop
+        executor = get_executor()
         
         # Make prediction
         try:
-            prediction = predictor.predict(contents)
+            prediction = None
+            if settings.PREDICTION_CACHE_ENABLED:
+                cache = get_prediction_cache()
+                with stage_timer("cache_lookup"):
+                    model_version = await executor.get_model_version()
+                    prediction = await cache.get(upload.sha256, model_version)
             
-            # Store prediction in database
-            predictions_collection = db.get_db()["predictions"]
-            prediction_doc = {
-                "id": str(ObjectId()),
-                "user_id": current_user.id,
-                "filename": file.filename,
-                "disease_name": prediction["disease_name"],
-                "confidence": prediction["confidence"],
-                "timestamp": datetime.utcnow(),
-                "metadata": {
-                    "file_size": len(contents),
-                    "content_type": file.content_type
-                }
-            }
-            await predictions_collection.insert_one(prediction_doc)
+            if prediction is None:
+                # Queueing plus the decode and forward stages the predictor reports itself
+                with stage_timer("inference"):
+                    if settings.INFERENCE_BATCHING_ENABLED:
+                        sample = await executor.run(preprocess_image, contents)
+                        prediction = await get_batcher().submit(sample)
+                    else:
+                        prediction = await executor.run(predict_image, contents)
+                if settings.PREDICTION_CACHE_ENABLED:
+                    await cache.set(upload.sha256, model_version, prediction)
+            
+            # Store prediction in database (buffered, written in batches)
+            prediction_doc = prediction_document(
+                current_user.id, file.filename, file.content_type, upload, prediction
+            )
+            with stage_timer("db_write"):
+                await db.save_predictions([prediction_doc])
             
+            PREDICTIONS.labels(prediction["disease_name"]).inc()
             return PredictionResponse(**prediction)
             
         except Exception as e:
-            logger.error(f"Prediction error: {str(e)}")
+            PREDICT_ERRORS.labels("inference").inc()
+            logger.error("Prediction error: %s", e)
             raise HTTPException(
                 status_code=500,
                 detail="Error processing image. Please try again."
             )
     
     except HTTPException as e:
+        if e.status_code < 500:
+            PREDICT_ERRORS.labels("invalid_upload").inc()
         raise e
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        PREDICT_ERRORS.labels("internal").inc()
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def _is_zip(file: UploadFile) -> bool:
+    return (
+        file.content_type in ("application/zip", "application/x-zip-compressed")
+        or (file.filename or "").lower().endswith(".zip")
+    )
+
+def _open_archive(file: UploadFile):
+    """Open an uploaded zip and list its image members, enforcing the batch limits."""
+    if file.size is not None and file.size > settings.BATCH_MAX_ARCHIVE_BYTES:
+        raise HTTPException(status_code=413, detail="Archive exceeds the maximum upload size")
+    try:
+        archive = zipfile.ZipFile(file.file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Invalid zip archive")
+    
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+        and not os.path.basename(info.filename).startswith('.')
+    ]
+    if not members:
+        raise HTTPException(status_code=400, detail="Archive contains no images")
+    if len(members) > settings.BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_IMAGES} images per batch")
+    return archive, members
+
+def _read_archive_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo):
+    # The declared size bounds how much ZipExtFile will inflate, so check it first
+    if info.file_size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="File exceeds the maximum upload size")
+    return validate_image_bytes(archive.read(info))
+
+async def _iter_batch_images(files: List[UploadFile], archive: Optional[zipfile.ZipFile],
+                             members: List[zipfile.ZipInfo]):
+    """Yield (filename, content_type, upload or HTTPException) for every image in the request."""
+    if archive is not None:
+        with archive:
+            for info in members:
+                try:
+                    upload = await run_in_threadpool(_read_archive_member, archive, info)
+                    yield info.filename, None, upload
+                except HTTPException as e:
+                    yield info.filename, None, e
+        return
+    
+    for file in files:
+        try:
+            if not (file.content_type or "").startswith('image/'):
+                raise HTTPException(status_code=400, detail="File must be an image")
+            yield file.filename, file.content_type, await read_image_upload(file)
+        except HTTPException as e:
+            yield file.filename, file.content_type, e
+
+async def _stream_batch_predictions(files: List[UploadFile], archive: Optional[zipfile.ZipFile],
+                                    members: List[zipfile.ZipInfo], current_user: User):
+    """Classify images in model-sized batches, yielding one NDJSON line per image."""
+    batch_size = settings.INFERENCE_MAX_BATCH_SIZE
+    index = 0
+    pending = []
+    
+    async def flush():
+        uploads = [item[3] for item in pending]
+        results = await classify_uploads(uploads)
+        lines = []
+        docs = []
+        for (item_index, filename, content_type, upload), result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.error("Batch prediction error for %s: %s", filename, result)
+                lines.append({"index": item_index, "filename": filename, "error": "Error processing image"})
+                continue
+            lines.append({
+                "index": item_index,
+                "filename": filename,
+                "prediction": PredictionResponse(**result).model_dump()
+            })
+            docs.append(prediction_document(current_user.id, filename, content_type, upload, result))
+        
+        if docs:
+            try:
+                await db.save_predictions(docs)
+            except Exception as e:
+                logger.error("Error recording batch predictions: %s", e)
+        pending.clear()
+        return "".join(json.dumps(line) + "\n" for line in lines)
+    
+    async for filename, content_type, upload in _iter_batch_images(files, archive, members):
+        if isinstance(upload, HTTPException):
+            yield json.dumps({"index": index, "filename": filename, "error": upload.detail}) + "\n"
+        else:
+            pending.append((index, filename, content_type, upload))
+            if len(pending) >= batch_size:
+                yield await flush()
+        index += 1
+    
+    if pending:
+        yield await flush()
+
+@router.post("/predict/batch")
+async def predict_disease_batch(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Predict plant diseases for many images (several files or one zip archive).
+    Results are streamed as NDJSON, one line per image, as each model batch finishes.
+    """
+    if len(files) > settings.BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_IMAGES} images per batch")
+    
+    # Open a zip before streaming starts, so an invalid or oversized archive still gets a 4xx status
+    archive, members = None, []
+    if len(files) == 1 and _is_zip(files[0]):
+        archive, members = await run_in_threadpool(_open_archive, files[0])
+    
+    return StreamingResponse(
+        _stream_batch_predictions(files, archive, members, current_user),
+        media_type="application/x-ndjson"
+    )
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix on the client's copy still matches."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
 @router.get("/diseases")
-async def get_supported_diseases(current_user: User = Depends(get_current_active_user)):
+async def get_supported_diseases(request: Request, current_user: User = Depends(get_current_active_user)):
     """
-    Get list of supported plant diseases
+    Get list of supported plant diseases.
+    The response is serialized once per catalogue version; send its ETag back in
+    If-None-Match to get a 304 while the catalogue is unchanged.
+    """
+    catalog = get_disease_catalog()
+    catalog.refresh()
+    headers = {
+        "ETag": catalog.etag,
+        "Cache-Control": f"private, max-age={settings.DISEASE_CATALOG_MAX_AGE_SECONDS}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), catalog.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=catalog.payload, media_type="application/json", headers=headers)
+
+@router.get("/diseases/search")
+async def search_diseases(
+    q: str = Query(..., min_length=1, max_length=200),
+    crop: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Search the disease catalogue by name, symptom, description or treatment.
+    Every word must match, whole or as a prefix; hits in names and symptoms rank first.
+    """
+    results = get_disease_catalog().search(q, crop=crop, limit=limit)
+    return {
+        "query": q,
+        "crop": crop,
+        "results": [
+            {
+                "id": result["entry"]["id"],
+                "crop": result["entry"]["crop"],
+                "name": result["entry"]["name"],
+                "description": result["entry"]["description"],
+                "symptoms": result["entry"]["symptoms"],
+                "score": result["score"],
+                "matched_fields": result["matched_fields"],
+            }
+            for result in results
+        ],
+    }
+
+@router.get("/inference/stats")
+async def get_inference_stats(current_user: User = Depends(get_current_active_user)):
+    """
+    Get queue depth, batch-size and executor statistics of the inference path
+    """
+    return {
+        **get_batcher().stats(),
+        "executor": get_executor().stats(),
+        "cache": get_prediction_cache().stats(),
+        "prediction_writes": db.prediction_writer.stats(),
+    }
+
+@router.get("/predictions/analytics")
+async def get_prediction_analytics(
+    granularity: str = Query("week", pattern="^(day|week|month)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    disease: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get detections per disease per day, week or month for the current user.
+    Served from the daily rollups, so the cost does not grow with the number of predictions.
     """
     try:
-        predictor = get_predictor()
-        diseases = []
-        
-        for disease_name, info in predictor.disease_info.items():
-            if disease_name != 'healthy':
-                diseases.append({
-                    'name': disease_name,
-                    'description': info['description'],
-                    'symptoms': [
-                        'Visible spots on leaves',
-                        'Discoloration',
-                        'Wilting'
-                    ],  # These would ideally come from a database
-                    'treatments': info['treatments'],
-                    'preventive_measures': info['preventive_measures']
-                })
-        
-        return {'diseases': diseases}
-    
+        return await db.storage.prediction_analytics(
+            current_user.id, granularity, start=start, end=end, disease=disease
+        )
     except Exception as e:
-        logger.error(f"Error fetching diseases: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error fetching disease information")
+        logger.error("Error computing prediction analytics: %s", e)
+        raise HTTPException(status_code=500, detail="Error computing prediction analytics")
+
+def _encode_history_cursor(prediction: dict) -> str:
+    key = json.dumps([prediction["timestamp"].isoformat(), prediction["id"]])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+def _decode_history_cursor(cursor: str):
+    try:
+        timestamp, prediction_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(timestamp), str(prediction_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/predictions/history")
-async def get_prediction_history(current_user: User = Depends(get_current_active_user)):
+async def get_prediction_history(
+    limit: int = Query(50, ge=1),
+    cursor: Optional[str] = None,
+    disease: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    current_user: User = Depends(get_current_active_user)
+):
     """
-    Get prediction history for the current user
+    Get prediction history for the current user, newest first.
+    Pages are keyed on (timestamp, id); pass ``next_cursor`` back as ``cursor`` for the next page.
     """
+    limit = min(limit, settings.HISTORY_MAX_PAGE_SIZE)
+    after = _decode_history_cursor(cursor) if cursor else None
+    
     try:
-        predictions_collection = db.get_db()["predictions"]
-        cursor = predictions_collection.find({"user_id": current_user.id})
-        predictions = []
+        # One extra record tells us whether another page exists
+        predictions = await db.storage.prediction_history(
+            current_user.id, limit + 1, after=after, disease=disease,
+            start=start, end=end, min_confidence=min_confidence
+        )
         
-        async for prediction in cursor:
-            predictions.append({
-                "id": prediction["id"],
-                "disease_name": prediction["disease_name"],
-                "confidence": prediction["confidence"],
-                "timestamp": prediction["timestamp"],
-                "filename": prediction["filename"]
-            })
+        next_cursor = None
+        if len(predictions) > limit:
+            predictions = predictions[:limit]
+            next_cursor = _encode_history_cursor(predictions[-1])
         
-        return {"predictions": predictions}
+        return {"predictions": predictions, "next_cursor": next_cursor}
     
     except Exception as e:
-        logger.error(f"Error fetching prediction history: {str(e)}")
+        logger.error("Error fetching prediction history: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Error fetching prediction history"
@@ -0,0 +1,30 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.schemas.prediction import PredictionResponse
+
+class JobStatus(BaseModel):
+    id: str
+    status: str
+    total: int
+    completed: int = 0
+    failed: int = 0
+    progress: float = 0.0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class JobResult(BaseModel):
+    index: int
+    filename: Optional[str] = None
+    status: str
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[str] = None
+
+class JobResults(BaseModel):
+    id: str
+    status: str
+    offset: int
+    limit: int
+    results: List[JobResult]
@@ -5,11 +5,26 @@ from pathlib import Path
 project_root = Path(__file__).resolve().parent.parent
 sys.path.append(str(project_root))
 
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.core.database import db
-from app.routers import prediction, auth
+from app.core.batching import get_batcher
+from app.core.executor import get_executor
+from app.core.cache import get_prediction_cache
+from app.core.jobs import get_job_queue
+from app.core.passwords import get_password_hasher
+from app.core.metrics import MetricsMiddleware, observe_stage, registry, render_metrics
+from app.core.profiling import ProfilingMiddleware, check_admin_token, folded, get_request_profiler
+from app.core.uploads import RequestSizeLimitMiddleware
+from models.inference.catalog import configure_disease_catalog, get_disease_catalog
+from models.inference.timing import set_stage_observer
+from app.routers import prediction, auth, jobs
+
+# /diseases and the in-process predictor read the catalogue file named in settings
+configure_disease_catalog(**settings.catalog_config())
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -18,6 +33,16 @@ app = FastAPI(
     redoc_url=f"{settings.API_V1_STR}/redoc",
 )
 
+# Refuse oversized uploads before they are spooled (inside CORS so the 413 is readable by browsers)
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    limits={
+        f"{settings.API_V1_STR}/predict": settings.UPLOAD_MAX_BYTES,
+        f"{settings.API_V1_STR}/predict/batch": settings.BATCH_MAX_ARCHIVE_BYTES,
+        f"{settings.API_V1_STR}/jobs": settings.JOBS_MAX_ARCHIVE_BYTES,
+    },
+)
+
 # Set up CORS middleware
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
@@ -28,6 +53,28 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    # Decode, resize, normalise and forward timings from predictors in this process
+    set_stage_observer(observe_stage)
+    registry.gauge("inference_queue_depth", "Images waiting for a model batch",
+                   lambda: get_batcher().stats()["queue_depth"])
+    registry.gauge("inference_executor_active", "Inference workers busy right now",
+                   lambda: get_executor().stats()["active"])
+    registry.gauge("prediction_writes_pending", "Prediction records buffered for writing",
+                   lambda: db.prediction_writer.stats()["pending"])
+    registry.gauge("prediction_writes_dropped", "Prediction records dropped after retries",
+                   lambda: db.prediction_writer.stats()["dropped"])
+    registry.gauge("password_hash_pending", "Password hashes queued or running",
+                   lambda: get_password_hasher().stats()["pending"])
+
+if settings.PROFILING_ADMIN_TOKEN or settings.PROFILING_SAMPLE_RATE:
+    app.add_middleware(
+        ProfilingMiddleware,
+        admin_token=settings.PROFILING_ADMIN_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+    )
+
 # Include routers
 app.include_router(
     auth.router,
@@ -41,12 +88,35 @@ app.include_router(
     tags=["prediction"]
 )
 
+if settings.JOBS_ENABLED:
+    app.include_router(
+        jobs.router,
+        prefix=settings.API_V1_STR,
+        tags=["jobs"]
+    )
+
 @app.on_event("startup")
 async def startup_db_client():
     await db.connect_to_database()
+    if settings.MODEL_LOAD_IN_BACKGROUND:
+        # Requests needing the model wait for it; /ready reports 503 meanwhile
+        get_executor().start_background()
+    else:
+        await get_executor().start()
+    # Load and index the disease catalogue before the first request needs it
+    get_disease_catalog()
+    await get_prediction_cache().ensure_indexes()
+    if settings.JOBS_ENABLED:
+        await get_job_queue().start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if settings.JOBS_ENABLED:
+        await get_job_queue().stop()
+    await get_batcher().close()
+    get_executor().shutdown()
+    get_password_hasher().shutdown()
+    await db.flush_writes()
     await db.close_database_connection()
 
 @app.get("/")
@@ -55,4 +125,73 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Counters and latency histograms in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _require_profiling_admin(token: Optional[str]):
+    if not settings.PROFILING_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not check_admin_token(token, settings.PROFILING_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+@app.get("/admin/profiles", include_in_schema=False)
+async def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    """Captured request profiles, newest first, without their stacks."""
+    _require_profiling_admin(x_profile_token)
+    return {"profiles": get_request_profiler().list()}
+
+@app.get("/admin/profiles/{profile_id}", include_in_schema=False)
+async def download_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    """One profile as folded stacks, ready for flamegraph.pl, inferno or speedscope."""
+    _require_profiling_admin(x_profile_token)
+    profile = get_request_profiler().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(
+        folded(profile),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'},
+    )
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness for traffic: the model is loaded and warmed up and the database answers a ping.
+    Returns 503 until both hold, with queue, pool and executor statistics either way.
+    """
+    executor = get_executor()
+    batcher = get_batcher().stats()
+    database = await db.ping(settings.READINESS_PING_TIMEOUT_SECONDS)
+    ready = executor.ready and database["ok"]
+    
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "model": {
+                "loaded": executor.ready,
+                "loading": executor.loading,
+                "load_seconds": executor.load_seconds,
+                "error": executor.load_error,
+                "version": executor.model_version,
+                "backend": settings.MODEL_BACKEND,
+                "warmup_runs": settings.MODEL_WARMUP_RUNS,
+            },
+            "database": database,
+            "inference": {
+                "queue_depth": batcher["queue_depth"],
+                "batches_in_flight": batcher["batches_in_flight"],
+                "executor": executor.stats(),
+            },
+            "prediction_writes": {
+                key: value for key, value in db.prediction_writer.stats().items()
+                if key in ("pending", "max_pending", "dropped")
+            },
+            "password_hashing": get_password_hasher().stats(),
+        },
+    )
@@ -0,0 +1,44 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Importing this module puts the project root and api/ on the Python path, so
+scripts can import ``models.*`` and ``app.*`` after it.
+"""
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+for path in (str(project_root), str(project_root / "api")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM resets on exec, unlike ru_maxrss which a child inherits from its parent
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def percentiles(samples) -> dict:
+    """Count, p50, p95, p99 and max of latencies given in seconds, reported in milliseconds."""
+    ordered = sorted(samples)
+    pick = lambda q: 1000.0 * ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"count": len(ordered), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "max_ms": 1000.0 * ordered[-1]}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
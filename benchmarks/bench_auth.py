@@ -0,0 +1,103 @@
+"""
+Benchmark the per-request cost of resolving the current user from a bearer token.
+
+Runs ``get_current_user`` against an in-memory users collection that adds a
+simulated MongoDB round trip, in three modes:
+
+- ``uncached``: verify the JWT and read the user on every request (the old behaviour)
+- ``cached``: the verified-token and user TTL caches
+- ``trusted_claims``: AUTH_TRUST_TOKEN_CLAIMS, the user is built from the token
+
+    python benchmarks/bench_auth.py --requests 20000 --db-latency-ms 0.5 --output bench_auth.json
+"""
+import argparse
+import asyncio
+import json
+import time
+
+# Puts the project root and api/ on the Python path
+import _common
+
+from app.core import auth
+from app.core.config import settings
+from app.core.database import db
+from app.schemas.user import User
+
+USER = {
+    "id": "64b7f0c2a1e4d3b2c1a09f8e",
+    "username": "grower",
+    "email": "grower@example.com",
+    "full_name": "Market Grower",
+    "is_active": True,
+    "hashed_password": "$2b$12$" + "x" * 53,
+}
+
+
+class UsersCollection:
+    """Answers find_one after a fixed delay standing in for a MongoDB round trip."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lookups = 0
+
+    async def find_one(self, query):
+        self.lookups += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return dict(USER) if query.get("username") == USER["username"] else None
+
+
+async def run_mode(mode: str, requests: int, latency: float) -> dict:
+    users = UsersCollection(latency)
+    db.get_db = lambda: {"users": users}
+    settings.AUTH_TRUST_TOKEN_CLAIMS = mode == "trusted_claims"
+    cache_ttl = 0.0 if mode == "uncached" else 300.0
+    for cache in (auth._user_cache, auth._token_cache):
+        cache.clear()
+        cache.ttl_seconds = cache_ttl
+
+    token = auth.create_access_token(auth.user_claims(User(**USER)))
+    await auth.get_current_user(token)
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        await auth.get_current_user(token)
+        samples.append(time.perf_counter() - request_started)
+    elapsed = time.perf_counter() - started
+
+    samples.sort()
+    return {
+        "mode": mode,
+        "requests": requests,
+        "mean_us": 1e6 * elapsed / requests,
+        "p50_us": 1e6 * samples[len(samples) // 2],
+        "p99_us": 1e6 * samples[min(len(samples) - 1, int(0.99 * len(samples)))],
+        "db_lookups": users.lookups,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark authentication overhead per request")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--db-latency-ms", type=float, default=0.5, help="Simulated MongoDB round trip")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = [
+        asyncio.run(run_mode(mode, args.requests, args.db_latency_ms / 1000.0))
+        for mode in ("uncached", "cached", "trusted_claims")
+    ]
+
+    print(f"{'mode':<16} {'mean':>10} {'p50':>10} {'p99':>10} {'db lookups':>11}")
+    for r in results:
+        print(f"{r['mode']:<16} {r['mean_us']:>8.1f}us {r['p50_us']:>8.1f}us {r['p99_us']:>8.1f}us {r['db_lookups']:>11}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"db_latency_ms": args.db_latency_ms, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark full vs. reduced-resolution (draft mode) JPEG decoding.
+
+Each mode runs in its own subprocess so peak RSS is measured independently.
+
+    python benchmarks/bench_decode.py --width 4032 --height 3024 --iterations 20
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+# Puts the project root and api/ on the Python path
+from _common import peak_rss_mb
+
+from models.inference.preprocessing import preprocess_for_resnet
+
+
+def make_photo(width: int, height: int, quality: int = 90) -> bytes:
+    """Create a phone-photo sized JPEG with smooth gradients and sensor-like noise."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        128 + 100 * np.sin(x / 180.0),
+        128 + 100 * np.cos(y / 140.0),
+        128 + 60 * np.sin((x + y) / 260.0),
+    ], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def run_worker(image_path: str, fast_decode: bool, iterations: int, image_size: int):
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
+    baseline_rss = peak_rss_mb()
+    size = (image_size, image_size)
+
+    preprocess_for_resnet(image_bytes, size, fast_decode)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        output = preprocess_for_resnet(image_bytes, size, fast_decode)
+        timings.append((time.perf_counter() - start) * 1000.0)
+
+    np.save(image_path + ('.fast.npy' if fast_decode else '.full.npy'), output)
+    print(json.dumps({
+        'mode': 'fast' if fast_decode else 'full',
+        'latency_ms_mean': float(np.mean(timings)),
+        'latency_ms_p50': float(np.percentile(timings, 50)),
+        'latency_ms_p95': float(np.percentile(timings, 95)),
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_delta_mb': peak_rss_mb() - baseline_rss,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JPEG decode modes for preprocessing")
+    parser.add_argument("--width", type=int, default=4032, help="Width of the synthetic photo")
+    parser.add_argument("--height", type=int, default=3024, help="Height of the synthetic photo")
+    parser.add_argument("--image", type=str, default=None, help="Benchmark this JPEG instead of a synthetic one")
+    parser.add_argument("--image_size", type=int, default=224, help="Model input size")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed runs per mode")
+    parser.add_argument("--output", type=str, default=None, help="Write results as JSON to this path")
+    parser.add_argument("--worker", choices=["fast", "full"], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.image, args.worker == "fast", args.iterations, args.image_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = args.image
+        if image_path is None:
+            image_path = os.path.join(tmp, 'photo.jpg')
+            with open(image_path, 'wb') as f:
+                f.write(make_photo(args.width, args.height))
+
+        results = {}
+        for mode in ("full", "fast"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--worker", mode, "--image", image_path,
+                 "--iterations", str(args.iterations), "--image_size", str(args.image_size)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+        full = np.load(image_path + '.full.npy')
+        fast = np.load(image_path + '.fast.npy')
+        for suffix in ('.full.npy', '.fast.npy'):
+            os.remove(image_path + suffix)
+
+        with Image.open(image_path) as image:
+            width, height = image.size
+        file_size = os.path.getsize(image_path)
+
+    report = {
+        'image': {'width': width, 'height': height, 'bytes': file_size},
+        'iterations': args.iterations,
+        'results': results,
+        'speedup': results['full']['latency_ms_mean'] / results['fast']['latency_ms_mean'],
+        'mean_abs_input_difference': float(np.abs(full - fast).mean()),
+    }
+
+    print(f"Image: {width}x{height}, {args.iterations} iterations")
+    print(f"{'mode':<6}{'mean ms':>10}{'p95 ms':>10}{'peak RSS MB':>14}{'RSS delta MB':>14}")
+    for mode, r in results.items():
+        print(f"{mode:<6}{r['latency_ms_mean']:>10.1f}{r['latency_ms_p95']:>10.1f}"
+              f"{r['peak_rss_mb']:>14.1f}{r['peak_rss_delta_mb']:>14.1f}")
+    print(f"Speedup: {report['speedup']:.1f}x, mean |input difference|: {report['mean_abs_input_difference']:.4f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+End-to-end HTTP load test of the API, offline.
+
+The app from api/main.py runs in-process behind httpx's ASGI transport, with
+its startup and shutdown handlers. Embedded SQLite storage in a temporary
+directory (STORAGE_BACKEND=sqlite) stands in for MongoDB, so the run needs no
+database server, network or GPU. ``--users`` accounts are registered and log
+in through /auth/token, each is seeded with ``--history-depth`` past
+predictions, and then every scenario sends ``--requests`` requests from
+``--concurrency`` clients, each client using one of the users' tokens:
+
+- ``predict``: POST /predict with distinct JPEG uploads
+- ``history``: GET /predictions/history, each client paging through its history
+- ``diseases``: GET /diseases
+- ``mixed``: the three interleaved according to ``--mix``
+
+The JSON artefact holds p50/p95/p99 latency per endpoint, requests per second,
+status counts and peak RSS per scenario, plus the commit and settings it was
+measured with. ``--compare`` prints the change against an earlier artefact.
+
+    python benchmarks/bench_http_load.py --concurrency 16 --requests 500 --output bench_http_load.json
+    python benchmarks/bench_http_load.py --output after.json --compare bench_http_load.json
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import logging
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import numpy as np
+from bson import ObjectId
+from PIL import Image
+
+# Puts the project root and api/ on the Python path
+from _common import peak_rss_mb, percentiles, git_commit
+
+from app.core.config import settings
+
+PASSWORD = "correct horse battery staple"
+SCENARIOS = ("predict", "history", "diseases", "mixed")
+
+
+def make_images(count: int, width: int, height: int) -> list:
+    """Distinct leaf-coloured JPEGs, so uploads are not answered from the prediction cache."""
+    rng = np.random.default_rng(0)
+    images = []
+    for _ in range(count):
+        pixels = rng.normal((60, 140, 50), 25, (height, width, 3)).clip(0, 255).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, "JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+def parse_mix(text: str) -> dict:
+    """``predict:5,history:3,diseases:2`` -> relative weights per endpoint."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition(":")
+        if name not in SCENARIOS[:3]:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}' in --mix")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def configure(args, workdir: Path):
+    """Point storage and the job queue at ``workdir`` before the app is imported."""
+    settings.STORAGE_BACKEND = "sqlite"
+    settings.SQLITE_PATH = str(workdir / "plant_disease.db")
+    settings.JOBS_SQLITE_PATH = str(workdir / "jobs.db")
+    settings.JOBS_DATA_DIR = str(workdir / "jobs")
+    settings.BCRYPT_ROUNDS = args.bcrypt_rounds
+    settings.PREDICTION_CACHE_ENABLED = args.cache
+
+
+class LoadClient:
+    """Request builders for each endpoint, shared by the scenario workers."""
+
+    def __init__(self, client: httpx.AsyncClient, tokens: list, images: list, history_page_size: int):
+        self.client = client
+        self.tokens = tokens
+        self.images = images
+        self.image_counter = itertools.count()
+        self.history_page_size = history_page_size
+        self.cursors: dict = {}
+
+    def headers(self, worker: int) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[worker % len(self.tokens)]}"}
+
+    async def predict(self, worker: int) -> httpx.Response:
+        image = self.images[next(self.image_counter) % len(self.images)]
+        return await self.client.post(
+            f"{settings.API_V1_STR}/predict", headers=self.headers(worker),
+            files={"file": ("leaf.jpg", image, "image/jpeg")},
+        )
+
+    async def history(self, worker: int) -> httpx.Response:
+        params = {"limit": self.history_page_size}
+        if self.cursors.get(worker):
+            params["cursor"] = self.cursors[worker]
+        response = await self.client.get(
+            f"{settings.API_V1_STR}/predictions/history", headers=self.headers(worker), params=params
+        )
+        if response.status_code == 200:
+            # Start again from the newest page once the history is exhausted
+            self.cursors[worker] = response.json()["next_cursor"]
+        return response
+
+    async def diseases(self, worker: int) -> httpx.Response:
+        return await self.client.get(f"{settings.API_V1_STR}/diseases", headers=self.headers(worker))
+
+
+async def run_scenario(load: LoadClient, name: str, args) -> dict:
+    if name == "mixed":
+        mix = args.mix
+        rng = random.Random(0)
+        choose = lambda: rng.choices(list(mix), weights=list(mix.values()))[0]
+    else:
+        choose = lambda: name
+
+    samples: dict = {}
+    statuses: dict = {}
+
+    async def worker(index: int, issued, record: bool):
+        while next(issued) < (args.requests if record else args.warmup):
+            endpoint = choose()
+            started = time.perf_counter()
+            response = await getattr(load, endpoint)(index)
+            elapsed = time.perf_counter() - started
+            if record:
+                samples.setdefault(endpoint, []).append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await worker(0, itertools.count(), False)
+    issued = itertools.count()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i, issued, True) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "requests": sum(len(s) for s in samples.values()),
+        "seconds": elapsed,
+        "requests_per_second": sum(len(s) for s in samples.values()) / elapsed,
+        "endpoints": {endpoint: percentiles(s) for endpoint, s in sorted(samples.items())},
+        "status_counts": {str(code): n for code, n in sorted(statuses.items())},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def sign_in(client: httpx.AsyncClient, users: int) -> list:
+    """Register ``users`` accounts and log each in; returns (user id, token) pairs."""
+    accounts = []
+    for i in range(users):
+        response = await client.post(f"{settings.API_V1_STR}/auth/register", json={
+            "username": f"grower{i}", "email": f"grower{i}@example.com", "password": PASSWORD,
+        })
+        response.raise_for_status()
+        user_id = response.json()["id"]
+        response = await client.post(
+            f"{settings.API_V1_STR}/auth/token", data={"username": f"grower{i}", "password": PASSWORD}
+        )
+        response.raise_for_status()
+        accounts.append((user_id, response.json()["access_token"]))
+    return accounts
+
+
+async def seed_history(user_ids: list, depth: int):
+    """Give each user ``depth`` predictions spread over the last 90 days."""
+    from app.core.database import db
+    from models.inference.catalog import get_disease_catalog
+
+    diseases = [entry["name"] for entry in get_disease_catalog().entries] or ["Late Blight"]
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    for user_id in user_ids:
+        await db.insert_predictions([{
+            "id": str(ObjectId()),
+            "user_id": user_id,
+            "filename": f"seed_{i}.jpg",
+            "disease_name": rng.choice(diseases),
+            "confidence": rng.random(),
+            "timestamp": now - timedelta(seconds=rng.uniform(0, 90 * 86400)),
+            "metadata": {"file_size": 48000, "content_type": "image/jpeg", "format": "JPEG",
+                         "width": 640, "height": 480},
+        } for i in range(depth)])
+
+
+async def main_async(args) -> dict:
+    from main import app
+    from app.core.database import db
+
+    images = make_images(args.images, args.image_width, args.image_height)
+    rss_before = peak_rss_mb()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            started = time.perf_counter()
+            accounts = await sign_in(client, args.users)
+            sign_in_seconds = time.perf_counter() - started
+            await seed_history([user_id for user_id, _ in accounts], args.history_depth)
+
+            load = LoadClient(client, [token for _, token in accounts], images, args.history_page_size)
+            results = []
+            for name in args.scenarios:
+                results.append(await run_scenario(load, name, args))
+                # Buffered prediction records are written before the next scenario starts
+                await db.flush_writes()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "storage_backend": settings.STORAGE_BACKEND,
+        "model_backend": settings.MODEL_BACKEND,
+        "inference_executor": settings.INFERENCE_EXECUTOR,
+        "inference_workers": settings.INFERENCE_WORKERS,
+        "prediction_cache": settings.PREDICTION_CACHE_ENABLED,
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "history_depth": args.history_depth,
+        "image_size": [args.image_width, args.image_height],
+        "sign_in_seconds": sign_in_seconds,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }
+
+
+def print_results(results: dict):
+    print(f"commit {results['commit']}, {results['model_backend']} model, {results['storage_backend']} storage, "
+          f"{results['concurrency']} clients, {results['users']} users")
+    print(f"{'scenario':<10} {'endpoint':<10} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8} {'rss':>8}")
+    for r in results["results"]:
+        for i, (endpoint, p) in enumerate(r["endpoints"].items()):
+            totals = f"{r['requests_per_second']:>8.1f} {r['peak_rss_mb']:>6.0f}MB" if i == 0 else ""
+            print(f"{r['scenario']:<10} {endpoint:<10} {p['count']:>6} {p['p50_ms']:>7.1f}ms "
+                  f"{p['p95_ms']:>7.1f}ms {p['p99_ms']:>7.1f}ms {totals}")
+        errors = {code: n for code, n in r["status_counts"].items() if not code.startswith("2")}
+        if errors:
+            print(f"{'':<10} non-2xx responses: {errors}")
+
+
+def print_comparison(results: dict, baseline: dict):
+    """Change in p95 latency and throughput against an earlier run, per scenario and endpoint."""
+    print(f"\nchange from {baseline['commit']} to {results['commit']} (negative p95 and positive req/s are better)")
+    print(f"{'scenario':<10} {'endpoint':<10} {'p95':>9} {'req/s':>9}")
+    before = {r["scenario"]: r for r in baseline["results"]}
+    change = lambda new, old: f"{100.0 * (new - old) / old:>+8.1f}%" if old else f"{'n/a':>9}"
+    for r in results["results"]:
+        old = before.get(r["scenario"])
+        if old is None:
+            continue
+        for i, (endpoint, p) in enumerate(r["endpoints"].items()):
+            if endpoint not in old["endpoints"]:
+                continue
+            rate = change(r["requests_per_second"], old["requests_per_second"]) if i == 0 else ""
+            print(f"{r['scenario']:<10} {endpoint:<10} {change(p['p95_ms'], old['endpoints'][endpoint]['p95_ms'])} {rate}")
+    print(f"{'peak rss':<21} {change(results['peak_rss_mb'], baseline['peak_rss_mb'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API end to end with embedded storage")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clients sending requests back to back")
+    parser.add_argument("--users", type=int, default=4, help="Accounts the clients are spread over")
+    parser.add_argument("--history-depth", type=int, default=500, help="Past predictions seeded per user")
+    parser.add_argument("--history-page-size", type=int, default=50)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("predict:5,history:3,diseases:2"),
+                        help="Endpoint weights of the mixed scenario")
+    parser.add_argument("--images", type=int, default=64, help="Distinct images uploaded in turn")
+    parser.add_argument("--image-width", type=int, default=640)
+    parser.add_argument("--image-height", type=int, default=480)
+    parser.add_argument("--cache", action="store_true", help="Keep the prediction cache enabled")
+    parser.add_argument("--bcrypt-rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare this run against")
+    args = parser.parse_args()
+    # One log line per request would dominate the run
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix="bench_http_load_") as workdir:
+        configure(args, Path(workdir))
+        results = asyncio.run(main_async(args))
+
+    print_results(results)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark the hot MongoDB queries with and without the declared indexes.
+
+Fills a scratch database with prediction records, times the queries the API
+runs (login lookup by username, register lookup by email, history by user)
+as collection scans, then creates the indexes from ``app.core.indexes`` and
+times them again. Needs a running MongoDB; the scratch database is dropped
+first, so never point it at real data.
+
+    python benchmarks/bench_indexes.py --records 1000000 --output indexes.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+# Puts the project root and api/ on the Python path
+import _common
+
+from app.core.indexes import ensure_indexes, index_report
+
+DISEASES = ["healthy", "leaf_blight", "powdery_mildew", "rust", "bacterial_spot", "late_blight"]
+
+
+async def populate(database, records: int, users: int, chunk: int = 10000):
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    await database["users"].insert_many([
+        {"id": str(ObjectId()), "username": f"user{i}", "email": f"user{i}@example.com",
+         "hashed_password": "x", "is_active": True}
+        for i in range(users)
+    ])
+    for start in range(0, records, chunk):
+        await database["predictions"].insert_many([
+            {
+                "id": str(ObjectId()),
+                "user_id": f"user{rng.randrange(users)}",
+                "filename": f"{i}.jpg",
+                "disease_name": rng.choice(DISEASES),
+                "confidence": rng.random(),
+                "timestamp": now - timedelta(seconds=rng.randrange(365 * 86400)),
+            }
+            for i in range(start, min(start + chunk, records))
+        ], ordered=False)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def time_query(run, explain, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    stats = (await explain())["executionStats"]
+    return {
+        "p50_ms": percentile(samples, 0.50),
+        "p95_ms": percentile(samples, 0.95),
+        "docs_examined": stats["totalDocsExamined"],
+        "keys_examined": stats["totalKeysExamined"],
+    }
+
+
+async def measure(database, users: int, repeat: int) -> dict:
+    rng = random.Random(1)
+    user = lambda: f"user{rng.randrange(users)}"
+    predictions = database["predictions"]
+    users_collection = database["users"]
+
+    def history_cursor(user_id):
+        return predictions.find({"user_id": user_id}).sort([("timestamp", -1), ("id", -1)]).limit(50)
+
+    return {
+        "login_username": await time_query(
+            lambda: users_collection.find_one({"username": user()}),
+            lambda: users_collection.find({"username": "user0"}).explain(),
+            repeat,
+        ),
+        "register_email": await time_query(
+            lambda: users_collection.find_one({"email": f"{user()}@example.com"}),
+            lambda: users_collection.find({"email": "user0@example.com"}).explain(),
+            repeat,
+        ),
+        "history": await time_query(
+            lambda: history_cursor(user()).to_list(length=50),
+            lambda: history_cursor("user0").explain(),
+            repeat,
+        ),
+    }
+
+
+async def main_async(args) -> dict:
+    client = AsyncIOMotorClient(args.mongodb_url)
+    await client.drop_database(args.database)
+    database = client[args.database]
+
+    started = time.perf_counter()
+    await populate(database, args.records, args.users)
+    populate_seconds = time.perf_counter() - started
+
+    without_indexes = await measure(database, args.users, args.repeat)
+    started = time.perf_counter()
+    created = await ensure_indexes(database)
+    index_seconds = time.perf_counter() - started
+    with_indexes = await measure(database, args.users, args.repeat)
+    report = await index_report(database)
+
+    if not args.keep:
+        await client.drop_database(args.database)
+    client.close()
+    return {
+        "records": args.records,
+        "users": args.users,
+        "repeat": args.repeat,
+        "populate_seconds": populate_seconds,
+        "index_build_seconds": index_seconds,
+        "created_indexes": created,
+        "without_indexes": without_indexes,
+        "with_indexes": with_indexes,
+        "index_report": report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MongoDB query latency with and without indexes")
+    parser.add_argument("--mongodb-url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="plant_disease_index_bench", help="Scratch database, dropped first")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+
+    print(f"{'query':<16} {'p50 before':>11} {'p50 after':>10} {'docs before':>12} {'docs after':>11}")
+    for name, before in results["without_indexes"].items():
+        after = results["with_indexes"][name]
+        print(f"{name:<16} {before['p50_ms']:>9.2f}ms {after['p50_ms']:>8.2f}ms "
+              f"{before['docs_examined']:>12} {after['docs_examined']:>11}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Load test: /predict latency while a storm of logins is hashing passwords.
+
+The app runs in-process behind httpx's ASGI transport with an in-memory users
+and predictions store, so it needs no MongoDB or network. /predict latency is
+measured alone and then while ``--login-workers`` clients log in back to back,
+first with bcrypt on the dedicated hashing pool and then, for comparison, with
+bcrypt called directly on the event loop (the behaviour before the pool).
+
+    python benchmarks/bench_login_storm.py --requests 200 --login-workers 16 --output bench_login_storm.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+
+import httpx
+from PIL import Image
+
+# Puts the project root and api/ on the Python path
+from _common import percentiles
+
+from app.core.config import settings
+
+settings.PREDICTION_CACHE_ENABLED = False
+
+from app.core.auth import get_current_active_user
+from app.core.database import db
+from app.core.executor import get_executor
+from app.core.passwords import get_password_hasher
+from app.schemas.user import User
+from main import app
+
+PASSWORD = "correct horse battery staple"
+
+
+class Collection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    async def find_one(self, query, *args, **kwargs):
+        for doc in self.docs:
+            if all(doc.get(key) == value for key, value in query.items()):
+                return dict(doc)
+        return None
+
+    async def insert_one(self, doc):
+        pass
+
+    async def insert_many(self, docs, ordered=True):
+        pass
+
+    async def update_one(self, query, update):
+        pass
+
+    async def bulk_write(self, operations, ordered=True):
+        pass
+
+
+class Database(dict):
+    def __init__(self, users):
+        super().__init__(users=users)
+
+    def __missing__(self, name):
+        self[name] = Collection()
+        return self[name]
+
+
+async def predict_latencies(client, image: bytes, requests: int):
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.post(
+            f"{settings.API_V1_STR}/predict", files={"file": ("leaf.jpg", image, "image/jpeg")}
+        )
+        response.raise_for_status()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def login_storm(client, stop: asyncio.Event, counts: dict):
+    while not stop.is_set():
+        response = await client.post(
+            f"{settings.API_V1_STR}/auth/token", data={"username": "grower", "password": PASSWORD}
+        )
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+
+async def run_mode(mode: str, image: bytes, requests: int, login_workers: int) -> dict:
+    hasher = get_password_hasher()
+    if mode == "event_loop":
+        async def inline(fn, *args):
+            return fn(*args)
+        # Shadow the pooled method on this instance only
+        hasher.run = inline
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await predict_latencies(client, image, 10)
+        baseline = await predict_latencies(client, image, requests)
+
+        stop = asyncio.Event()
+        counts: dict = {}
+        storm = [asyncio.create_task(login_storm(client, stop, counts)) for _ in range(login_workers)]
+        await asyncio.sleep(0.2)
+        started = time.perf_counter()
+        under_storm = await predict_latencies(client, image, requests)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*storm)
+
+    hasher.__dict__.pop("run", None)
+    return {
+        "mode": mode,
+        "baseline": percentiles(baseline),
+        "login_storm": percentiles(under_storm),
+        "login_status_counts": {str(code): n for code, n in sorted(counts.items())},
+        "logins_per_second": sum(counts.values()) / elapsed,
+    }
+
+
+async def main_async(args) -> dict:
+    hasher = get_password_hasher()
+    users = Collection([{
+        "id": "u1", "username": "grower", "email": "grower@example.com", "full_name": None,
+        "is_active": True, "hashed_password": hasher.context.hash(PASSWORD),
+    }])
+    database = Database(users)
+    db.get_db = lambda: database
+    app.dependency_overrides[get_current_active_user] = lambda: User(**users.docs[0])
+    await get_executor().start()
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (1024, 768), "green").save(buffer, "JPEG")
+    image = buffer.getvalue()
+
+    results = [await run_mode(mode, image, args.requests, args.login_workers) for mode in args.modes]
+    await db.flush_writes()
+    return {
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "hash_workers": settings.PASSWORD_HASH_WORKERS,
+        "login_workers": args.login_workers,
+        "requests": args.requests,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure /predict latency during a login storm")
+    parser.add_argument("--requests", type=int, default=200, help="/predict requests per phase")
+    parser.add_argument("--login-workers", type=int, default=16, help="Concurrent clients logging in")
+    parser.add_argument("--modes", nargs="+", default=["pool", "event_loop"], choices=["pool", "event_loop"])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    get_executor().shutdown()
+    get_password_hasher().shutdown()
+
+    print(f"bcrypt rounds {results['bcrypt_rounds']}, {results['hash_workers']} hash workers, "
+          f"{results['login_workers']} login clients")
+    print(f"{'mode':<12} {'phase':<12} {'p50':>9} {'p95':>9} {'p99':>9} {'logins/s':>9}")
+    for r in results["results"]:
+        for phase in ("baseline", "login_storm"):
+            p = r[phase]
+            rate = f"{r['logins_per_second']:>9.1f}" if phase == "login_storm" else ""
+            print(f"{r['mode']:<12} {phase:<12} {p['p50_ms']:>7.1f}ms {p['p95_ms']:>7.1f}ms {p['p99_ms']:>7.1f}ms {rate}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
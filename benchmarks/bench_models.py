@@ -0,0 +1,279 @@
+"""
+Microbenchmark the classifiers in the repo across batch size, thread count and input resolution.
+
+Models:
+
+- ``torch_resnet50``: ``models.model.PlantDiseaseModel`` (ResNet50, PyTorch)
+- ``keras_api``: ``api/app/models/inference.py`` ``PlantDiseaseModel`` (Keras; the
+  file at ``--keras-model-path`` if it exists, otherwise its development model)
+- ``keras_mobilenetv2``: the MobileNetV2 built by ``models/training/train.py``
+
+Weights are randomly initialised where there is no trained file, so nothing
+is downloaded and latencies match trained weights of the same architecture.
+
+Each (model, threads) pair runs in its own subprocess: thread pools can only be
+sized before a framework's first operation, and peak RSS is then per model. In
+the worker, every resolution and batch size gets one timed cold call, ``--warmup``
+untimed calls and ``--iterations`` timed calls of the forward pass alone
+(preprocessing is covered by bench_decode.py). Models whose framework is not
+installed are reported as skipped.
+
+With ``--baseline``, throughput, p95 latency and peak RSS are compared with an
+earlier ``--output`` file row by row, and the exit status is 1 if any of them
+regressed by more than ``--tolerance`` (``--rss-tolerance`` for memory).
+
+    python benchmarks/bench_models.py --batch-sizes 1 8 32 --threads 1 4 --resolutions 160 224 --output bench_models.json
+    python benchmarks/bench_models.py --baseline bench_models.json --tolerance 0.10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Puts the project root and api/ on the Python path
+from _common import project_root, peak_rss_mb
+
+MODELS = ("torch_resnet50", "keras_api", "keras_mobilenetv2")
+DEFAULT_KERAS_MODEL_PATH = project_root / "models" / "plant_disease_model.h5"
+
+
+def configure_torch(threads: int, inter_op_threads: int):
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(inter_op_threads)
+
+
+def configure_tensorflow(threads: int, inter_op_threads: int):
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def build_torch_resnet50(resolution: int, num_classes: int, args):
+    """Forward function over NCHW batches, and the parameter count."""
+    import torch
+    from models.model import PlantDiseaseModel
+
+    model = PlantDiseaseModel(num_classes=num_classes, pretrained=False).eval()
+
+    def forward(batch: np.ndarray) -> np.ndarray:
+        with torch.inference_mode():
+            return model(torch.from_numpy(batch)).numpy()
+
+    return forward, 'nchw', sum(p.numel() for p in model.parameters())
+
+
+def build_keras_api(resolution: int, num_classes: int, args):
+    from app.models.inference import PlantDiseaseModel
+
+    instance = PlantDiseaseModel(args.keras_model_path, image_size=(resolution, resolution))
+    input_shape = tuple(instance.model.input_shape[1:3])
+    if None not in input_shape and input_shape != (resolution, resolution):
+        raise ValueError(f"{args.keras_model_path} takes {input_shape[0]}x{input_shape[1]} inputs")
+    return instance.predict_batch, 'nhwc', instance.model.count_params()
+
+
+def build_keras_mobilenetv2(resolution: int, num_classes: int, args):
+    from models.training.train import PlantDiseaseTrainer
+
+    trainer = PlantDiseaseTrainer(img_size=(resolution, resolution))
+    trainer.class_names = [f"class_{i}" for i in range(num_classes)]
+    model = trainer.build_model(weights=None)
+    return lambda batch: model(batch, training=False).numpy(), 'nhwc', model.count_params()
+
+
+BUILDERS = {
+    'torch_resnet50': (configure_torch, build_torch_resnet50),
+    'keras_api': (configure_tensorflow, build_keras_api),
+    'keras_mobilenetv2': (configure_tensorflow, build_keras_mobilenetv2),
+}
+
+
+def latency_summary(timings) -> dict:
+    timings = np.asarray(timings)
+    return {
+        'mean': float(timings.mean()),
+        'stdev': float(timings.std()),
+        'p50': float(np.percentile(timings, 50)),
+        'p95': float(np.percentile(timings, 95)),
+        'p99': float(np.percentile(timings, 99)),
+    }
+
+
+def run_worker(args):
+    """Benchmark one model at one thread setting; prints the result rows as JSON."""
+    configure, build = BUILDERS[args.worker]
+    try:
+        configure(args.threads[0], args.inter_op_threads)
+    except ImportError as e:
+        print(json.dumps({'skipped': f"{e.name or e} is not installed"}))
+        return
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for resolution in args.resolutions:
+        baseline_rss = peak_rss_mb()
+        try:
+            forward, layout, parameters = build(resolution, args.num_classes, args)
+        except ValueError as e:
+            rows.append({'resolution': resolution, 'skipped': str(e)})
+            continue
+        model_rss = peak_rss_mb()
+
+        for batch_size in args.batch_sizes:
+            shape = (batch_size, 3, resolution, resolution) if layout == 'nchw' else (batch_size, resolution, resolution, 3)
+            batch = rng.random(shape, dtype=np.float32)
+
+            start = time.perf_counter()
+            forward(batch)
+            first_call_ms = (time.perf_counter() - start) * 1000.0
+            for _ in range(args.warmup):
+                forward(batch)
+
+            timings = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                forward(batch)
+                timings.append((time.perf_counter() - start) * 1000.0)
+
+            latency = latency_summary(timings)
+            rows.append({
+                'resolution': resolution,
+                'batch_size': batch_size,
+                'parameters': int(parameters),
+                'first_call_ms': first_call_ms,
+                'latency_ms': latency,
+                'per_image_ms': latency['mean'] / batch_size,
+                'images_per_second': 1000.0 * batch_size / latency['mean'],
+                'model_rss_mb': model_rss - baseline_rss,
+                'peak_rss_mb': peak_rss_mb(),
+            })
+    print(json.dumps({'rows': rows}))
+
+
+def run_model(args, model: str, threads: int) -> list:
+    command = [
+        sys.executable, __file__, "--worker", model,
+        "--threads", str(threads), "--inter-op-threads", str(args.inter_op_threads),
+        "--batch-sizes", *map(str, args.batch_sizes), "--resolutions", *map(str, args.resolutions),
+        "--warmup", str(args.warmup), "--iterations", str(args.iterations),
+        "--num-classes", str(args.num_classes), "--keras-model-path", str(args.keras_model_path),
+    ]
+    # OpenMP and MKL size their pools from the environment before any framework call
+    env = dict(os.environ, OMP_NUM_THREADS=str(threads), MKL_NUM_THREADS=str(threads))
+    key = {'model': model, 'threads': threads, 'inter_op_threads': args.inter_op_threads}
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        return [dict(key, error=completed.stderr.strip().splitlines()[-1:])]
+    # Libraries may print to stdout too; the worker's JSON is the last line
+    output = json.loads(completed.stdout.strip().splitlines()[-1])
+    if 'skipped' in output:
+        return [dict(key, skipped=output['skipped'])]
+    return [dict(key, **row) for row in output['rows']]
+
+
+def row_key(row: dict) -> tuple:
+    return row['model'], row['threads'], row['inter_op_threads'], row.get('resolution'), row.get('batch_size')
+
+
+def check_regressions(rows: list, baseline: dict, tolerance: float, rss_tolerance: float) -> list:
+    """Rows that are slower, or use more memory, than the baseline by more than the tolerances."""
+    before = {row_key(row): row for row in baseline['rows'] if 'images_per_second' in row}
+    regressions = []
+    for row in rows:
+        old = before.get(row_key(row))
+        if old is None or 'images_per_second' not in row:
+            continue
+        checks = (
+            ('images_per_second', old['images_per_second'] / row['images_per_second'] - 1.0, tolerance),
+            ('p95_ms', row['latency_ms']['p95'] / old['latency_ms']['p95'] - 1.0, tolerance),
+            ('peak_rss_mb', row['peak_rss_mb'] / old['peak_rss_mb'] - 1.0, rss_tolerance),
+        )
+        for metric, change, limit in checks:
+            if change > limit:
+                regressions.append({'key': list(row_key(row)), 'metric': metric, 'worse_by': change})
+    return regressions
+
+
+def print_table(rows: list):
+    print(f"{'model':<18}{'threads':>8}{'res':>6}{'batch':>6}{'cold ms':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'img/s':>9}{'RSS MB':>9}")
+    for row in rows:
+        prefix = f"{row['model']:<18}{row['threads']:>8}"
+        if 'images_per_second' not in row:
+            reason = row.get('skipped') or row.get('error')
+            print(f"{prefix}{row.get('resolution', ''):>6}  skipped: {reason}")
+            continue
+        latency = row['latency_ms']
+        print(f"{prefix}{row['resolution']:>6}{row['batch_size']:>6}{row['first_call_ms']:>10.1f}"
+              f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}"
+              f"{row['images_per_second']:>9.1f}{row['peak_rss_mb']:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model forward passes across a settings matrix")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=MODELS)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--threads", nargs="+", type=int, default=sorted({1, os.cpu_count() or 1}),
+                        help="Intra-op thread counts")
+    parser.add_argument("--inter-op-threads", type=int, default=1)
+    parser.add_argument("--resolutions", nargs="+", type=int, default=[224], help="Square input sizes")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed runs after the cold call")
+    parser.add_argument("--iterations", type=int, default=10, help="Timed runs per configuration")
+    parser.add_argument("--num-classes", type=int, default=38, help="Output classes (PlantVillage has 38)")
+    parser.add_argument("--keras-model-path", default=str(DEFAULT_KERAS_MODEL_PATH))
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Earlier --output file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed fractional drop in images/s or rise in p95 latency")
+    parser.add_argument("--rss-tolerance", type=float, default=0.20, help="Allowed fractional rise in peak RSS")
+    parser.add_argument("--worker", choices=MODELS, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    rows = []
+    for model in args.models:
+        for threads in args.threads:
+            rows.extend(run_model(args, model, threads))
+            if 'skipped' in rows[-1]:
+                # The framework is missing; other thread counts would be skipped too
+                break
+
+    report = {
+        'cpu_count': os.cpu_count(),
+        'inter_op_threads': args.inter_op_threads,
+        'warmup': args.warmup,
+        'iterations': args.iterations,
+        'num_classes': args.num_classes,
+        'rows': rows,
+    }
+    print_table(rows)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['regressions'] = check_regressions(rows, baseline, args.tolerance, args.rss_tolerance)
+        for regression in report['regressions']:
+            print(f"REGRESSION {'/'.join(map(str, regression['key']))}: "
+                  f"{regression['metric']} worse by {100.0 * regression['worse_by']:.1f}%")
+        if report['regressions']:
+            exit_code = 1
+        else:
+            print(f"No regressions beyond {100.0 * args.tolerance:.0f}% against {args.baseline}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=4)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark API cold start: import time, startup, readiness and time to first prediction.
+
+Every run starts a fresh interpreter that imports api/main.py, runs the app's
+startup handlers in-process and immediately sends one /predict request while
+polling /ready. Embedded SQLite storage in a temporary directory stands in for
+MongoDB. Each model backend is measured with the model loaded in the
+background (MODEL_LOAD_IN_BACKGROUND=True, the default) and during startup.
+The timeline is measured from process launch:
+
+- ``interpreter``: until the worker's first line runs
+- ``import``: ``import main``, plus which ML frameworks it loaded
+- ``startup``: until the startup handlers return and requests would be accepted
+- ``ready``: until /ready answers 200
+- ``first_prediction``: until the first /predict response
+
+The torch backend serves a randomly initialised ResNet50 checkpoint written to
+the temporary directory, so nothing is downloaded.
+
+    python benchmarks/bench_startup.py --backends dummy torch --runs 3 --output bench_startup.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Puts the project root and api/ on the Python path
+from _common import project_root
+
+FRAMEWORKS = ("torch", "torchvision", "tensorflow", "onnxruntime")
+STAGES = ("interpreter", "import", "startup", "ready", "first_prediction")
+
+
+def run_worker(launched_at: float):
+    interpreter = time.time() - launched_at
+    started = time.perf_counter()
+    from main import app
+    imported = time.perf_counter()
+    frameworks = [name for name in FRAMEWORKS if name in sys.modules]
+
+    import httpx
+    from PIL import Image
+    from app.core.auth import get_current_active_user
+    from app.schemas.user import User
+
+    app.dependency_overrides[get_current_active_user] = lambda: User(
+        id="u1", username="grower", email="grower@example.com", hashed_password="x"
+    )
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), "green").save(buffer, "JPEG")
+    image = buffer.getvalue()
+
+    async def first_prediction(client) -> float:
+        response = await client.post("/api/v1/predict", files={"file": ("leaf.jpg", image, "image/jpeg")})
+        response.raise_for_status()
+        return time.perf_counter()
+
+    async def ready(client) -> float:
+        while (await client.get("/ready")).status_code != 200:
+            # Much tighter polling competes with the model load for the GIL
+            await asyncio.sleep(0.05)
+        return time.perf_counter()
+
+    async def run():
+        async with app.router.lifespan_context(app):
+            startup = time.perf_counter()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                predicted, became_ready = await asyncio.gather(first_prediction(client), ready(client))
+        return startup, became_ready, predicted
+
+    startup, became_ready, predicted = asyncio.run(run())
+    # Each stage is cumulative from launch
+    print(json.dumps({
+        "interpreter": interpreter,
+        "import": interpreter + imported - started,
+        "startup": interpreter + startup - started,
+        "ready": interpreter + became_ready - started,
+        "first_prediction": interpreter + predicted - started,
+        "frameworks_loaded_at_import": frameworks,
+    }))
+
+
+def write_torch_checkpoint(workdir: Path, num_classes: int) -> dict:
+    """A randomly initialised checkpoint and class mapping in the layout train.py writes."""
+    import torch
+    from models.model import PlantDiseaseModel
+
+    checkpoint_path = workdir / "best_model.pth"
+    class_mapping_path = workdir / "class_mapping.json"
+    model = PlantDiseaseModel(num_classes=num_classes, pretrained=False)
+    torch.save({"model_state_dict": model.state_dict()}, checkpoint_path)
+    class_mapping_path.write_text(json.dumps({str(i): f"Plant___class_{i}" for i in range(num_classes)}))
+    return {"MODEL_CHECKPOINT_PATH": str(checkpoint_path), "MODEL_CLASS_MAPPING_PATH": str(class_mapping_path)}
+
+
+def run_once(env: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, __file__, "--worker", repr(time.time())],
+        cwd=project_root / "api", env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    # Libraries may print to stdout too; the worker's JSON is the last line
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API import, startup and time to first prediction")
+    parser.add_argument("--backends", nargs="+", default=["dummy", "torch"], choices=["dummy", "torch", "onnx"])
+    parser.add_argument("--modes", nargs="+", default=["background", "blocking"], choices=["background", "blocking"],
+                        help="Load the model after startup (background) or during it (blocking)")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per configuration; medians are reported")
+    parser.add_argument("--num-classes", type=int, default=38, help="Classes of the generated torch checkpoint")
+    parser.add_argument("--onnx-model", help="ONNX model for the onnx backend (with --class-mapping)")
+    parser.add_argument("--class-mapping", help="class_mapping.json for --onnx-model")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(float(args.worker))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as tmp:
+        workdir = Path(tmp)
+        base_env = dict(
+            os.environ,
+            PYTHONPATH=str(project_root),
+            STORAGE_BACKEND="sqlite",
+            JOBS_SQLITE_PATH=str(workdir / "jobs.db"),
+            JOBS_DATA_DIR=str(workdir / "jobs"),
+            PREDICTION_CACHE_ENABLED="false",
+        )
+        for backend in args.backends:
+            backend_env = {"MODEL_BACKEND": backend}
+            if backend == "torch":
+                backend_env.update(write_torch_checkpoint(workdir, args.num_classes))
+            elif backend == "onnx":
+                if not (args.onnx_model and args.class_mapping):
+                    print("Skipping onnx: pass --onnx-model and --class-mapping")
+                    continue
+                backend_env.update(ONNX_MODEL_PATH=args.onnx_model, MODEL_CLASS_MAPPING_PATH=args.class_mapping)
+
+            for mode in args.modes:
+                runs = []
+                for i in range(args.runs):
+                    env = dict(base_env, **backend_env, MODEL_LOAD_IN_BACKGROUND=str(mode == "background"),
+                               SQLITE_PATH=str(workdir / f"{backend}_{mode}_{i}.db"))
+                    runs.append(run_once(env))
+                results.append({
+                    "backend": backend,
+                    "mode": mode,
+                    **{stage: statistics.median(run[stage] for run in runs) for stage in STAGES},
+                    "frameworks_loaded_at_import": runs[0]["frameworks_loaded_at_import"],
+                    "runs": runs,
+                })
+
+    print(f"Seconds from process launch, median of {args.runs} runs")
+    print(f"{'backend':<8}{'mode':<12}{'interp':>8}{'import':>8}{'startup':>9}{'ready':>8}{'first pred':>12}"
+          f"  frameworks at import")
+    for r in results:
+        print(f"{r['backend']:<8}{r['mode']:<12}{r['interpreter']:>8.2f}{r['import']:>8.2f}{r['startup']:>9.2f}"
+              f"{r['ready']:>8.2f}{r['first_prediction']:>12.2f}  {', '.join(r['frameworks_loaded_at_import']) or '-'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": args.runs, "results": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,8 @@ import axios from 'axios';
 import { useAuth } from '../contexts/AuthContext';
 
 interface Disease {
+  id: string;
+  crop: string;
   name: string;
   description: string;
   symptoms: string[];
@@ -72,10 +74,15 @@ const Diseases: React.FC = () => {
 
       <Grid container spacing={3}>
         {diseases.map((disease) => (
-          <Grid item xs={12} key={disease.name}>
+          <Grid item xs={12} key={disease.id}>
             <Accordion>
               <AccordionSummary expandIcon={<ExpandMoreIcon />}>
-                <Typography variant="h6">{disease.name}</Typography>
+                <Typography variant="h6">
+                  {disease.name}{' '}
+                  <Typography component="span" color="text.secondary" sx={{ textTransform: 'capitalize' }}>
+                    ({disease.crop})
+                  </Typography>
+                </Typography>
               </AccordionSummary>
               <AccordionDetails>
                 <Typography paragraph>
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import {
   Box,
+  Button,
   Card,
   CardContent,
   Grid,
@@ -24,19 +25,27 @@ interface Prediction {
 
 const PredictionHistory: React.FC = () => {
   const [predictions, setPredictions] = useState<Prediction[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
   const { token } = useAuth();
 
+  const fetchPage = async (cursor?: string) => {
+    const response = await axios.get('http://localhost:8001/api/v1/predictions/history', {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      },
+      params: cursor ? { cursor } : {}
+    });
+    setNextCursor(response.data.next_cursor ?? null);
+    return response.data.predictions as Prediction[];
+  };
+
   useEffect(() => {
     const fetchPredictions = async () => {
       try {
-        const response = await axios.get('http://localhost:8001/api/v1/predictions/history', {
-          headers: {
-            'Authorization': `Bearer ${token}`
-          }
-        });
-        setPredictions(response.data.predictions);
+        setPredictions(await fetchPage());
         setError('');
       } catch (err) {
         console.error('Error fetching prediction history:', err);
@@ -47,8 +56,23 @@ const PredictionHistory: React.FC = () => {
     };
 
     fetchPredictions();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [token]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      setPredictions((current) => [...current, ...page]);
+    } catch (err) {
+      console.error('Error fetching prediction history:', err);
+      setError('Failed to load more predictions. Please try again later.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <Container sx={{ display: 'flex', justifyContent: 'center', mt: 4 }}>
@@ -105,6 +129,14 @@ const PredictionHistory: React.FC = () => {
           ))}
         </Grid>
       )}
+
+      {nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 4 }}>
+          <Button variant="outlined" onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </Button>
+        </Box>
+      )}
     </Container>
   );
 };
@@ -4,6 +4,7 @@ from torch.utils.data import Dataset, DataLoader
 from torchvision import transforms
 from PIL import Image
 import json
+from models.inference.preprocessing import open_image
 
 class PlantDiseaseDataset(Dataset):
     def __init__(self, root_dir, transform=None):
@@ -119,12 +120,14 @@ def create_data_loaders(data_dir, batch_size=32, num_workers=4):
     
     return train_loader, valid_loader, test_loader, train_dataset.classes
 
-def process_single_image(image_path, transform=None):
+def process_single_image(image_path, transform=None, fast_decode=True, image_size=(224, 224)):
     """
     Process a single image for prediction
     Args:
         image_path (string): Path to the image file
         transform (callable, optional): Transform to be applied on the image
+        fast_decode (bool): Decode JPEGs at reduced resolution close to image_size
+        image_size (tuple): Size the transform resizes to
     Returns:
         tensor: Processed image tensor
     """
@@ -132,7 +135,7 @@ def process_single_image(image_path, transform=None):
         _, val_transform = get_data_transforms()
         transform = val_transform
     
-    image = Image.open(image_path).convert('RGB')
+    image = open_image(image_path, image_size, fast_decode)
     return transform(image).unsqueeze(0)
 
 def get_class_mapping(dataset_classes):
@@ -0,0 +1,147 @@
+import os
+import json
+import inspect
+import torch
+import torch.nn as nn
+import numpy as np
+from typing import Sequence, Tuple
+from models.model import PlantDiseaseModel
+
+class ProbabilityModel(nn.Module):
+    """Wraps the classifier so the exported graph returns softmax probabilities"""
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return torch.softmax(self.model(x), dim=1)
+
+def export_to_onnx(
+    model: nn.Module,
+    output_path: str,
+    image_size: Tuple[int, int] = (224, 224),
+    opset_version: int = 17
+) -> str:
+    """
+    Export a classifier to ONNX with a dynamic batch axis
+    Args:
+        model: Trained PlantDiseaseModel in eval mode
+        output_path: Where to write the ``.onnx`` file
+        image_size: Model input size
+        opset_version: ONNX opset to target
+    Returns:
+        Path of the exported graph
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    wrapped = ProbabilityModel(model).eval()
+    dummy_input = torch.randn(1, 3, *image_size)
+    options = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        # Recent torch defaults to the dynamo exporter; keep the TorchScript one, which honours dynamic_axes
+        options['dynamo'] = False
+
+    torch.onnx.export(
+        wrapped,
+        dummy_input,
+        output_path,
+        input_names=['input'],
+        output_names=['probabilities'],
+        dynamic_axes={'input': {0: 'batch'}, 'probabilities': {0: 'batch'}},
+        opset_version=opset_version,
+        **options
+    )
+    return output_path
+
+def verify_onnx(
+    model: nn.Module,
+    onnx_path: str,
+    image_size: Tuple[int, int] = (224, 224),
+    batch_sizes: Sequence[int] = (1, 4),
+    atol: float = 1e-4
+) -> float:
+    """
+    Check that ONNX Runtime reproduces the torch outputs
+    Args:
+        model: The model the graph was exported from
+        onnx_path: Path to the exported graph
+        image_size: Model input size
+        batch_sizes: Batch sizes to compare, exercising the dynamic batch axis
+        atol: Maximum allowed absolute difference between probabilities
+    Returns:
+        Largest absolute difference observed
+    """
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    wrapped = ProbabilityModel(model).eval()
+    max_diff = 0.0
+
+    for batch_size in batch_sizes:
+        inputs = torch.randn(batch_size, 3, *image_size)
+        with torch.inference_mode():
+            expected = wrapped(inputs).numpy()
+        actual = session.run(None, {'input': inputs.numpy()})[0]
+
+        if actual.shape != expected.shape:
+            raise ValueError(f"Shape mismatch for batch size {batch_size}: {actual.shape} vs {expected.shape}")
+        max_diff = max(max_diff, float(np.abs(actual - expected).max()))
+
+    if max_diff > atol:
+        raise ValueError(f"ONNX outputs differ from torch by {max_diff:.2e} (tolerance {atol:.0e})")
+    return max_diff
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Export a trained checkpoint to ONNX")
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default="checkpoints/best_model.pth",
+        help="Checkpoint written by train.py"
+    )
+    parser.add_argument(
+        "--class_mapping",
+        type=str,
+        default="checkpoints/class_mapping.json",
+        help="Class mapping written by train.py"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="checkpoints/model.onnx",
+        help="Path of the exported ONNX graph"
+    )
+    parser.add_argument(
+        "--image_size",
+        type=int,
+        default=224,
+        help="Model input size"
+    )
+    parser.add_argument(
+        "--opset",
+        type=int,
+        default=17,
+        help="ONNX opset version"
+    )
+    parser.add_argument(
+        "--atol",
+        type=float,
+        default=1e-4,
+        help="Maximum absolute difference allowed between torch and ONNX outputs"
+    )
+
+    args = parser.parse_args()
+
+    with open(args.class_mapping) as f:
+        num_classes = len(json.load(f))
+
+    print(f"Loading checkpoint: {args.checkpoint}")
+    model = PlantDiseaseModel.from_checkpoint(args.checkpoint, num_classes=num_classes)
+    image_size = (args.image_size, args.image_size)
+
+    print(f"Exporting to {args.output}...")
+    export_to_onnx(model, args.output, image_size, args.opset)
+
+    print("Verifying against torch...")
+    max_diff = verify_onnx(model, args.output, image_size, atol=args.atol)
+    print(f"Max absolute difference: {max_diff:.2e}")
@@ -0,0 +1,197 @@
+"""
+Disease catalogue loaded from ``models/disease_info.json`` (crop -> disease -> details).
+
+The file is read once into an index keyed on (crop, disease). Class names are
+resolved against it on first use and memoised, so per-prediction lookups are a
+dict access. The serialized ``/diseases`` response and its ETag are built at
+load time, along with an inverted index for text search. The file is
+re-checked at most every ``reload_interval`` seconds and reloaded when its
+modification time or size changes; only changed entries are re-indexed.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from models.inference.search import DiseaseIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DISEASE_INFO_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'disease_info.json'
+)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+
+
+def parse_class_name(class_name: str) -> Tuple[str, str]:
+    """
+    Catalogue keys (crop, disease) for a class name.
+
+    PlantVillage names such as ``Corn_(maize)___Common_rust_`` or
+    ``Tomato___Tomato_mosaic_virus`` give ``('corn', 'common_rust')`` and
+    ``('tomato', 'mosaic_virus')``; a name without a crop gives ``('', name)``
+    and matches no entry.
+    """
+    crop, _, disease = class_name.partition('___')
+    if not disease:
+        return '', _slug(crop)
+    crop_key = _slug(re.split(r'[(,]', crop)[0])
+    disease_key = _slug(re.sub(r'\(.*?\)', '', disease))
+    if disease_key.startswith(crop_key + '_'):
+        disease_key = disease_key[len(crop_key) + 1:]
+    return crop_key, disease_key
+
+
+class DiseaseCatalog:
+    """Indexed, reloadable view of the disease information file."""
+
+    def __init__(self, path: str = DEFAULT_DISEASE_INFO_PATH, reload_interval: float = 2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.version = 0
+        self.entries: List[Dict] = []
+        self.payload = b'{"diseases":[]}'
+        self.etag = self._etag(self.payload)
+        self._by_crop: Dict[str, Dict[str, Dict]] = {}
+        self._resolved: Dict[str, Optional[Dict]] = {}
+        self.index = DiseaseIndex()
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    @staticmethod
+    def _etag(payload: bytes) -> str:
+        return '"%s"' % hashlib.sha256(payload).hexdigest()[:32]
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            data = json.loads(f.read())
+
+        entries = []
+        by_crop: Dict[str, Dict[str, Dict]] = {}
+        for crop, diseases in data.items():
+            crop_key = _slug(crop)
+            for disease, info in diseases.items():
+                disease_key = _slug(disease)
+                entry = {
+                    'id': f"{crop_key}/{disease_key}",
+                    'crop': crop_key,
+                    'disease': disease_key,
+                    'name': info.get('name', disease.replace('_', ' ').title()),
+                    'description': info.get('description', ''),
+                    'symptoms': info.get('symptoms', []),
+                    'treatments': info.get('treatments', []),
+                    'preventive_measures': info.get('preventive_measures', []),
+                }
+                entries.append(entry)
+                by_crop.setdefault(crop_key, {})[disease_key] = entry
+
+        payload = json.dumps(
+            {'diseases': [entry for entry in entries if entry['disease'] != 'healthy']},
+            separators=(',', ':'),
+        ).encode()
+
+        # Swap in complete structures so concurrent readers never see a partial load
+        self._by_crop = by_crop
+        self._resolved = {}
+        self.entries = entries
+        self.payload = payload
+        self.etag = self._etag(payload)
+        self.version += 1
+        changes = self.index.sync(entries)
+        logger.debug("Disease search index updated: %s", changes)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the file if it changed; returns True when a new version was loaded."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            if self._signature is None:
+                logger.warning("Disease catalogue %s is not available: %s", self.path, e)
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+
+        with self._lock:
+            if signature == self._signature:
+                return False
+            try:
+                self._load()
+            except (OSError, ValueError) as e:
+                # Possibly caught mid-write; the next check tries again
+                logger.warning("Could not load disease catalogue %s: %s", self.path, e)
+                return False
+            if self._signature is not None:
+                logger.info("Reloaded disease catalogue %s (%d entries)", self.path, len(self.entries))
+            self._signature = signature
+            return True
+
+    def _resolve(self, class_name: str) -> Optional[Dict]:
+        crop_key, disease_key = parse_class_name(class_name)
+        if not crop_key:
+            # Entries are crop-specific advice, so a class with no crop keeps its predictor's own info
+            return None
+        diseases = self._by_crop.get(crop_key, {})
+        if disease_key in diseases:
+            return diseases[disease_key]
+        # Longer labels such as "Cercospora_leaf_spot Gray_leaf_spot" start with the catalogue key
+        for key, entry in diseases.items():
+            if disease_key.startswith(key + '_'):
+                return entry
+        return None
+
+    def lookup(self, class_name: str) -> Optional[Dict]:
+        """Catalogue entry for a model class name, or None if the catalogue has no match."""
+        self.refresh()
+        resolved = self._resolved
+        try:
+            return resolved[class_name]
+        except KeyError:
+            entry = resolved[class_name] = self._resolve(class_name)
+            return entry
+
+    def search(self, query: str, crop: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Full-text search over the catalogue; see ``DiseaseIndex.search``."""
+        self.refresh()
+        return self.index.search(query, crop=_slug(crop) if crop else None, limit=limit)
+
+
+_catalog = None
+_catalog_config = {
+    "path": os.getenv('DISEASE_INFO_PATH', DEFAULT_DISEASE_INFO_PATH),
+    "reload_interval": float(os.getenv('DISEASE_CATALOG_RELOAD_SECONDS', '2')),
+}
+
+def configure_disease_catalog(path: str = DEFAULT_DISEASE_INFO_PATH, reload_interval: float = 2.0):
+    """
+    Select the file and reload interval used by get_disease_catalog().
+    A catalogue that was already loaded is replaced on next access.
+    """
+    global _catalog, _catalog_config
+    config = {"path": path, "reload_interval": reload_interval}
+    if config != _catalog_config:
+        _catalog_config = config
+        _catalog = None
+
+def get_disease_catalog() -> DiseaseCatalog:
+    """
+    Returns a singleton catalogue configured with configure_disease_catalog(), or read
+    from the ``DISEASE_INFO_PATH`` environment variable (default ``models/disease_info.json``).
+    """
+    global _catalog
+    if _catalog is None:
+        _catalog = DiseaseCatalog(**_catalog_config)
+    return _catalog
@@ -0,0 +1,97 @@
+"""
+Helpers shared by the checkpoint-backed predictors (torch, ONNX Runtime).
+
+Kept free of framework imports so each backend only loads its own runtime.
+"""
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.inference.catalog import get_disease_catalog
+from models.inference.timing import observe_stage
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_class_names(class_mapping_path: str) -> List[str]:
+    """Load the ``{index: class_name}`` mapping saved by ``train.py`` as an ordered list."""
+    with open(class_mapping_path) as f:
+        mapping = json.load(f)
+    return [mapping[key] for key in sorted(mapping, key=int)]
+
+
+def describe_class(class_name: str) -> Tuple[str, str]:
+    """Split a PlantVillage class name such as ``Tomato___Late_blight`` into (crop, condition)."""
+    crop, _, condition = class_name.partition('___')
+    if not condition:
+        return '', crop
+    return crop.replace('_', ' ').strip(), condition.replace('_', ' ').strip()
+
+
+def build_disease_info(class_names: List[str]) -> Dict[str, Dict]:
+    """Build the per-class description used when the disease catalogue has no entry."""
+    disease_info = {}
+    for class_name in class_names:
+        crop, condition = describe_class(class_name)
+        if condition.lower() == 'healthy':
+            description = f"The {crop or 'plant'} appears to be healthy."
+        else:
+            description = f"{condition.capitalize()} detected on {crop or 'the plant'}."
+        disease_info[class_name] = {
+            'description': description,
+            'treatments': [],
+            'preventive_measures': []
+        }
+    return disease_info
+
+
+def disease_details(class_name: str, fallback: Optional[Dict] = None) -> Dict:
+    """
+    Response fields describing a class: the catalogue entry, else ``fallback``,
+    else a description built from the class name.
+    """
+    info = get_disease_catalog().lookup(class_name) or fallback or build_disease_info([class_name])[class_name]
+    return {
+        "description": info['description'],
+        "treatment_recommendations": info['treatments'],
+        "preventive_measures": info['preventive_measures']
+    }
+
+
+class ClassifierPredictor:
+    """
+    Response formatting shared by predictors that output class probabilities.
+    Subclasses set ``class_names``/``disease_info`` and implement
+    ``preprocess`` and ``predict_batch``.
+    """
+    class_names: List[str]
+    disease_info: Dict[str, Dict]
+
+    def format_prediction(self, probabilities: np.ndarray) -> Dict:
+        """Build the prediction response for one row of class probabilities."""
+        predicted_idx = int(np.argmax(probabilities))
+        disease_name = self.class_names[predicted_idx]
+
+        return {
+            "disease_name": disease_name,
+            "confidence": float(probabilities[predicted_idx]),
+            **disease_details(disease_name, self.disease_info[disease_name])
+        }
+
+    def predict(self, image_bytes) -> Dict:
+        """Predict disease from image bytes."""
+        sample = self.preprocess(image_bytes)
+        started = time.perf_counter()
+        probabilities = self.predict_batch(sample[np.newaxis])
+        observe_stage('forward', time.perf_counter() - started)
+        return self.format_prediction(probabilities[0])
@@ -0,0 +1,112 @@
+"""
+ONNX Runtime predictor serving graphs written by ``models/export_onnx.py``.
+"""
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import onnxruntime as ort
+
+from models.inference.common import ClassifierPredictor, build_disease_info, file_digest, load_class_names
+from models.inference.preprocessing import preprocess_for_resnet
+
+logger = logging.getLogger(__name__)
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+def create_session(
+    onnx_path: str,
+    graph_optimization_level: str = 'all',
+    intra_op_threads: Optional[int] = None,
+    inter_op_threads: Optional[int] = None,
+) -> ort.InferenceSession:
+    """
+    Create a CPU inference session
+    Args:
+        onnx_path: Path to the exported graph
+        graph_optimization_level: One of ``disable``, ``basic``, ``extended``, ``all``
+        intra_op_threads: Threads used inside an operator (None lets ORT decide)
+        inter_op_threads: Threads used across independent operators (None lets ORT decide)
+    """
+    if graph_optimization_level not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(
+            f"Unknown graph optimization level '{graph_optimization_level}', "
+            f"expected one of {tuple(GRAPH_OPTIMIZATION_LEVELS)}"
+        )
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[graph_optimization_level]
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    if intra_op_threads:
+        options.intra_op_num_threads = intra_op_threads
+    if inter_op_threads:
+        options.inter_op_num_threads = inter_op_threads
+
+    return ort.InferenceSession(onnx_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+
+class OnnxPredictor(ClassifierPredictor):
+    def __init__(
+        self,
+        onnx_path: str,
+        class_mapping_path: str,
+        image_size: Tuple[int, int] = (224, 224),
+        graph_optimization_level: str = 'all',
+        num_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None,
+        warmup_runs: int = 3,
+        warmup_batch_size: int = 1,
+        fast_decode: bool = True,
+    ):
+        """
+        Load an exported graph once and prepare it for CPU inference
+        Args:
+            onnx_path: Path to the exported ``.onnx`` graph
+            class_mapping_path: Path to ``class_mapping.json`` written by ``train.py``
+            image_size: Model input size
+            graph_optimization_level: ORT graph optimisation level
+            num_threads: Intra-op thread count (None lets ORT decide)
+            inter_op_threads: Inter-op thread count (None lets ORT decide)
+            warmup_runs: Forward passes to run before serving the first request
+            warmup_batch_size: Batch size used for the warm-up passes
+            fast_decode: Decode JPEGs at reduced resolution close to ``image_size``
+        """
+        self.image_size = tuple(image_size)
+        self.fast_decode = fast_decode
+        self.class_names = load_class_names(class_mapping_path)
+        self.disease_info = build_disease_info(self.class_names)
+        self.model_version = f"onnx-{file_digest(onnx_path)[:12]}"
+
+        self.session = create_session(onnx_path, graph_optimization_level, num_threads, inter_op_threads)
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+        self.warmup(warmup_runs, warmup_batch_size)
+        logger.info(
+            "Loaded %s (%d classes, optimization level %s)",
+            self.model_version, len(self.class_names), graph_optimization_level
+        )
+
+    def warmup(self, runs: int = 3, batch_size: int = 1):
+        """Run dummy forward passes so the first real request is not a cold outlier."""
+        dummy = np.zeros((batch_size, 3, *self.image_size), dtype=np.float32)
+        for _ in range(runs):
+            self.predict_batch(dummy)
+
+    def preprocess(self, image_bytes) -> np.ndarray:
+        """Decode an image into a normalised CHW float32 array."""
+        try:
+            return preprocess_for_resnet(image_bytes, self.image_size, self.fast_decode)
+        except Exception as e:
+            raise ValueError(f"Error processing image: {str(e)}")
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Return class probabilities for a stacked NCHW batch."""
+        inputs = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run([self.output_name], {self.input_name: inputs})[0]
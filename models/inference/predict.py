@@ -1,12 +1,29 @@
 """
 Dummy predictor class for development purposes.
+
+Predictors expose a small batching-friendly interface so the API can group
+concurrent requests into a single forward pass:
+
+- ``preprocess(image_bytes)`` decodes one image into a model input array
+- ``predict_batch(batch)`` returns class probabilities for a stacked batch
+- ``format_prediction(probabilities)`` turns one row into the response dict
+- ``predict(image_bytes)`` chains the three for a single image
+
+``get_predictor()`` returns the backend chosen with ``configure_predictor()``,
+or the one named by the ``MODEL_BACKEND`` environment variable.
 """
 import numpy as np
-from PIL import Image
-import io
+import os
+import time
+from models.inference.common import disease_details
+from models.inference.preprocessing import load_image
+from models.inference.timing import observe_stage
 
 class DummyPredictor:
-    def __init__(self):
+    def __init__(self, image_size=(224, 224), fast_decode=True):
+        self.image_size = image_size
+        self.fast_decode = fast_decode
+        self.model_version = "dummy"
         self.disease_info = {
             'healthy': {
                 'description': 'The plant appears to be healthy.',
@@ -24,33 +41,89 @@ class DummyPredictor:
                 'preventive_measures': ['Maintain good air circulation', 'Avoid high humidity', 'Plant resistant varieties']
             }
         }
+        self.class_names = list(self.disease_info.keys())
 
-    def predict(self, image_bytes):
+    def preprocess(self, image_bytes):
         """
-        Dummy prediction function that returns random results.
+        Decode an image into a float32 HWC array in [0, 1].
         """
         try:
-            # Verify that the image can be opened
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Return random prediction for development
-            diseases = list(self.disease_info.keys())
-            disease_name = np.random.choice(diseases)
-            confidence = float(np.random.uniform(0.6, 0.95))
-            
-            disease_info = self.disease_info[disease_name]
-            
-            return {
-                "disease_name": disease_name,
-                "confidence": confidence,
-                "description": disease_info['description'],
-                "treatment_recommendations": disease_info['treatments'],
-                "preventive_measures": disease_info['preventive_measures']
-            }
+            image = load_image(image_bytes, self.image_size, self.fast_decode)
+            started = time.perf_counter()
+            array = np.asarray(image, dtype=np.float32) / 255.0
+            observe_stage('normalise', time.perf_counter() - started)
+            return array
         except Exception as e:
             raise ValueError(f"Error processing image: {str(e)}")
 
+    def predict_batch(self, batch):
+        """
+        Return random class probabilities for a batch of preprocessed images.
+        """
+        num_samples = len(batch)
+        num_classes = len(self.class_names)
+        chosen = np.random.randint(num_classes, size=num_samples)
+        confidence = np.random.uniform(0.6, 0.95, size=num_samples)
+
+        probabilities = np.repeat(
+            ((1.0 - confidence) / max(num_classes - 1, 1))[:, None], num_classes, axis=1
+        )
+        probabilities[np.arange(num_samples), chosen] = confidence
+        return probabilities.astype(np.float32)
+
+    def format_prediction(self, probabilities):
+        """
+        Build the prediction response for one row of class probabilities.
+        """
+        predicted_idx = int(np.argmax(probabilities))
+        disease_name = self.class_names[predicted_idx]
+
+        return {
+            "disease_name": disease_name,
+            "confidence": float(probabilities[predicted_idx]),
+            **disease_details(disease_name, self.disease_info[disease_name])
+        }
+
+    def predict(self, image_bytes):
+        """
+        Dummy prediction function that returns random results.
+        """
+        sample = self.preprocess(image_bytes)
+        started = time.perf_counter()
+        probabilities = self.predict_batch(sample[np.newaxis])
+        observe_stage('forward', time.perf_counter() - started)
+        return self.format_prediction(probabilities[0])
+
+PREDICTOR_BACKENDS = ("dummy", "torch", "onnx")
+
+def create_predictor(backend="dummy", **options):
+    """
+    Create a predictor for the given backend.
+    Backend modules are imported here so unused frameworks are never loaded.
+    """
+    if backend == "dummy":
+        return DummyPredictor(**options)
+    if backend == "torch":
+        from models.inference.torch_predictor import TorchPredictor
+        return TorchPredictor(**options)
+    if backend == "onnx":
+        from models.inference.onnx_predictor import OnnxPredictor
+        return OnnxPredictor(**options)
+    raise ValueError(f"Unknown predictor backend '{backend}', expected one of {PREDICTOR_BACKENDS}")
+
 _predictor = None
+_predictor_config = {"backend": os.getenv("MODEL_BACKEND", "dummy")}
+
+def configure_predictor(backend="dummy", **options):
+    """
+    Select the backend and options used by get_predictor().
+    A predictor that was already loaded is replaced on next access.
+    """
+    global _predictor, _predictor_config
+    config = {"backend": backend, **options}
+    if config != _predictor_config:
+        _predictor_config = config
+        _predictor = None
 
 def get_predictor():
     """
@@ -58,5 +131,5 @@ def get_predictor():
     """
     global _predictor
     if _predictor is None:
-        _predictor = DummyPredictor()
-    return _predictor 
\ No newline at end of file
+        _predictor = create_predictor(**_predictor_config)
+    return _predictor
@@ -0,0 +1,72 @@
+"""
+Image preprocessing shared by the inference backends.
+
+Mirrors the validation transform in ``models.data_loader`` (resize to the
+model input size, scale to [0, 1], ImageNet normalisation) with NumPy only,
+so serving does not need torchvision.
+"""
+import io
+import time
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+from models.inference.timing import observe_stage
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def open_image(source, image_size: Tuple[int, int] = (224, 224), fast_decode: bool = True) -> Image.Image:
+    """
+    Open an image file or file object as RGB, ready to be resized to ``image_size``.
+
+    With ``fast_decode`` JPEGs are decoded in draft mode: libjpeg scales the DCT
+    blocks by 1/2, 1/4 or 1/8 while decoding, picking the smallest scale that is
+    still at least ``image_size``. A 12 MP phone photo is then decoded at roughly
+    0.2 MP, which cuts decode time and peak memory without visibly changing the
+    final 224x224 input. Other formats are decoded normally.
+    """
+    image = Image.open(source)
+    if fast_decode and image.format == 'JPEG':
+        image.draft('RGB', image_size)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def load_image(image_bytes, image_size: Tuple[int, int] = (224, 224), fast_decode: bool = True) -> Image.Image:
+    """
+    Decode image bytes into an RGB PIL image resized to ``image_size``.
+    """
+    started = time.perf_counter()
+    image = open_image(io.BytesIO(image_bytes), image_size, fast_decode)
+    # Decode now rather than lazily inside resize, so the two stages are timed apart
+    image.load()
+    decoded = time.perf_counter()
+    observe_stage('decode', decoded - started)
+    image = image.resize(image_size, Image.BILINEAR)
+    observe_stage('resize', time.perf_counter() - decoded)
+    return image
+
+
+def to_normalized_chw(image: Image.Image) -> np.ndarray:
+    """
+    Convert an RGB image into a normalised float32 CHW array.
+    """
+    started = time.perf_counter()
+    array = np.asarray(image, dtype=np.float32) / 255.0
+    array = (array - IMAGENET_MEAN) / IMAGENET_STD
+    array = np.ascontiguousarray(array.transpose(2, 0, 1))
+    observe_stage('normalise', time.perf_counter() - started)
+    return array
+
+
+def preprocess_for_resnet(
+    image_bytes, image_size: Tuple[int, int] = (224, 224), fast_decode: bool = True
+) -> np.ndarray:
+    """
+    Decode image bytes into the CHW input expected by ``models.model.PlantDiseaseModel``.
+    """
+    return to_normalized_chw(load_image(image_bytes, image_size, fast_decode))
@@ -0,0 +1,166 @@
+"""
+In-memory inverted index over disease catalogue entries.
+
+Text fields are tokenised (lowercased words, common stop words dropped,
+plurals and -ing endings folded) into postings
+``token -> {entry id: {field: weight}}``. Every query token must match,
+either exactly or as a prefix of an indexed token found by bisecting the
+sorted vocabulary. Entries are ranked by the weight of the fields each query
+token matched in, so a hit in a disease name outranks one in a treatment.
+``sync`` re-indexes only the entries whose content changed.
+"""
+import bisect
+import hashlib
+import json
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+# Weight of a match in each indexed field
+FIELD_WEIGHTS = {
+    'name': 5.0,
+    'symptoms': 3.0,
+    'description': 2.0,
+    'crop': 2.0,
+    'treatments': 1.0,
+    'preventive_measures': 1.0,
+}
+
+# A prefix match counts for this fraction of a whole-word match
+PREFIX_FACTOR = 0.5
+
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from in is it of on or that the to with'.split()
+)
+
+
+def _stem(token: str) -> str:
+    if len(token) > 5 and token.endswith('ing'):
+        return token[:-3]
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith('ves'):
+        return token[:-3] + 'f'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens with stop words removed and plurals and -ing endings folded."""
+    return [_stem(token) for token in re.findall(r'[a-z0-9]+', text.lower()) if token not in STOP_WORDS]
+
+
+def _field_text(value) -> str:
+    return ' '.join(value) if isinstance(value, list) else str(value or '')
+
+
+def _fingerprint(entry: Dict) -> str:
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode()).hexdigest()
+
+
+class DiseaseIndex:
+    """Inverted index over catalogue entries keyed by their ``id``."""
+
+    def __init__(self, entries: Iterable[Dict] = ()):
+        self._entries: Dict[str, Dict] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._postings: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._entry_tokens: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._lock = threading.Lock()
+        self.sync(entries)
+
+    def _add(self, entry: Dict):
+        entry_id = entry['id']
+        tokens = set()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(_field_text(entry.get(field))):
+                fields = self._postings.get(token)
+                if fields is None:
+                    fields = self._postings[token] = {}
+                    bisect.insort(self._vocabulary, token)
+                fields.setdefault(entry_id, {})[field] = weight
+                tokens.add(token)
+        self._entries[entry_id] = entry
+        self._entry_tokens[entry_id] = tokens
+
+    def _remove(self, entry_id: str):
+        for token in self._entry_tokens.pop(entry_id, ()):
+            fields = self._postings[token]
+            fields.pop(entry_id, None)
+            if not fields:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        self._entries.pop(entry_id, None)
+        self._fingerprints.pop(entry_id, None)
+
+    def sync(self, entries: Iterable[Dict]) -> Dict[str, int]:
+        """Bring the index in line with ``entries``, touching only added, changed and removed ones."""
+        entries = {entry['id']: entry for entry in entries}
+        counts = {'added': 0, 'updated': 0, 'removed': 0}
+        with self._lock:
+            for entry_id in [entry_id for entry_id in self._entries if entry_id not in entries]:
+                self._remove(entry_id)
+                counts['removed'] += 1
+            for entry_id, entry in entries.items():
+                fingerprint = _fingerprint(entry)
+                if self._fingerprints.get(entry_id) == fingerprint:
+                    continue
+                counts['updated' if entry_id in self._entries else 'added'] += 1
+                self._remove(entry_id)
+                self._add(entry)
+                self._fingerprints[entry_id] = fingerprint
+        return counts
+
+    def _matches(self, token: str) -> Dict[str, Dict[str, float]]:
+        """Best field weights per entry for one query token, exact or as a prefix."""
+        matches: Dict[str, Dict[str, float]] = {}
+        start = bisect.bisect_left(self._vocabulary, token)
+        for indexed in self._vocabulary[start:]:
+            if not indexed.startswith(token):
+                break
+            factor = 1.0 if indexed == token else PREFIX_FACTOR
+            for entry_id, fields in self._postings[indexed].items():
+                best = matches.setdefault(entry_id, {})
+                for field, weight in fields.items():
+                    best[field] = max(best.get(field, 0.0), weight * factor)
+        return matches
+
+    def search(self, query: str, crop: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Entries matching every query token, best first, as ``{entry, score, matched_fields}``."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            scores: Optional[Dict[str, float]] = None
+            fields: Dict[str, Set[str]] = {}
+            for token in tokens:
+                matches = self._matches(token)
+                if crop is not None:
+                    matches = {entry_id: m for entry_id, m in matches.items() if self._entries[entry_id]['crop'] == crop}
+                if scores is None:
+                    scores = {entry_id: 0.0 for entry_id in matches}
+                else:
+                    scores = {entry_id: score for entry_id, score in scores.items() if entry_id in matches}
+                for entry_id in scores:
+                    weights = matches[entry_id]
+                    # The best field carries the match; other matched fields add a little
+                    scores[entry_id] += max(weights.values()) + 0.1 * (len(weights) - 1)
+                    fields.setdefault(entry_id, set()).update(weights)
+                if not scores:
+                    return []
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], self._entries[item[0]]['name']))[:limit]
+            return [
+                {
+                    'entry': self._entries[entry_id],
+                    'score': round(score, 3),
+                    'matched_fields': sorted(fields[entry_id], key=lambda field: -FIELD_WEIGHTS[field]),
+                }
+                for entry_id, score in ranked
+            ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,23 @@
+"""
+Stage timing hooks for the inference path.
+
+Predictors report how long decode, resize, normalisation and the forward pass
+take through ``observe_stage``. Nothing is recorded until an observer is
+installed with ``set_stage_observer`` (the API feeds its latency histograms),
+so this module stays free of any metrics dependency and costs one attribute
+check when unused. Observers only see stages run in their own process.
+"""
+from typing import Callable, Optional
+
+_observer: Optional[Callable[[str, float], None]] = None
+
+
+def set_stage_observer(observer: Optional[Callable[[str, float], None]]):
+    """Install ``observer(stage, seconds)``, or remove it with None."""
+    global _observer
+    _observer = observer
+
+
+def observe_stage(stage: str, seconds: float):
+    if _observer is not None:
+        _observer(stage, seconds)
@@ -0,0 +1,75 @@
+"""
+PyTorch predictor serving checkpoints written by ``train.py``.
+"""
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+
+from models.model import PlantDiseaseModel
+from models.inference.common import ClassifierPredictor, build_disease_info, file_digest, load_class_names
+from models.inference.preprocessing import preprocess_for_resnet
+
+logger = logging.getLogger(__name__)
+
+
+class TorchPredictor(ClassifierPredictor):
+    def __init__(
+        self,
+        checkpoint_path: str,
+        class_mapping_path: str,
+        image_size: Tuple[int, int] = (224, 224),
+        num_threads: Optional[int] = None,
+        warmup_runs: int = 3,
+        warmup_batch_size: int = 1,
+        fast_decode: bool = True,
+    ):
+        """
+        Load a trained checkpoint once and prepare it for CPU inference
+        Args:
+            checkpoint_path: Path to ``best_model.pth`` written by the trainer
+            class_mapping_path: Path to ``class_mapping.json`` written by ``train.py``
+            image_size: Model input size
+            num_threads: Intra-op thread count to pin torch to (None keeps the default)
+            warmup_runs: Forward passes to run before serving the first request
+            warmup_batch_size: Batch size used for the warm-up passes
+            fast_decode: Decode JPEGs at reduced resolution close to ``image_size``
+        """
+        self.image_size = tuple(image_size)
+        self.fast_decode = fast_decode
+        self.class_names = load_class_names(class_mapping_path)
+        self.disease_info = build_disease_info(self.class_names)
+        self.model_version = f"torch-{file_digest(checkpoint_path)[:12]}"
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.model = PlantDiseaseModel.from_checkpoint(checkpoint_path, num_classes=len(self.class_names))
+        self.model = self.model.to(memory_format=torch.channels_last)
+
+        self.warmup(warmup_runs, warmup_batch_size)
+        logger.info(
+            "Loaded %s (%d classes, %d threads)",
+            self.model_version, len(self.class_names), torch.get_num_threads()
+        )
+
+    def warmup(self, runs: int = 3, batch_size: int = 1):
+        """Run dummy forward passes so the first real request is not a cold outlier."""
+        dummy = np.zeros((batch_size, 3, *self.image_size), dtype=np.float32)
+        for _ in range(runs):
+            self.predict_batch(dummy)
+
+    def preprocess(self, image_bytes) -> np.ndarray:
+        """Decode an image into a normalised CHW float32 array."""
+        try:
+            return preprocess_for_resnet(image_bytes, self.image_size, self.fast_decode)
+        except Exception as e:
+            raise ValueError(f"Error processing image: {str(e)}")
+
+    def predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Return class probabilities for a stacked NCHW batch."""
+        with torch.inference_mode():
+            inputs = torch.from_numpy(batch).contiguous(memory_format=torch.channels_last)
+            _, probabilities = self.model.predict(inputs)
+        return probabilities.numpy()
@@ -1,6 +1,5 @@
 import torch
 import torch.nn as nn
-import torchvision.models as models
 from typing import Dict, List, Tuple, Optional
 import ssl
 
@@ -14,6 +13,9 @@ class PlantDiseaseModel(nn.Module):
         """
         super().__init__()
         
+        # torchvision adds over a second to import, so defer it until a model is built
+        import torchvision.models as models
+        
         # Disable SSL verification for model download
         ssl._create_default_https_context = ssl._create_unverified_context
         
@@ -96,6 +98,24 @@ class PlantDiseaseModel(nn.Module):
         predictions = torch.argmax(probabilities, dim=1)
         return predictions, probabilities
     
+    @classmethod
+    def from_checkpoint(cls, checkpoint_path: str, num_classes: int) -> 'PlantDiseaseModel':
+        """
+        Load a checkpoint saved by PlantDiseaseTrainer for inference
+        Args:
+            checkpoint_path: Path to a ``.pth`` checkpoint or bare state dict
+            num_classes: Number of classes the checkpoint was trained on
+        Returns:
+            Model in eval mode on CPU
+        """
+        checkpoint = torch.load(checkpoint_path, map_location='cpu')
+        state_dict = checkpoint.get('model_state_dict', checkpoint)
+        
+        model = cls(num_classes=num_classes, pretrained=False)
+        model.load_state_dict(state_dict)
+        model.eval()
+        return model
+    
     def configure_optimizers(self, lr: float = 0.001) -> torch.optim.Optimizer:
         """Configure model optimizer"""
         return torch.optim.Adam(self.parameters(), lr=lr) 
\ No newline at end of file
@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+from typing import Dict, Iterator, Optional
+from torch.utils.data import DataLoader, Subset
+from models.data_loader import PlantDiseaseDataset, get_data_transforms
+
+def _batches(dataset, batch_size: int) -> Iterator:
+    loader = DataLoader(dataset, batch_size=batch_size, shuffle=False, num_workers=0)
+    for images, labels in loader:
+        yield images.numpy(), labels.numpy()
+
+def sample_dataset(dataset, num_samples: int, seed: int = 42):
+    """Pick a reproducible random subset of a dataset"""
+    if num_samples <= 0 or num_samples >= len(dataset):
+        return dataset
+    rng = np.random.default_rng(seed)
+    indices = rng.choice(len(dataset), size=num_samples, replace=False)
+    return Subset(dataset, sorted(indices.tolist()))
+
+def quantize_onnx_model(
+    fp32_path: str,
+    int8_path: str,
+    calibration_dataset,
+    batch_size: int = 16,
+    per_channel: bool = True
+) -> str:
+    """
+    Statically quantize an exported ONNX graph to INT8
+    Args:
+        fp32_path: Float graph written by models/export_onnx.py
+        int8_path: Where to write the quantized graph
+        calibration_dataset: Dataset used to calibrate activation ranges
+        batch_size: Calibration batch size
+        per_channel: Quantize convolution weights per output channel
+    Returns:
+        Path of the quantized graph
+    """
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class DatasetReader(CalibrationDataReader):
+        def __init__(self):
+            self.batches = (images for images, _ in _batches(calibration_dataset, batch_size))
+
+        def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+            images = next(self.batches, None)
+            return None if images is None else {'input': images}
+
+    os.makedirs(os.path.dirname(os.path.abspath(int8_path)), exist_ok=True)
+    prepared_path = int8_path + '.prep.onnx'
+    quant_pre_process(fp32_path, prepared_path)
+
+    try:
+        quantize_static(
+            prepared_path,
+            int8_path,
+            DatasetReader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel
+        )
+    finally:
+        os.remove(prepared_path)
+    return int8_path
+
+def evaluate_onnx_model(onnx_path: str, dataset, batch_size: int = 32, latency_samples: int = 50) -> Dict:
+    """
+    Measure top-1 accuracy, single-image latency and file size of an ONNX graph
+    Args:
+        onnx_path: Graph to evaluate
+        dataset: Labelled dataset (usually the test split)
+        batch_size: Batch size for the accuracy pass
+        latency_samples: Number of single-image runs used for latency
+    Returns:
+        Dictionary of metrics
+    """
+    from models.inference.onnx_predictor import create_session
+
+    session = create_session(onnx_path)
+    input_name = session.get_inputs()[0].name
+
+    correct = 0
+    total = 0
+    for images, labels in _batches(dataset, batch_size):
+        probabilities = session.run(None, {input_name: images})[0]
+        correct += int((probabilities.argmax(axis=1) == labels).sum())
+        total += len(labels)
+
+    sample, _ = dataset[0]
+    sample = sample.numpy()[np.newaxis]
+    for _ in range(3):
+        session.run(None, {input_name: sample})
+    timings = []
+    for _ in range(latency_samples):
+        start = time.perf_counter()
+        session.run(None, {input_name: sample})
+        timings.append((time.perf_counter() - start) * 1000.0)
+
+    return {
+        'path': onnx_path,
+        'size_mb': os.path.getsize(onnx_path) / (1024 * 1024),
+        'top1_accuracy': correct / total if total else 0.0,
+        'num_images': total,
+        'latency_ms_mean': float(np.mean(timings)),
+        'latency_ms_p95': float(np.percentile(timings, 95))
+    }
+
+def format_report(report: Dict) -> str:
+    """Render the side-by-side comparison as a text table"""
+    fp32, int8 = report['fp32'], report['int8']
+    rows = [
+        ('Top-1 accuracy', f"{fp32['top1_accuracy']:.4f}", f"{int8['top1_accuracy']:.4f}"),
+        ('Latency mean (ms)', f"{fp32['latency_ms_mean']:.2f}", f"{int8['latency_ms_mean']:.2f}"),
+        ('Latency p95 (ms)', f"{fp32['latency_ms_p95']:.2f}", f"{int8['latency_ms_p95']:.2f}"),
+        ('Model size (MB)', f"{fp32['size_mb']:.1f}", f"{int8['size_mb']:.1f}"),
+    ]
+    lines = [f"{'':<20}{'FP32':>12}{'INT8':>12}"]
+    lines += [f"{name:<20}{a:>12}{b:>12}" for name, a, b in rows]
+    lines.append(f"Accuracy drop: {report['accuracy_drop']:.4f} (max {report['max_accuracy_drop']:.4f})")
+    lines.append(f"Published: {report['published']}")
+    return '\n'.join(lines)
+
+def quantize_and_gate(
+    fp32_path: str,
+    output_path: str,
+    calibration_dataset,
+    test_dataset,
+    max_accuracy_drop: float = 0.01,
+    batch_size: int = 32,
+    latency_samples: int = 50
+) -> Dict:
+    """
+    Quantize a graph, compare it with the float one and publish it only if the gate passes
+    Args:
+        fp32_path: Float graph written by models/export_onnx.py
+        output_path: Where the INT8 graph is published when it passes the gate
+        calibration_dataset: Dataset used to calibrate activation ranges
+        test_dataset: Labelled dataset both graphs are evaluated on
+        max_accuracy_drop: Largest allowed top-1 drop (absolute, 0.01 = one point)
+        batch_size: Batch size for calibration and evaluation
+        latency_samples: Number of single-image runs used for latency
+    Returns:
+        The report dictionary
+    """
+    candidate_path = output_path + '.candidate'
+    quantize_onnx_model(fp32_path, candidate_path, calibration_dataset, batch_size=batch_size)
+
+    fp32_metrics = evaluate_onnx_model(fp32_path, test_dataset, batch_size, latency_samples)
+    int8_metrics = evaluate_onnx_model(candidate_path, test_dataset, batch_size, latency_samples)
+    accuracy_drop = fp32_metrics['top1_accuracy'] - int8_metrics['top1_accuracy']
+    published = accuracy_drop <= max_accuracy_drop
+
+    if published:
+        shutil.move(candidate_path, output_path)
+        int8_metrics['path'] = output_path
+    else:
+        os.remove(candidate_path)
+        int8_metrics['path'] = None
+
+    return {
+        'fp32': fp32_metrics,
+        'int8': int8_metrics,
+        'calibration_images': len(calibration_dataset),
+        'accuracy_drop': accuracy_drop,
+        'max_accuracy_drop': max_accuracy_drop,
+        'speedup': fp32_metrics['latency_ms_mean'] / int8_metrics['latency_ms_mean'],
+        'size_ratio': int8_metrics['size_mb'] / fp32_metrics['size_mb'],
+        'published': published
+    }
+
+def run_quantization(
+    fp32_path: str,
+    data_dir: str,
+    output_path: str,
+    max_accuracy_drop: float = 0.01,
+    calibration_samples: int = 500,
+    batch_size: int = 32,
+    report_path: Optional[str] = None
+) -> Dict:
+    """
+    Calibrate on the valid split, evaluate on the test split and publish if the gate passes
+    Args:
+        fp32_path: Float graph written by models/export_onnx.py
+        data_dir: Directory with the valid and test splits from prepare_dataset.py
+        output_path: Where the INT8 graph is published when it passes the gate
+        max_accuracy_drop: Largest allowed top-1 drop (absolute, 0.01 = one point)
+        calibration_samples: Number of valid images used for calibration
+        batch_size: Batch size for calibration and evaluation
+        report_path: Optional path for the JSON report
+    Returns:
+        The report dictionary
+    """
+    _, val_transform = get_data_transforms()
+    valid_dataset = PlantDiseaseDataset(os.path.join(data_dir, 'valid'), transform=val_transform)
+    test_dataset = PlantDiseaseDataset(os.path.join(data_dir, 'test'), transform=val_transform)
+
+    calibration_dataset = sample_dataset(valid_dataset, calibration_samples)
+    report = quantize_and_gate(
+        fp32_path,
+        output_path,
+        calibration_dataset,
+        test_dataset,
+        max_accuracy_drop=max_accuracy_drop,
+        batch_size=batch_size
+    )
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=4)
+    return report
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description="Quantize the ONNX classifier to INT8 with an accuracy gate")
+    parser.add_argument(
+        "--onnx_model",
+        type=str,
+        default="checkpoints/model.onnx",
+        help="Float graph written by models/export_onnx.py"
+    )
+    parser.add_argument(
+        "--data_dir",
+        type=str,
+        default="/Users/ravitejakonanki/Downloads/archive/Split_Dataset",
+        help="Directory containing the valid and test folders"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="checkpoints/model.int8.onnx",
+        help="Where to publish the INT8 graph"
+    )
+    parser.add_argument(
+        "--max_accuracy_drop",
+        type=float,
+        default=0.01,
+        help="Largest allowed top-1 accuracy drop (0.01 = one percentage point)"
+    )
+    parser.add_argument(
+        "--calibration_samples",
+        type=int,
+        default=500,
+        help="Number of validation images used for calibration"
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=32,
+        help="Batch size for calibration and evaluation"
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default="checkpoints/quantization_report.json",
+        help="Path of the JSON report"
+    )
+
+    args = parser.parse_args()
+
+    report = run_quantization(
+        args.onnx_model,
+        args.data_dir,
+        args.output,
+        max_accuracy_drop=args.max_accuracy_drop,
+        calibration_samples=args.calibration_samples,
+        batch_size=args.batch_size,
+        report_path=args.report
+    )
+    print(format_report(report))
+    sys.exit(0 if report['published'] else 1)
@@ -100,13 +100,13 @@ class PlantDiseaseTrainer:
             )
         ).batch(batch_size).prefetch(tf.data.AUTOTUNE)
 
-    def build_model(self):
-        """Build the CNN model."""
+    def build_model(self, weights='imagenet'):
+        """Build the CNN model; pass ``weights=None`` for a randomly initialised base (no download)."""
         # Use MobileNetV2 as base model
         base_model = tf.keras.applications.MobileNetV2(
             input_shape=(*self.img_size, 3),
             include_top=False,
-            weights='imagenet'
+            weights=weights
         )
         
         # Freeze the base model
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The API modules import each other as ``app.*``, relative to the api/ folder
+api_root = Path(__file__).resolve().parent.parent / "api"
+sys.path.insert(0, str(api_root))
+sys.path.insert(0, str(api_root.parent))
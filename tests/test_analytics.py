@@ -0,0 +1,53 @@
+import asyncio
+from datetime import datetime
+from app.core.analytics import analytics_pipeline, rollup_updates
+from app.core.database import WriteBehindBuffer
+
+
+def _prediction(disease, confidence, day, hour=12):
+    return {"user_id": "u1", "disease_name": disease, "confidence": confidence,
+            "timestamp": datetime(2026, 3, day, hour)}
+
+
+def test_rollup_updates_group_by_user_disease_and_day():
+    updates = rollup_updates([
+        _prediction("rust", 0.5, 1, 8),
+        _prediction("rust", 0.7, 1, 18),
+        _prediction("healthy", 0.9, 1),
+        _prediction("rust", 0.6, 2),
+    ])
+    by_id = {update._filter["_id"]: update._doc for update in updates}
+
+    assert sorted(by_id) == ["u1|healthy|2026-03-01", "u1|rust|2026-03-01", "u1|rust|2026-03-02"]
+    rust = by_id["u1|rust|2026-03-01"]
+    assert rust["$inc"]["count"] == 2
+    assert abs(rust["$inc"]["confidence_sum"] - 1.2) < 1e-9
+    assert rust["$max"]["last_timestamp"] == datetime(2026, 3, 1, 18)
+    assert rust["$setOnInsert"]["day"] == datetime(2026, 3, 1)
+
+
+def test_analytics_pipeline_reads_only_the_users_rollups():
+    pipeline = analytics_pipeline("u1", "week", start=datetime(2026, 3, 1, 15), disease="rust")
+
+    assert pipeline[0]["$match"] == {"user_id": "u1", "day": {"$gte": datetime(2026, 3, 1)}, "disease_name": "rust"}
+    assert pipeline[1]["$group"]["_id"]["period"]["$dateTrunc"]["startOfWeek"] == "monday"
+
+
+def test_write_behind_reports_written_documents():
+    written = []
+
+    class Collection:
+        async def insert_many(self, docs, ordered=True):
+            pass
+
+    async def on_written(documents):
+        written.extend(documents)
+
+    buffer = WriteBehindBuffer(lambda: Collection(), batch_size=10, flush_interval=60, on_written=on_written)
+
+    async def run():
+        await buffer.put_many([_prediction("rust", 0.5, 1), _prediction("healthy", 0.9, 2)])
+        await buffer.close()
+
+    asyncio.run(run())
+    assert [doc["disease_name"] for doc in written] == ["rust", "healthy"]
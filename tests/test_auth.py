@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core import auth
+from app.core.config import settings
+from app.core.database import db
+from app.core.passwords import PasswordHasher
+from app.schemas.user import User
+
+
+class Users:
+    def __init__(self):
+        self.doc = {"id": "u1", "username": "alice", "email": "alice@example.com",
+                    "full_name": "Alice", "is_active": True, "hashed_password": "x"}
+        self.lookups = 0
+
+    async def find_one(self, query):
+        self.lookups += 1
+        return dict(self.doc) if query.get("username") == self.doc["username"] else None
+
+    async def update_one(self, query, update):
+        self.doc.update(update["$set"])
+
+
+@pytest.fixture
+def users(monkeypatch):
+    users = Users()
+    monkeypatch.setattr(db, "get_db", lambda: {"users": users})
+    for cache in (auth._user_cache, auth._token_cache, auth._revoked_users):
+        cache.clear()
+    return users
+
+
+def test_user_is_cached_and_invalidated_on_update(users):
+    token = auth.create_access_token({"sub": "alice"})
+
+    async def run():
+        first = await auth.get_current_user(token)
+        await auth.get_current_user(token)
+        lookups = users.lookups
+        await auth.update_user("alice", {"full_name": "Alice B"})
+        updated = await auth.get_current_user(token)
+        return first, lookups, updated
+
+    first, lookups, updated = asyncio.run(run())
+    assert first.full_name == "Alice"
+    assert lookups == 1
+    assert updated.full_name == "Alice B"
+
+
+def test_rehash_on_sign_in_invalidates_the_cached_user(users, monkeypatch):
+    users.doc["hashed_password"] = PasswordHasher(rounds=4).context.hash("secret")
+    monkeypatch.setattr(auth, "get_password_hasher", lambda: PasswordHasher(rounds=5))
+    token = auth.create_access_token({"sub": "alice"})
+
+    async def run():
+        await auth.get_current_user(token)
+        signed_in = await auth.authenticate_user("alice", "secret")
+        return signed_in, await auth.get_current_user(token)
+
+    signed_in, cached = asyncio.run(run())
+    assert signed_in.hashed_password.startswith("$2b$05$")
+    assert cached.hashed_password == signed_in.hashed_password
+
+
+def test_trusted_claims_skip_lookup_until_deactivated(users, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    token = auth.create_access_token(auth.user_claims(User(**users.doc)))
+
+    async def run():
+        user = await auth.get_current_user(token)
+        lookups = users.lookups
+        await auth.update_user("alice", {"is_active": False})
+        with pytest.raises(HTTPException):
+            await auth.get_current_user(token)
+        return user, lookups
+
+    user, lookups = asyncio.run(run())
+    assert user.email == "alice@example.com"
+    assert lookups == 0
+
+
+def test_invalid_token_is_rejected(users):
+    with pytest.raises(HTTPException):
+        asyncio.run(auth.get_current_user("not-a-token"))
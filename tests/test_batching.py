@@ -0,0 +1,55 @@
+import asyncio
+import numpy as np
+from app.core.batching import InferenceBatcher
+
+
+def _sum_rows(batch):
+    return batch.reshape(len(batch), -1).sum(axis=1, keepdims=True)
+
+
+def test_concurrent_requests_share_a_batch():
+    batcher = InferenceBatcher(_sum_rows, max_batch_size=4, max_wait_ms=50)
+
+    async def run():
+        samples = [np.full((2, 2), i, dtype=np.float32) for i in range(4)]
+        results = await asyncio.gather(*(batcher.submit(s) for s in samples))
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert [float(r[0]) for r in results] == [0.0, 4.0, 8.0, 12.0]
+
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["samples"] == 4
+    assert stats["batch_size_histogram"] == {"4": 1}
+
+
+def test_partial_batch_flushes_after_max_wait():
+    batcher = InferenceBatcher(_sum_rows, max_batch_size=32, max_wait_ms=5)
+
+    async def run():
+        result = await asyncio.wait_for(batcher.submit(np.ones((2, 2))), timeout=1.0)
+        await batcher.close()
+        return result
+
+    assert float(asyncio.run(run())[0]) == 4.0
+    assert batcher.stats()["mean_batch_size"] == 1.0
+
+
+def test_forward_errors_reach_every_caller():
+    def fail(batch):
+        raise RuntimeError("boom")
+
+    batcher = InferenceBatcher(fail, max_batch_size=2, max_wait_ms=5)
+
+    async def run():
+        results = await asyncio.gather(
+            batcher.submit(np.zeros(1)), batcher.submit(np.zeros(1)), return_exceptions=True
+        )
+        await batcher.close()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.stats()["errors"] == 1
@@ -0,0 +1,72 @@
+import asyncio
+import time
+from app.core.cache import PredictionCache, TTLCache
+from models.inference.common import disease_details
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_prediction_cache_is_invalidated_by_model_change():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    prediction = {"disease_name": "healthy", "confidence": 0.9}
+
+    async def run():
+        await cache.set("abc", "v1", prediction)
+        first = await cache.get("abc", "v1")
+        second = await cache.get("abc", "v2")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == {**prediction, **disease_details("healthy")}
+    assert second is None
+
+    stats = cache.stats()
+    assert stats["local_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["invalidations"] == 1
+    assert stats["entries"] == 0
+
+
+def test_prediction_cache_keeps_class_and_confidence_and_reads_details_from_the_catalogue():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    prediction = {"disease_name": "Tomato___Late_blight", "confidence": 0.8,
+                  "description": "stale", "treatment_recommendations": [], "preventive_measures": []}
+
+    async def run():
+        await cache.set("abc", "v1", prediction)
+        return await cache.get("abc", "v1")
+
+    hit = asyncio.run(run())
+
+    assert cache.local.get("v1:abc") == {"disease_name": "Tomato___Late_blight", "confidence": 0.8}
+    assert hit["description"] == disease_details("Tomato___Late_blight")["description"] != "stale"
+
+
+def test_prediction_cache_keeps_predictor_details_for_classes_missing_from_the_catalogue():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    prediction = {"disease_name": "leaf_blight", "confidence": 0.7, "description": "From the predictor",
+                  "treatment_recommendations": ["Prune"], "preventive_measures": []}
+
+    async def run():
+        await cache.set("abc", "v1", prediction)
+        return await cache.get("abc", "v1")
+
+    assert asyncio.run(run()) == prediction
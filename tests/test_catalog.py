@@ -0,0 +1,112 @@
+import json
+from fastapi.testclient import TestClient
+from app.core.auth import get_current_active_user
+from app.core.config import settings
+from app.schemas.user import User
+from main import app
+from models.inference.catalog import DiseaseCatalog, configure_disease_catalog, get_disease_catalog, parse_class_name
+from models.inference.common import disease_details
+from models.inference.predict import DummyPredictor
+from models.inference.search import DiseaseIndex
+
+
+def test_plantvillage_names_resolve_to_catalogue_entries():
+    catalog = DiseaseCatalog()
+
+    assert parse_class_name("Corn_(maize)___Common_rust_") == ("corn", "common_rust")
+    assert parse_class_name("Tomato___Tomato_mosaic_virus") == ("tomato", "mosaic_virus")
+    assert catalog.lookup("Tomato___Late_blight")["name"] == "Late Blight"
+    assert catalog.lookup("Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot")["id"] == "corn/cercospora_leaf_spot"
+    assert catalog.lookup("Pepper,_bell___healthy")["id"] == "pepper/healthy"
+    # Names without a crop match no entry, even when only one crop has that disease
+    assert catalog.lookup("leaf_blight") is None
+    assert catalog.lookup("powdery_mildew") is None
+
+
+def test_classes_without_a_crop_keep_the_predictor_info():
+    predictor = DummyPredictor()
+
+    details = disease_details("leaf_blight", predictor.disease_info["leaf_blight"])
+
+    assert details["description"] == "A fungal disease that causes brown spots on leaves."
+    assert details["treatment_recommendations"] == predictor.disease_info["leaf_blight"]["treatments"]
+
+
+def test_catalogue_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / "disease_info.json"
+    path.write_text(json.dumps({"tomato": {"late_blight": {"name": "Late Blight"}}}))
+    catalog = DiseaseCatalog(str(path), reload_interval=0)
+    etag = catalog.etag
+
+    path.write_text(json.dumps({"tomato": {"late_blight": {"name": "Late Blight", "description": "Oomycete"}}}))
+    assert catalog.lookup("Tomato___Late_blight")["description"] == "Oomycete"
+    assert catalog.version == 2 and catalog.etag != etag
+
+
+def test_catalogue_file_comes_from_settings(tmp_path):
+    path = tmp_path / "disease_info.json"
+    path.write_text(json.dumps({"tomato": {"late_blight": {"name": "Late Blight", "description": "Custom"}}}))
+    try:
+        configure_disease_catalog(path=str(path), reload_interval=0)
+        catalog = get_disease_catalog()
+    finally:
+        configure_disease_catalog(**settings.catalog_config())
+
+    assert catalog.path == str(path) and catalog.reload_interval == 0
+    assert catalog.lookup("Tomato___Late_blight")["description"] == "Custom"
+    assert get_disease_catalog().path == settings.DISEASE_INFO_PATH
+
+
+def test_diseases_are_served_with_etag_and_304():
+    app.dependency_overrides[get_current_active_user] = lambda: User(
+        id="u1", username="alice", email="alice@example.com", hashed_password="x"
+    )
+    try:
+        client = TestClient(app)
+        response = client.get("/api/v1/diseases")
+        etag = response.headers["etag"]
+        not_modified = client.get("/api/v1/diseases", headers={"If-None-Match": f"W/{etag}"})
+        stale = client.get("/api/v1/diseases", headers={"If-None-Match": '"0"'})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert etag == get_disease_catalog().etag and "max-age" in response.headers["cache-control"]
+    diseases = response.json()["diseases"]
+    assert {"id", "crop", "name", "symptoms", "treatments", "preventive_measures"} <= set(diseases[0])
+    assert all(disease["disease"] != "healthy" for disease in diseases)
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert stale.status_code == 200
+
+
+def test_search_ranks_by_field_and_reindexes_only_changes():
+    entries = [
+        {"id": "tomato/late_blight", "crop": "tomato", "name": "Late Blight", "symptoms": ["Dark lesions"]},
+        {"id": "potato/early_blight", "crop": "potato", "name": "Early Blight", "symptoms": ["Yellowing leaves"]},
+        {"id": "corn/common_rust", "crop": "corn", "name": "Common Rust", "treatments": ["Remove blighted leaves"]},
+    ]
+    index = DiseaseIndex(entries)
+
+    assert [r["entry"]["id"] for r in index.search("blight")] == ["potato/early_blight", "tomato/late_blight",
+                                                                   "corn/common_rust"]
+    assert [r["entry"]["id"] for r in index.search("yellowing leaf")] == ["potato/early_blight"]
+    assert [r["entry"]["id"] for r in index.search("bli", crop="tomato")] == ["tomato/late_blight"]
+    assert index.search("blight rust")[0]["matched_fields"] == ["name", "treatments"]
+
+    changed = [dict(entries[0], symptoms=["Water-soaked spots"]), entries[1]]
+    assert index.sync(changed) == {"added": 0, "updated": 1, "removed": 1}
+    assert index.search("rust") == []
+    assert [r["entry"]["id"] for r in index.search("water soaked")] == ["tomato/late_blight"]
+
+
+def test_search_endpoint_filters_by_crop():
+    app.dependency_overrides[get_current_active_user] = lambda: User(
+        id="u1", username="alice", email="alice@example.com", hashed_password="x"
+    )
+    try:
+        response = TestClient(app).get("/api/v1/diseases/search", params={"q": "powdery", "crop": "squash"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert [result["id"] for result in response.json()["results"]] == ["squash/powdery_mildew"]
@@ -0,0 +1,87 @@
+import asyncio
+import io
+import os
+import threading
+import numpy as np
+import pytest
+from PIL import Image
+from app.core.config import settings
+from app.core.executor import InferenceExecutor, classify_batch, preprocess_image
+from models.inference.predict import configure_predictor
+
+# A non-default size shows the worker was configured from predictor_config
+DUMMY_CONFIG = {"backend": "dummy", "image_size": (32, 32)}
+
+
+@pytest.fixture(autouse=True)
+def restore_predictor():
+    yield
+    configure_predictor(**settings.predictor_config())
+
+
+def _jpeg():
+    image = io.BytesIO()
+    Image.new("RGB", (64, 48), (90, 140, 60)).save(image, "JPEG")
+    return image.getvalue()
+
+
+def _classify(executor):
+    """Start the executor, classify two images on it and report where the work ran."""
+    async def run():
+        await executor.start()
+        samples = await asyncio.gather(*(executor.run(preprocess_image, _jpeg()) for _ in range(2)))
+        predictions = await executor.run(classify_batch, np.stack(samples))
+        thread = await executor.run(threading.get_ident)
+        pid = await executor.run(os.getpid)
+        return samples, predictions, thread, pid
+
+    try:
+        return asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+
+def test_thread_executor_runs_on_its_pool():
+    executor = InferenceExecutor("thread", 2, DUMMY_CONFIG)
+    samples, predictions, thread, pid = _classify(executor)
+
+    assert [sample.shape for sample in samples] == [(32, 32, 3)] * 2
+    assert len(predictions) == 2 and all("disease_name" in p for p in predictions)
+    assert thread != threading.main_thread().ident and pid == os.getpid()
+    assert executor.model_version == "dummy"
+    assert executor.stats()["completed"] == 6 and executor.stats()["active"] == 0
+
+
+def test_inline_executor_runs_on_the_event_loop():
+    executor = InferenceExecutor("inline", 2, DUMMY_CONFIG)
+    samples, predictions, thread, pid = _classify(executor)
+
+    assert [sample.shape for sample in samples] == [(32, 32, 3)] * 2
+    assert len(predictions) == 2
+    assert thread == threading.main_thread().ident and pid == os.getpid()
+
+
+def test_process_executor_loads_the_predictor_in_each_worker():
+    executor = InferenceExecutor("process", 2, DUMMY_CONFIG)
+    samples, predictions, thread, pid = _classify(executor)
+
+    assert [sample.shape for sample in samples] == [(32, 32, 3)] * 2
+    assert len(predictions) == 2 and all("disease_name" in p for p in predictions)
+    assert pid != os.getpid()
+    assert executor.ready and executor.model_version == "dummy"
+
+
+def test_process_executor_reports_a_worker_that_cannot_load_the_model():
+    executor = InferenceExecutor("process", 1, {"backend": "missing"})
+
+    async def run():
+        await executor.start_background()
+        with pytest.raises(RuntimeError, match="Model failed to load"):
+            await executor.run(os.getpid)
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert not executor.ready and executor.load_error
@@ -0,0 +1,46 @@
+import asyncio
+from app.core import indexes
+from app.core.config import settings
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self, names=()):
+        self.indexes = {"_id_": {}, **{name: {} for name in names}}
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def create_indexes(self, models):
+        for model in models:
+            self.indexes[model.document["name"]] = dict(model.document)
+
+    def aggregate(self, pipeline):
+        return FakeCursor([{"name": name, "accesses": {"ops": 0}} for name in self.indexes])
+
+
+def test_ensure_indexes_creates_missing_and_reports(monkeypatch):
+    monkeypatch.setattr(settings, "PREDICTION_RETENTION_DAYS", 30)
+    database = {"users": FakeCollection(["username_unique", "legacy"]), "predictions": FakeCollection(),
+                "prediction_rollups": FakeCollection()}
+
+    async def run():
+        created = await indexes.ensure_indexes(database)
+        report = await indexes.index_report(database)
+        return created, report
+
+    created, report = asyncio.run(run())
+
+    assert created == {"users": ["email_unique"], "predictions": ["user_id_timestamp_id", "timestamp_ttl"],
+                       "prediction_rollups": ["user_id_day"]}
+    assert database["predictions"].indexes["timestamp_ttl"]["expireAfterSeconds"] == 30 * 86400
+    assert report["users"]["missing"] == []
+    assert report["users"]["undeclared"] == ["legacy"]
+    assert "legacy" in report["users"]["unused"]
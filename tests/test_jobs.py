@@ -0,0 +1,150 @@
+import asyncio
+import os
+from datetime import datetime
+import pytest
+from PIL import Image
+from pydantic import ValidationError
+from app.core import jobs
+from app.core.config import Settings
+from app.core.jobs import JobQueue, SQLiteJobStore, QUEUED, RUNNING, DONE, FAILED
+
+
+def _job(job_id, total):
+    now = datetime.utcnow()
+    return {"id": job_id, "user_id": "u1", "status": QUEUED, "total": total,
+            "data_dir": "/tmp", "created_at": now, "updated_at": now}
+
+
+def _items(total):
+    return [{"index": i, "filename": f"{i}.jpg", "path": f"/tmp/{i}.jpg", "member": None} for i in range(total)]
+
+
+def test_sqlite_job_store_resumes_after_lease_expires(tmp_path):
+    path = str(tmp_path / "jobs.db")
+
+    async def first_run():
+        store = SQLiteJobStore(path)
+        await store.setup()
+        await store.create_job(_job("j1", 4), _items(4))
+        job = await store.claim_next_job("w1", 0.2)
+        assert job["id"] == "j1" and job["status"] == RUNNING and job["claimed_by"] == "w1"
+        assert await store.claim_next_job("w2", 60) is None
+
+        items = await store.pending_items("j1", 2)
+        await store.record_results("j1", [
+            {"index": items[0]["index"], "status": DONE, "prediction": {"disease_name": "healthy"}, "error": None},
+            {"index": items[1]["index"], "status": FAILED, "prediction": None, "error": "bad"},
+        ])
+        await store.close()
+
+    async def second_run():
+        store = SQLiteJobStore(path)
+        await store.setup()
+        # w1 died without renewing its lease, so the job can be taken over
+        await asyncio.sleep(0.3)
+        job = await store.claim_next_job("w2", 60)
+        lost = not await store.renew_lease("j1", "w1", 60)
+        pending = await store.pending_items(job["id"], 10)
+        results = await store.list_results("j1", 0, 10)
+        await store.close()
+        return job, lost, pending, results
+
+    asyncio.run(first_run())
+    job, lost, pending, results = asyncio.run(second_run())
+
+    assert job["claimed_by"] == "w2" and lost
+    assert (job["completed"], job["failed"]) == (1, 1)
+    assert [item["index"] for item in pending] == [2, 3]
+    assert [(r["index"], r["status"]) for r in results] == [(0, DONE), (1, FAILED)]
+    assert results[0]["prediction"] == {"disease_name": "healthy"}
+
+
+def test_failing_job_is_retried_then_marked_failed(tmp_path, monkeypatch):
+    calls = []
+
+    async def broken_classifier(uploads):
+        calls.append(len(uploads))
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(jobs, "classify_uploads", broken_classifier)
+
+    async def run():
+        queue = JobQueue(SQLiteJobStore(str(tmp_path / "jobs.db")), str(tmp_path / "files"),
+                         poll_interval=0.01, max_attempts=2)
+        await queue.start()
+        job_id, job_dir = queue.new_job()
+        Image.new("RGB", (32, 32), "green").save(os.path.join(job_dir, "0"), "JPEG")
+        await queue.submit(job_id, "u1", [("leaf.jpg", os.path.join(job_dir, "0"), None)])
+        for _ in range(200):
+            job = await queue.store.get_job(job_id)
+            if job["status"] == FAILED:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return job, job_dir
+
+    job, job_dir = asyncio.run(run())
+
+    assert (job["status"], job["attempts"], job["error"]) == (FAILED, 2, "Error processing job")
+    assert calls == [1, 1]
+    assert not os.path.exists(job_dir)
+
+
+def test_job_released_on_shutdown_resumes_after_any_number_of_restarts(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.db")
+    classified = []
+
+    async def stuck_classifier(uploads):
+        await asyncio.Event().wait()
+
+    async def classifier(uploads):
+        classified.extend(uploads)
+        return [{"disease_name": "healthy", "confidence": 0.9} for _ in uploads]
+
+    async def insert_predictions(docs):
+        pass
+
+    monkeypatch.setattr(jobs.db, "insert_predictions", insert_predictions)
+
+    async def wait_for(queue, job_id, status):
+        for _ in range(200):
+            job = await queue.store.get_job(job_id)
+            if job["status"] == status:
+                return job
+            await asyncio.sleep(0.01)
+        return job
+
+    async def submit():
+        queue = JobQueue(SQLiteJobStore(path), str(tmp_path / "files"), poll_interval=0.01, max_attempts=2)
+        await queue.store.setup()
+        job_id, job_dir = queue.new_job()
+        Image.new("RGB", (32, 32), "green").save(os.path.join(job_dir, "0"), "JPEG")
+        await queue.submit(job_id, "u1", [("leaf.jpg", os.path.join(job_dir, "0"), None)])
+        await queue.store.close()
+        return job_id, job_dir
+
+    async def restart(job_id, status):
+        queue = JobQueue(SQLiteJobStore(path), str(tmp_path / "files"), poll_interval=0.01, max_attempts=2)
+        await queue.start()
+        job = await wait_for(queue, job_id, status)
+        await queue.stop()
+        return job
+
+    job_id, job_dir = asyncio.run(submit())
+    # Each API restart interrupts the job mid-run and releases it
+    monkeypatch.setattr(jobs, "classify_uploads", stuck_classifier)
+    for _ in range(4):
+        assert asyncio.run(restart(job_id, RUNNING))["attempts"] == 1
+
+    monkeypatch.setattr(jobs, "classify_uploads", classifier)
+    job = asyncio.run(restart(job_id, jobs.COMPLETED))
+
+    assert (job["status"], job["completed"], job["attempts"]) == (jobs.COMPLETED, 1, 1)
+    assert len(classified) == 1
+    assert not os.path.exists(job_dir)
+
+
+def test_multi_file_caps_stay_within_the_multipart_parser_limit():
+    with pytest.raises(ValidationError, match="JOBS_MAX_FILES and BATCH_MAX_IMAGES can be at most 1000"):
+        Settings(JOBS_MAX_FILES=5000)
+    assert Settings(JOBS_MAX_IMAGES=50000).JOBS_MAX_FILES == 1000
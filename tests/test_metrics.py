@@ -0,0 +1,50 @@
+import io
+from fastapi.testclient import TestClient
+from PIL import Image
+from app.core.metrics import MetricsRegistry
+from main import app
+from models.inference.preprocessing import load_image
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("stage_seconds", "Stage latency", ("stage",), buckets=(0.01, 0.1))
+    requests = registry.counter("requests", "Requests", ("route",))
+    for value in (0.005, 0.05, 0.5):
+        latency.labels("decode").observe(value)
+    requests.labels('/a"b').inc(2)
+
+    lines = registry.render().splitlines()
+    assert '# TYPE stage_seconds histogram' in lines
+    assert 'stage_seconds_bucket{stage="decode",le="0.01"} 1' in lines
+    assert 'stage_seconds_bucket{stage="decode",le="0.1"} 2' in lines
+    assert 'stage_seconds_bucket{stage="decode",le="+Inf"} 3' in lines
+    assert 'stage_seconds_count{stage="decode"} 3' in lines
+    assert '# TYPE requests_total counter' in lines
+    assert 'requests_total{route="/a\\"b"} 2' in lines
+
+
+def test_metrics_endpoint_reports_routes_and_predictor_stages():
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), "green").save(buffer, "JPEG")
+    load_image(buffer.getvalue())
+
+    client = TestClient(app)
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+    assert 'request_stage_duration_seconds_count{stage="decode"}' in body
+    assert 'request_stage_duration_seconds_count{stage="resize"}' in body
+    assert "inference_queue_depth " in body
+
+
+def test_routes_are_labelled_with_their_full_template():
+    client = TestClient(app)
+    client.get("/api/v1/jobs/abc")
+    body = client.get("/metrics").text
+
+    assert 'http_requests_total{method="GET",route="/api/v1/jobs/{job_id}",status="401"}' in body
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.core.passwords import PasswordHasher
+
+
+def test_hash_is_upgraded_when_rounds_change():
+    old = PasswordHasher(rounds=4)
+    new = PasswordHasher(rounds=5)
+
+    async def run():
+        stored = await old.hash("secret")
+        return (
+            await new.verify_and_update("secret", stored),
+            await new.verify_and_update("wrong", stored),
+            await old.verify_and_update("secret", stored),
+        )
+
+    (verified, new_hash), (wrong, _), (same, no_hash) = asyncio.run(run())
+    assert verified and new_hash.startswith("$2b$05$")
+    assert not wrong
+    assert same and no_hash is None
+    assert new.stats()["rehashed"] == 1
+
+
+def test_saturated_hasher_rejects_with_503():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=1)
+
+    async def run():
+        stored = await hasher.hash("secret")
+        return await asyncio.gather(
+            hasher.verify_and_update("secret", stored),
+            hasher.verify_and_update("secret", stored),
+            return_exceptions=True,
+        )
+
+    first, second = asyncio.run(run())
+    assert first[0] is True
+    assert isinstance(second, HTTPException) and second.status_code == 503
+    hasher.shutdown()
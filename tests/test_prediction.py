@@ -1,12 +1,29 @@
 import pytest
 from fastapi.testclient import TestClient
 from api.main import app
+from app.core.auth import get_current_active_user
+from app.schemas.user import User
+from app.core.config import settings
+from app.core.database import db
+from app.core.storage import SQLiteStorage
+from datetime import datetime, timedelta
+import asyncio
 import io
+import json
+import zipfile
 from PIL import Image
 import numpy as np
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def signed_in_user():
+    app.dependency_overrides[get_current_active_user] = lambda: User(
+        id="u1", username="alice", email="alice@example.com", hashed_password="x"
+    )
+    yield
+    app.dependency_overrides.clear()
+
 @pytest.fixture
 def sample_image():
     # Create a dummy image for testing
@@ -48,4 +65,115 @@ def test_get_supported_diseases():
     assert "description" in disease
     assert "symptoms" in disease
     assert "treatments" in disease
-    assert "preventive_measures" in disease 
\ No newline at end of file
+    assert "preventive_measures" in disease
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    # Three predictions per timestamp so pages must break ties on id
+    storage = SQLiteStorage(str(tmp_path / "store.db"))
+    predictions = [
+        {"id": f"{i:04d}", "user_id": "u1", "filename": f"{i}.jpg", "disease_name": "rust",
+         "confidence": 0.5, "timestamp": datetime(2026, 3, 4, 12) - timedelta(hours=i // 3),
+         "metadata": {"format": "JPEG"}}
+        for i in range(11)
+    ]
+
+    async def fill():
+        await storage.connect()
+        await storage.insert_predictions(predictions)
+
+    asyncio.run(fill())
+    monkeypatch.setattr(db, "storage", storage)
+    yield [p["id"] for p in sorted(predictions, key=lambda p: (p["timestamp"], p["id"]), reverse=True)]
+    asyncio.run(storage.close())
+
+def test_history_pages_follow_next_cursor(history):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/v1/predictions/history", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        pages.append([p["id"] for p in data["predictions"]])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [4, 4, 3]
+    assert [i for page in pages for i in page] == history
+
+def test_history_page_size_is_clamped(history, monkeypatch):
+    monkeypatch.setattr(settings, "HISTORY_MAX_PAGE_SIZE", 5)
+    data = client.get("/api/v1/predictions/history", params={"limit": 1000}).json()
+    assert [p["id"] for p in data["predictions"]] == history[:5]
+    assert data["next_cursor"] is not None
+    assert client.get("/api/v1/predictions/history", params={"limit": 0}).status_code == 422
+
+def test_history_rejects_malformed_cursor(history):
+    for cursor in ("not-base64!", "bm90LWpzb24=", "WzFd"):
+        response = client.get("/api/v1/predictions/history", params={"cursor": cursor})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+@pytest.fixture
+def saved_predictions(monkeypatch):
+    saved = []
+
+    async def save_predictions(documents):
+        saved.extend(documents)
+
+    monkeypatch.setattr(db, "save_predictions", save_predictions)
+    return saved
+
+def _zip(members):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        for name, data in members.items():
+            z.writestr(name, data)
+    return archive.getvalue()
+
+def _batch(files):
+    response = client.post("/api/v1/predict/batch", files=files)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_batch_streams_one_line_per_file(sample_image, saved_predictions):
+    lines = _batch([
+        ("files", ("a.png", sample_image, "image/png")),
+        ("files", ("notes.txt", b"test content", "text/plain")),
+        ("files", ("b.png", sample_image, "image/png")),
+    ])
+
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    by_name = {line["filename"]: line for line in lines}
+    assert by_name["notes.txt"]["error"] == "File must be an image"
+    assert "disease_name" in by_name["a.png"]["prediction"]
+    assert "disease_name" in by_name["b.png"]["prediction"]
+    assert sorted(doc["filename"] for doc in saved_predictions) == ["a.png", "b.png"]
+
+def test_batch_reads_zip_members_and_reports_bad_ones(sample_image, saved_predictions):
+    archive = _zip({
+        "leaves/a.png": sample_image,
+        "leaves/broken.jpg": b"not an image",
+        "README.txt": b"skipped",
+        "leaves/b.png": sample_image,
+    })
+    lines = _batch([("files", ("leaves.zip", archive, "application/zip"))])
+
+    by_name = {line["filename"]: line for line in lines}
+    assert sorted(by_name) == ["leaves/a.png", "leaves/b.png", "leaves/broken.jpg"]
+    assert "error" in by_name["leaves/broken.jpg"]
+    assert "prediction" in by_name["leaves/a.png"] and "prediction" in by_name["leaves/b.png"]
+    assert len(saved_predictions) == 2
+
+def test_batch_image_cap(sample_image, monkeypatch, saved_predictions):
+    monkeypatch.setattr(settings, "BATCH_MAX_IMAGES", 2)
+    files = [("files", (f"{i}.png", sample_image, "image/png")) for i in range(3)]
+    archive = _zip({f"{i}.png": sample_image for i in range(3)})
+
+    for request_files in (files, [("files", ("leaves.zip", archive, "application/zip"))]):
+        response = client.post("/api/v1/predict/batch", files=request_files)
+        assert response.status_code == 413
+        assert response.json()["detail"] == "At most 2 images per batch"
+    assert saved_predictions == []
@@ -0,0 +1,64 @@
+import io
+import json
+import numpy as np
+import torch
+from PIL import Image
+from models.model import PlantDiseaseModel
+from models.export_onnx import export_to_onnx
+from models.inference.onnx_predictor import OnnxPredictor
+from models.inference.torch_predictor import TorchPredictor
+
+IMAGE_SIZE = (32, 32)
+CLASSES = ["Tomato___Late_blight", "Tomato___healthy", "Potato___Early_blight"]
+
+
+def _save_tiny_checkpoint(tmp_path):
+    torch.manual_seed(0)
+    model = PlantDiseaseModel(num_classes=len(CLASSES), pretrained=False).eval()
+    torch.save({"model_state_dict": model.state_dict()}, tmp_path / "best_model.pth")
+    with open(tmp_path / "class_mapping.json", "w") as f:
+        json.dump({str(i): name for i, name in enumerate(CLASSES)}, f)
+    return model
+
+
+def _jpeg():
+    image = io.BytesIO()
+    Image.new("RGB", (64, 48), (90, 140, 60)).save(image, "JPEG")
+    return image.getvalue()
+
+
+def test_torch_predictor_serves_a_trainer_checkpoint(tmp_path):
+    model = _save_tiny_checkpoint(tmp_path)
+    predictor = TorchPredictor(str(tmp_path / "best_model.pth"), str(tmp_path / "class_mapping.json"),
+                               image_size=IMAGE_SIZE, warmup_runs=1, warmup_batch_size=2)
+
+    batch = np.random.default_rng(0).standard_normal((4, 3, *IMAGE_SIZE), dtype=np.float32)
+    with torch.no_grad():
+        expected = torch.softmax(model(torch.from_numpy(batch)), dim=1).numpy()
+    np.testing.assert_allclose(predictor.predict_batch(batch), expected, atol=1e-5)
+
+    prediction = predictor.predict(_jpeg())
+    assert prediction["disease_name"] in CLASSES
+    assert 0.0 < prediction["confidence"] <= 1.0
+
+
+def test_onnx_predictor_agrees_with_torch_at_any_batch_size(tmp_path):
+    model = _save_tiny_checkpoint(tmp_path)
+    onnx_path = export_to_onnx(model, str(tmp_path / "model.onnx"), image_size=IMAGE_SIZE)
+    torch_predictor = TorchPredictor(str(tmp_path / "best_model.pth"), str(tmp_path / "class_mapping.json"),
+                                     image_size=IMAGE_SIZE, warmup_runs=0)
+    onnx_predictor = OnnxPredictor(onnx_path, str(tmp_path / "class_mapping.json"),
+                                   image_size=IMAGE_SIZE, warmup_runs=0)
+
+    # The graph was exported with batch size 1; the dynamic axis lets other sizes run
+    for batch_size in (1, 5):
+        batch = np.random.default_rng(batch_size).standard_normal((batch_size, 3, *IMAGE_SIZE), dtype=np.float32)
+        expected = torch_predictor.predict_batch(batch)
+        actual = onnx_predictor.predict_batch(batch)
+        assert actual.shape == expected.shape == (batch_size, len(CLASSES))
+        np.testing.assert_allclose(actual, expected, atol=1e-4)
+
+    from_torch = torch_predictor.predict(_jpeg())
+    from_onnx = onnx_predictor.predict(_jpeg())
+    assert from_onnx["disease_name"] == from_torch["disease_name"]
+    assert abs(from_onnx["confidence"] - from_torch["confidence"]) < 1e-4
@@ -0,0 +1,54 @@
+import asyncio
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, RequestProfiler, folded
+from main import app
+
+
+def _spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiles_capture_awaits_and_worker_threads():
+    slow = FastAPI()
+
+    @slow.get("/slow")
+    async def slow_endpoint():
+        await asyncio.to_thread(_spin, 0.05)
+        await asyncio.sleep(0.03)
+        return {}
+
+    profiler = RequestProfiler(interval=0.002, buffer_size=2)
+    client = TestClient(ProfilingMiddleware(slow, profiler, admin_token="secret"))
+    responses = [client.get("/slow", headers={"X-Profile-Token": "secret"}) for _ in range(3)]
+    unprofiled = client.get("/slow", headers={"X-Profile-Token": "wrong"})
+
+    # Only the two newest profiles are kept
+    assert [p["id"] for p in profiler.list()] == [r.headers["x-profile-id"] for r in responses[:0:-1]]
+    assert "x-profile-id" not in unprofiled.headers
+    profile = profiler.get(responses[-1].headers["x-profile-id"])
+    assert profile["route"] == "/slow" and profile["trigger"] == "header" and profile["samples"] >= 3
+    stacks = folded(profile)
+    assert any(line.startswith("[request];") and "slow_endpoint" in line and "[await Future]" in line
+               for line in stacks.splitlines())
+    assert any(line.startswith("[asyncio_") and "_spin (" in line for line in stacks.splitlines())
+
+
+def test_admin_profile_endpoints_require_the_token(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ADMIN_TOKEN", "secret")
+    client = TestClient(ProfilingMiddleware(app, admin_token="secret"))
+    profile_id = client.get("/health", headers={"X-Profile-Token": "secret"}).headers["x-profile-id"]
+
+    forbidden = client.get("/admin/profiles", headers={"X-Profile-Token": "wrong"})
+    listing = client.get("/admin/profiles", headers={"X-Profile-Token": "secret"})
+    download = client.get(f"/admin/profiles/{profile_id}", headers={"X-Profile-Token": "secret"})
+
+    assert forbidden.status_code == 403
+    assert listing.json()["profiles"][0]["id"] == profile_id
+    assert listing.json()["profiles"][0]["route"] == "/health"
+    assert download.status_code == 200 and download.headers["content-type"].startswith("text/plain")
+    assert "x-profile-id" not in listing.headers
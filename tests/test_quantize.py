@@ -0,0 +1,38 @@
+import os
+import torch
+import torch.nn as nn
+from torch.utils.data import TensorDataset
+from models.export_onnx import export_to_onnx
+from models.quantize import quantize_and_gate
+
+
+def _dataset(num_images, scale):
+    # The label is the channel with the brightest pixels
+    labels = torch.arange(num_images) % 3
+    images = torch.rand(num_images, 3, 8, 8) * 0.1 * scale
+    images[torch.arange(num_images), labels] += 0.9 * scale
+    return TensorDataset(images, labels)
+
+
+def _export_tiny_classifier(path):
+    model = nn.Sequential(nn.Conv2d(3, 3, 1, bias=False), nn.AdaptiveAvgPool2d(1), nn.Flatten())
+    with torch.no_grad():
+        model[0].weight.copy_(torch.eye(3).view(3, 3, 1, 1) * 10)
+    return export_to_onnx(model.eval(), str(path), image_size=(8, 8))
+
+
+def test_int8_model_is_published_only_within_the_accuracy_gate(tmp_path):
+    fp32_path = _export_tiny_classifier(tmp_path / "model.onnx")
+    test_dataset = _dataset(60, scale=1.0)
+
+    good = quantize_and_gate(fp32_path, str(tmp_path / "good.int8.onnx"), _dataset(30, scale=1.0), test_dataset,
+                             max_accuracy_drop=0.01, batch_size=10, latency_samples=2)
+    # Calibrating on much darker images clips real inputs, so the classes become indistinguishable
+    bad = quantize_and_gate(fp32_path, str(tmp_path / "bad.int8.onnx"), _dataset(30, scale=0.001), test_dataset,
+                            max_accuracy_drop=0.01, batch_size=10, latency_samples=2)
+
+    assert good["fp32"]["top1_accuracy"] == 1.0
+    assert good["published"] and os.path.exists(tmp_path / "good.int8.onnx")
+    assert bad["accuracy_drop"] > 0.01
+    assert not bad["published"] and bad["int8"]["path"] is None
+    assert not os.path.exists(tmp_path / "bad.int8.onnx") and not os.path.exists(tmp_path / "bad.int8.onnx.candidate")
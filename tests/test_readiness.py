@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from app.core.database import PoolMonitor
+from main import app
+
+
+def test_pool_monitor_tracks_checked_out_connections():
+    monitor = PoolMonitor()
+    monitor.connection_created(None)
+    monitor.connection_created(None)
+    monitor.connection_check_out_started(None)
+    monitor.connection_checked_out(None)
+    monitor.connection_check_out_started(None)
+    monitor.connection_check_out_failed(None)
+
+    stats = monitor.stats()
+    assert (stats["open"], stats["checked_out"], stats["waiting"]) == (2, 1, 0)
+    assert stats["checkout_failures"] == 1
+
+    monitor.connection_checked_in(None)
+    monitor.connection_closed(None)
+    assert (monitor.stats()["open"], monitor.stats()["checked_out"]) == (1, 0)
+
+
+def test_not_ready_before_startup():
+    response = TestClient(app).get("/ready")
+
+    assert response.status_code == 503
+    body = response.json()
+    assert body["status"] == "not_ready"
+    assert body["model"]["loaded"] is False
+    assert body["database"]["ok"] is False
+    assert "queue_depth" in body["inference"]
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+from app.core.config import settings
+from app.core.executor import InferenceExecutor
+from models.inference.predict import configure_predictor
+
+project_root = Path(__file__).resolve().parent.parent
+
+
+def test_importing_the_api_loads_no_ml_framework():
+    code = (
+        "import sys; import main, app.models.inference; "
+        "print(sorted({'torch', 'torchvision', 'tensorflow', 'onnxruntime'} & set(sys.modules)))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=project_root / "api", capture_output=True, text=True, check=True,
+        env=dict(os.environ, PYTHONPATH=str(project_root)),
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_background_load_gates_readiness_and_queues_work():
+    executor = InferenceExecutor("thread", 1, {"backend": "dummy"})
+    broken = InferenceExecutor("thread", 1, {"backend": "missing"})
+
+    async def run():
+        executor.start_background()
+        before = (executor.ready, executor.loading)
+        version = await executor.get_model_version()
+        broken.start_background()
+        try:
+            await broken.run(len, "x")
+        except RuntimeError as e:
+            error = str(e)
+        return before, version, error
+
+    try:
+        before, version, error = asyncio.run(run())
+    finally:
+        executor.shutdown()
+        broken.shutdown()
+        configure_predictor(**settings.predictor_config())
+
+    assert before == (False, True)
+    assert version == "dummy" and executor.ready and executor.load_seconds is not None
+    assert not broken.ready and error.startswith("Model failed to load: Unknown predictor backend")
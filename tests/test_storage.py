@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from pydantic import ValidationError
+from app.core.config import Settings
+from app.core.storage import SQLiteStorage
+
+
+def _prediction(i, disease="rust", timestamp=datetime(2026, 3, 4, 12)):
+    return {"id": f"{i:04d}", "user_id": "u1", "filename": f"{i}.jpg", "disease_name": disease,
+            "confidence": 0.5, "timestamp": timestamp, "metadata": {"format": "JPEG"}}
+
+
+def test_users_round_trip(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "store.db"))
+
+    async def run():
+        await storage.connect()
+        await storage.create_user({"id": "u1", "username": "alice", "email": "alice@example.com",
+                                   "full_name": None, "is_active": True, "hashed_password": "x"})
+        updated = await storage.update_user("alice", {"is_active": False})
+        by_email = await storage.find_user_by_email("alice@example.com")
+        missing = await storage.find_user("bob")
+        await storage.close()
+        return updated, by_email, missing
+
+    updated, by_email, missing = asyncio.run(run())
+    assert updated["is_active"] is False
+    assert by_email["username"] == "alice"
+    assert missing is None
+
+
+def test_predictions_are_deduplicated_paged_and_rolled_up(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "store.db"))
+    # Two per timestamp so pages must break ties on id
+    predictions = [_prediction(i, timestamp=datetime(2026, 3, 4, 12) - timedelta(hours=i // 2)) for i in range(9)]
+
+    async def run():
+        await storage.connect()
+        first = await storage.insert_predictions(predictions[:5])
+        replayed = await storage.insert_predictions(predictions)
+        pages, after = [], None
+        while True:
+            page = await storage.prediction_history("u1", 4, after=after)
+            pages.append([p["id"] for p in page])
+            if len(page) < 4:
+                break
+            after = (page[-1]["timestamp"], page[-1]["id"])
+        analytics = await storage.prediction_analytics("u1", "week")
+        await storage.close()
+        return first, replayed, pages, analytics
+
+    first, replayed, pages, analytics = asyncio.run(run())
+    assert len(first) == 5 and len(replayed) == 4
+    assert pages == [["0001", "0000", "0003", "0002"], ["0005", "0004", "0007", "0006"], ["0008"]]
+    assert analytics["series"] == [
+        {"period": datetime(2026, 3, 2), "disease_name": "rust", "count": 9, "mean_confidence": 0.5}
+    ]
+    assert analytics["totals"] == {"rust": 9}
+
+
+def test_settings_reject_mongo_only_features_with_sqlite_storage():
+    with pytest.raises(ValidationError, match="PREDICTION_CACHE_SHARED=true needs STORAGE_BACKEND=mongo"):
+        Settings(STORAGE_BACKEND="sqlite", PREDICTION_CACHE_SHARED=True)
+    with pytest.raises(ValidationError, match="JOBS_BACKEND=mongo needs STORAGE_BACKEND=mongo"):
+        Settings(STORAGE_BACKEND="sqlite", JOBS_BACKEND="mongo")
+    assert Settings(STORAGE_BACKEND="sqlite", JOBS_BACKEND="sqlite").STORAGE_BACKEND == "sqlite"
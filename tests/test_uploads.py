@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import io
+import struct
+import zlib
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+from app.core.uploads import MULTIPART_OVERHEAD_BYTES, RequestSizeLimitMiddleware, read_image_upload
+
+
+def _upload(data: bytes, size=None) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="leaf.jpg", size=size)
+
+
+def _jpeg(width=64, height=48) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "green").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_valid_upload_is_hashed_and_measured():
+    data = _jpeg()
+    upload = asyncio.run(read_image_upload(_upload(data), max_bytes=1 << 20, max_pixels=10_000, chunk_size=100))
+
+    assert upload.data == data
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    assert upload.size == len(data)
+    assert (upload.format, upload.width, upload.height) == ("JPEG", 64, 48)
+
+
+def test_oversized_upload_is_rejected_while_streaming():
+    data = _jpeg()
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_image_upload(_upload(data), max_bytes=len(data) - 1, max_pixels=10_000, chunk_size=100))
+    assert exc.value.status_code == 413
+
+
+def test_non_image_bytes_are_rejected():
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_image_upload(_upload(b"not an image at all"), max_bytes=1 << 20, max_pixels=10_000))
+    assert exc.value.status_code == 400
+
+
+def test_decompression_bomb_is_rejected_from_header():
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_image_upload(_upload(_jpeg(200, 200)), max_bytes=1 << 20, max_pixels=10_000))
+    assert exc.value.status_code == 413
+    assert "200x200" in exc.value.detail
+
+
+def test_header_beyond_pillows_own_limit_is_rejected_as_too_large():
+    buffer = io.BytesIO()
+    Image.new("L", (1, 1)).save(buffer, format="PNG")
+    png = bytearray(buffer.getvalue())
+    # Rewrite the IHDR chunk to declare a 100000x100000 image
+    png[16:24] = struct.pack(">II", 100_000, 100_000)
+    png[29:33] = struct.pack(">I", zlib.crc32(bytes(png[12:29])))
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(read_image_upload(_upload(bytes(png)), max_bytes=1 << 20, max_pixels=10 ** 12))
+    assert exc.value.status_code == 413
+
+
+def test_request_size_limit_stops_declared_and_streamed_bodies():
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": file.size}
+
+    client = TestClient(RequestSizeLimitMiddleware(app, {"/upload": 1000}))
+    limit = 1000 + MULTIPART_OVERHEAD_BYTES
+    body = (b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.jpg\"\r\n\r\n"
+            + b"x" * limit + b"\r\n--b--\r\n")
+
+    def chunked():
+        # No Content-Length, so only counting the received bytes can stop it
+        for start in range(0, len(body), 64 * 1024):
+            yield body[start:start + 64 * 1024]
+
+    small = client.post("/upload", files={"file": ("a.jpg", b"x" * 1000)})
+    declared = client.post("/upload", files={"file": ("a.jpg", b"x" * limit)})
+    streamed = client.post("/upload", content=chunked(), headers={"content-type": "multipart/form-data; boundary=b"})
+
+    assert small.status_code == 200 and small.json() == {"size": 1000}
+    assert declared.status_code == 413 and streamed.status_code == 413
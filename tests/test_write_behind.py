@@ -0,0 +1,61 @@
+import asyncio
+from app.core.database import WriteBehindBuffer
+
+
+class FakeCollection:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    async def insert_many(self, docs, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        self.batches.append(list(docs))
+
+
+def test_write_behind_flushes_full_batches_and_drains_on_close():
+    collection = FakeCollection()
+    buffer = WriteBehindBuffer(lambda: collection, batch_size=4, flush_interval=60)
+
+    async def run():
+        await buffer.put_many({"n": i} for i in range(10))
+        await asyncio.sleep(0.01)
+        flushed_before_close = [len(batch) for batch in collection.batches]
+        await buffer.close()
+        return flushed_before_close
+
+    assert asyncio.run(run()) == [4, 4]
+    assert [len(batch) for batch in collection.batches] == [4, 4, 2]
+    assert buffer.stats()["written"] == 10
+
+
+def test_write_behind_flushes_on_interval():
+    collection = FakeCollection()
+    buffer = WriteBehindBuffer(lambda: collection, batch_size=100, flush_interval=0.01)
+
+    async def run():
+        await buffer.put({"n": 1})
+        await asyncio.sleep(0.05)
+        flushed = len(collection.batches)
+        await buffer.close()
+        return flushed
+
+    assert asyncio.run(run()) == 1
+
+
+def test_write_behind_retries_then_drops():
+    collection = FakeCollection(failures=2)
+    buffer = WriteBehindBuffer(lambda: collection, batch_size=2, flush_interval=60, max_retries=1, retry_backoff=0)
+
+    async def run():
+        await buffer.put_many([{"n": 1}, {"n": 2}])
+        await buffer.close()
+        await buffer.put_many([{"n": 3}, {"n": 4}])
+        await buffer.close()
+
+    asyncio.run(run())
+    stats = buffer.stats()
+    assert stats["dropped"] == 2
+    assert stats["retried"] == 2
+    assert stats["written"] == 2